@@ -6,8 +6,15 @@ from flask_login import LoginManager
 from app.models.user import User
 from app.services.data_service import load_data
 from app.services.firebase_service import get_firestore_client
+from app.services.job_service import init_jobs
+from app.services.search_service import start_trigram_build
+from app.services.version_service import init_versions
+from app.services.email_service import init_mail
+from app.utils.compression import init_compression
+from app.utils.static_assets import init_static_assets
+from app.utils.template_cache import init_template_cache, precompile_templates
 from app.utils.helpers import (
-    get_due_date_text_class, get_due_date_status, get_comment_count,
+    get_due_date_text_class, get_due_date_class, get_due_date_status, get_comment_count,
     format_timestamp, format_date, get_label_by_id
 )
 
@@ -26,12 +33,25 @@ def create_app():
     import os
     base_dir = os.path.abspath(os.path.dirname(os.path.dirname(__file__)))
     template_dir = os.path.join(base_dir, 'templates')
-    app = Flask(__name__, template_folder=template_dir)
+    static_dir = os.path.join(base_dir, 'static')
+    app = Flask(__name__, template_folder=template_dir, static_folder=static_dir)
     app.secret_key = 'your-secret-key-change-in-production'
     
+    # Compress large HTML/JSON responses and serve precompressed static files
+    init_compression(app)
+    
+    # Fingerprinted static URLs, cached by browsers for a year
+    init_static_assets(app)
+    
+    # Reuse compiled templates across workers and restarts
+    init_template_cache(app, os.environ.get('JINJA_CACHE_DIR', os.path.join(base_dir, '.jinja_cache')))
+    
     # Initialize Firebase
     db = get_firestore_client()
     
+    # Data versions (cache keys and ETags) shared with the other workers
+    init_versions(db)
+    
     # Setup Flask-Login
     login_manager = LoginManager()
     login_manager.init_app(app)
@@ -56,6 +76,7 @@ def create_app():
     # Register template functions and filters
     app.jinja_env.globals.update(
         get_due_date_text_class=get_due_date_text_class,
+        get_due_date_class=get_due_date_class,
         get_due_date_status=get_due_date_status,
         get_comment_count=lambda card_id: get_comment_count(card_id, lambda: load_data(db)),
         format_timestamp=format_timestamp,
@@ -82,4 +103,21 @@ def create_app():
     app.register_blueprint(api_bp)
     app.register_blueprint(issues_bp)
     
+    # SMTP settings from the environment
+    init_mail(app)
+    
+    # Background jobs; handlers register on import, before persisted jobs are requeued.
+    # SCHEDULE_JOBS=1 also enqueues the daily jobs (in one process per queue)
+    from app.services import job_handlers
+    app.config['SCHEDULE_JOBS'] = os.environ.get('SCHEDULE_JOBS') == '1'
+    init_jobs(app, os.environ.get('JOB_QUEUE_DIR', os.path.join(base_dir, 'data', 'jobs')),
+              int(os.environ.get('JOB_WORKERS', 4)), job_handlers.DAILY_JOBS)
+    
+    # Substring and fuzzy search fall back to word search until this finishes
+    start_trigram_build(lambda: load_data(db))
+    
+    # Compile all templates now instead of on each one's first request
+    if os.environ.get('PRECOMPILE_TEMPLATES') == '1':
+        precompile_templates(app)
+    
     return app
\ No newline at end of file
@@ -5,6 +5,7 @@ from flask_login import login_required, current_user
 
 from app.services.data_service import load_data, save_data
 from app.services.firebase_service import get_firestore_client
+from app.services.job_service import job_metrics
 
 # Get database instance
 db = get_firestore_client()
@@ -77,7 +78,7 @@ def admin_update_user_status():
             user['status'] = new_status
             break
     
-    save_data(data)
+    save_data(data, users=True)
     return jsonify({'success': True})
 
 
@@ -100,7 +101,7 @@ def admin_update_user_role():
             user['role'] = new_role
             break
     
-    save_data(data)
+    save_data(data, users=True)
     return jsonify({'success': True})
 
 
@@ -128,5 +129,15 @@ def admin_bulk_update_users():
             if user['id'] in user_ids:
                 user['status'] = 'suspended'
     
-    save_data(data)
-    return jsonify({'success': True})
\ No newline at end of file
+    save_data(data, users=True)
+    return jsonify({'success': True})
+
+
+@admin_bp.route('/jobs')
+@login_required
+def admin_jobs():
+    """Background job counters, timings and queue depth"""
+    if not current_user.is_admin():
+        return jsonify({'success': False, 'error': 'Access denied'})
+    
+    return jsonify({'success': True, **job_metrics()})
@@ -1,17 +1,45 @@
 """General API routes for various functionality."""
 
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, send_file, url_for
 from flask_login import login_required, current_user
 from datetime import datetime
 
 from app.services.data_service import load_data, save_data
 from app.services.firebase_service import get_firestore_client
 from app.utils.helpers import extract_mentions
-from app.services.notification_service import create_mention_notifications
+from app.utils.http_cache import conditional
+from app.utils.pagination import (
+    get_page_args, sort_and_paginate, paginate_query, encode_cursor, decode_cursor, InvalidCursor
+)
+from app.services.notification_store_service import (
+    get_notification_store, notification_version, mark_all_read
+)
+from app.services.card_index_service import track_card, get_card_index, due_date_range
+from app.services.stats_service import record_card, adjust_collection
+from app.services.progress_service import get_progress, progress_to_json
+from app.services.analytics_service import get_analytics, analytics_data_version
+from app.services.report_service import (
+    REPORT_BUILDERS, FORMATS, ReportFailed, request_report, load_report, cached_report_path, report_status,
+    job_report_key, report_channel
+)
+from app.services.job_service import enqueue
+from app.services.hierarchy_service import get_hierarchy
+from app.services.event_service import bus as event_bus, user_channel, project_channel
+from app.services.board_event_service import publish_card_created, publish_card_moved
+from app.services.activity_service import record_card_event
+from app.services.card_history_service import snapshot, save_card_change
+from app.utils.sse import sse_response, stream_subscription
+from app.services.search_service import (
+    get_search_index, get_trigram_index, index_card, index_epic, index_story
+)
 
 # Get database instance
 db = get_firestore_client()
 
+# Per-connection limits for board streams; a slower client is dropped and resyncs
+BOARD_STREAM_QUEUE = 200
+BOARD_STREAM_MAX_BYTES = 512 * 1024
+
 api_bp = Blueprint('api', __name__, url_prefix='/api')
 
 
@@ -32,7 +60,7 @@ def save_mindmap():
                 project['mindmap_updated_at'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
                 break
         
-        save_data(data, db)
+        save_data(data, db, project_id=project_id)
         return jsonify({'success': True})
         
     except Exception as e:
@@ -42,6 +70,7 @@ def save_mindmap():
 
 @api_bp.route('/load_mindmap/<int:project_id>')
 @login_required
+@conditional(project_arg='project_id')
 def load_mindmap(project_id):
     try:
         data = load_data(db)
@@ -89,7 +118,8 @@ def add_epic():
             data['epics'] = []
         
         data['epics'].append(epic)
-        save_data(data, db)
+        save_data(data, db, project_id=project_id)
+        index_epic(epic)
         
         return jsonify({'success': True, 'epic': epic})
         
@@ -132,7 +162,8 @@ def add_story():
             data['stories'] = []
         
         data['stories'].append(story)
-        save_data(data, db)
+        save_data(data, db, project_id=story['project_id'])
+        index_story(story)
         
         return jsonify({'success': True, 'story': story})
         
@@ -181,7 +212,12 @@ def add_card():
             data['cards'] = []
         
         data['cards'].append(card)
-        save_data(data, db)
+        save_card_change(db, data, None, card, current_user.username)
+        index_card(card)
+        track_card(card)
+        record_card(card)
+        publish_card_created(card)
+        record_card_event(db, 'card_created', card, current_user.username)
         
         return jsonify({'success': True, 'card': card})
         
@@ -200,9 +236,16 @@ def update_card_status():
         
         card = next((c for c in data['cards'] if c['id'] == card_id), None)
         if card:
+            before = snapshot(card)
+            previous_status = card['status']
             card['status'] = new_status
             card['updated_at'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            save_data(data, db)
+            save_card_change(db, data, before, card, current_user.username)
+            track_card(card)
+            record_card(card)
+            publish_card_moved(card, previous_status)
+            if previous_status != new_status:
+                record_card_event(db, 'card_moved', card, current_user.username, from_status=previous_status)
             return jsonify({'success': True})
         else:
             return jsonify({'success': False, 'error': 'Card not found'})
@@ -216,10 +259,27 @@ def update_card_status():
 @login_required
 def get_epics(project_id):
     try:
+        limit, cursor = get_page_args(request.args)
+        
+        if db is not None:
+            # Read a single page straight from the epics subcollection
+            epics_ref = db.collection('projects').document(str(project_id)).collection('epics')
+            snapshots, next_cursor = paginate_query(epics_ref, limit, cursor)
+            epics = []
+            for doc in snapshots:
+                epic = doc.to_dict()
+                epic['id'] = int(doc.id)
+                epic['project_id'] = project_id
+                epics.append(epic)
+            return jsonify({'success': True, 'epics': epics, 'next_cursor': next_cursor})
+        
         data = load_data(db)
         epics = [e for e in data.get('epics', []) if e['project_id'] == project_id]
-        return jsonify({'success': True, 'epics': epics})
+        epics, next_cursor = sort_and_paginate(epics, limit, cursor)
+        return jsonify({'success': True, 'epics': epics, 'next_cursor': next_cursor})
         
+    except InvalidCursor as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     except Exception as e:
         print(f"Error getting epics: {e}")
         return jsonify({'success': False, 'error': str(e)})
@@ -238,52 +298,155 @@ def get_stories(epic_id):
         return jsonify({'success': False, 'error': str(e)})
 
 
-@api_bp.route('/search')
+@api_bp.route('/gantt/progress')
 @login_required
-def search():
+def gantt_progress():
+    """Per-project and per-epic completion, cached until the next data change"""
     try:
-        query = request.args.get('q', '').lower()
-        if not query:
-            return jsonify({'success': True, 'results': []})
+        progress, version = get_progress(lambda: load_data(db))
+        projects = progress_to_json(progress)
+        # Depends on the day as well as the data, so it is not part of the cached progress
+        overdue = get_card_index(lambda: load_data(db)).due_counts_by_project(due_date_range('overdue'))
+        for project in projects:
+            project['overdue'] = overdue.get(project['project_id'], 0)
+        return jsonify({'success': True, 'version': version, 'projects': projects})
         
-        data = load_data(db)
-        results = []
-        
-        # Search cards
-        for card in data.get('cards', []):
-            if (query in card.get('title', '').lower() or 
-                query in card.get('description', '').lower()):
-                results.append({
-                    'type': 'card',
-                    'id': card['id'],
-                    'title': card['title'],
-                    'description': card.get('description', '')[:100]
-                })
-        
-        # Search epics
-        for epic in data.get('epics', []):
-            if (query in epic.get('name', '').lower() or 
-                query in epic.get('description', '').lower()):
-                results.append({
-                    'type': 'epic',
-                    'id': epic['id'],
-                    'title': epic['name'],
-                    'description': epic.get('description', '')[:100]
-                })
-        
-        # Search stories
-        for story in data.get('stories', []):
-            if (query in story.get('name', '').lower() or 
-                query in story.get('description', '').lower()):
-                results.append({
-                    'type': 'story',
-                    'id': story['id'],
-                    'title': story['name'],
-                    'description': story.get('description', '')[:100]
-                })
-        
-        return jsonify({'success': True, 'results': results})
+    except Exception as e:
+        print(f"Error getting gantt progress: {e}")
+        return jsonify({'success': False, 'error': str(e)})
+
+
+@api_bp.route('/analytics/data')
+@login_required
+@conditional(version_for=analytics_data_version)
+def analytics_data():
+    """Project health, assignee workload and breakdowns, cached until the next data change"""
+    try:
+        analytics, version = get_analytics(lambda: load_data(db))
+        return jsonify({'success': True, 'version': version, **analytics})
         
+    except Exception as e:
+        print(f"Error getting analytics data: {e}")
+        return jsonify({'success': False, 'error': str(e)})
+
+
+def _enqueue_report(payload):
+    return enqueue('analytics_report', payload)
+
+
+@api_bp.route('/analytics/report/<report_type>')
+@login_required
+def analytics_report(report_type):
+    """A cached report, or 202 with the id of the job building it (?format=json|csv)"""
+    try:
+        if report_type not in REPORT_BUILDERS:
+            return jsonify({'success': False, 'error': f'Unknown report type: {report_type}'}), 404
+        fmt = request.args.get('format', 'json')
+        if fmt not in FORMATS:
+            return jsonify({'success': False, 'error': f'Unknown format: {fmt}'}), 400
+        
+        key, job_id = request_report(report_type, _enqueue_report)
+        if job_id is None:
+            if fmt == 'csv':
+                path = cached_report_path(key, 'csv')
+                if path is not None:
+                    return send_file(path, mimetype='text/csv', as_attachment=True,
+                                     download_name=f'{report_type}-report.csv', max_age=0)
+            else:
+                report = load_report(key)
+                if report is not None:
+                    return jsonify(dict(report, cached=True))
+            # Pruned or unreadable since it was found: build it again
+            key, job_id = request_report(report_type, _enqueue_report, rebuild=True)
+        
+        return jsonify({
+            'success': True,
+            'status': 'queued',
+            'job_id': job_id,
+            'report_id': key,
+            'status_url': url_for('api.analytics_report_status', job_id=job_id),
+            'stream_url': url_for('api.analytics_report_stream', job_id=job_id)
+        }), 202
+        
+    except ReportFailed as e:
+        response = jsonify({
+            'success': False,
+            'status': 'failed',
+            'error': str(e),
+            'report_id': e.status['report_id'],
+            'retry_after': e.retry_after
+        })
+        response.headers['Retry-After'] = str(e.retry_after)
+        return response, 503
+    except Exception as e:
+        print(f"Error requesting analytics report: {e}")
+        return jsonify({'success': False, 'error': str(e)})
+
+
+@api_bp.route('/analytics/report/jobs/<job_id>')
+@login_required
+def analytics_report_status(job_id):
+    key = job_report_key(job_id)
+    status = report_status(key) if key else None
+    if status is None:
+        return jsonify({'success': False, 'error': 'Report job not found'}), 404
+    return jsonify({'success': True, **status})
+
+
+@api_bp.route('/analytics/report/jobs/<job_id>/stream')
+@login_required
+def analytics_report_stream(job_id):
+    """Server-Sent Events: progress of a report job, then 'done' or 'failed'"""
+    key = job_report_key(job_id)
+    if key is None:
+        return jsonify({'success': False, 'error': 'Report job not found'}), 404
+    # Subscribe before reading the status so no update is missed
+    subscription = event_bus.subscribe(report_channel(key))
+    status = report_status(key)
+    if status is None:
+        subscription.close()
+        return jsonify({'success': False, 'error': 'Report job not found'}), 404
+    initial = [('progress', status)]
+    if status['state'] in ('done', 'failed'):
+        initial.append((status['state'], status))
+    return sse_response(stream_subscription(subscription, initial))
+
+
+@api_bp.route('/search')
+@login_required
+def search():
+    try:
+        query = request.args.get('q', '')
+        limit, cursor = get_page_args(request.args)
+        if not query.strip():
+            return jsonify({'success': True, 'results': [], 'next_cursor': None})
+        
+        types = request.args.get('types')
+        types = set(types.split(',')) if types else None
+        
+        after = decode_cursor(cursor)
+        mode = request.args.get('mode', 'substring')
+        
+        # substring (default, as before indexing): match inside words,
+        # word: ranked prefix search, fuzzy: tolerate typos
+        trigram_index = get_trigram_index(lambda: load_data(db)) if mode in ('substring', 'fuzzy') else None
+        if trigram_index is not None and mode == 'substring':
+            matches = trigram_index.search_substring(query, limit=limit, after=after, types=types)
+        elif trigram_index is not None:
+            matches = trigram_index.search_fuzzy(query, limit=limit, after=after, types=types)
+        else:
+            # Word search, also while the trigram index is still being built
+            mode = 'word'
+            index = get_search_index(lambda: load_data(db))
+            matches = index.search(query, limit=limit, after=after, types=types)
+        results = [doc for _, doc in matches]
+        
+        # A full page may have more behind it; resume after the last sort key
+        next_cursor = encode_cursor(matches[-1][0]) if len(matches) == limit else None
+        return jsonify({'success': True, 'results': results, 'mode': mode, 'next_cursor': next_cursor})
+        
+    except InvalidCursor as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     except Exception as e:
         print(f"Error in search: {e}")
         return jsonify({'success': False, 'error': str(e)})
@@ -291,20 +454,67 @@ def search():
 
 @api_bp.route('/notifications')
 @login_required
+@conditional(per_user=True, version_for=lambda: notification_version(db, current_user.id))
 def get_notifications():
     try:
-        data = load_data(db)
-        user_notifications = [n for n in data.get('notifications', []) 
-                            if n.get('user_id') == current_user.id]
-        return jsonify({'success': True, 'notifications': user_notifications})
-        
+        store = get_notification_store(db)
+        limit, cursor = get_page_args(request.args)
+        # Newest first, one page read from the user's own store
+        notifications, next_cursor = store.list(current_user.id, limit, cursor)
+        return jsonify({
+            'success': True,
+            'notifications': notifications,
+            'unread_count': store.unread_count(current_user.id),
+            'next_cursor': next_cursor
+        })
+        
+    except InvalidCursor as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     except Exception as e:
         print(f"Error getting notifications: {e}")
         return jsonify({'success': False, 'error': str(e)})
 
 
+@api_bp.route('/notifications/mark_all_read', methods=['POST'])
+@login_required
+def mark_all_notifications_read():
+    try:
+        changed = mark_all_read(db, current_user.id)
+        return jsonify({'success': True, 'updated': changed})
+        
+    except Exception as e:
+        print(f"Error marking all notifications as read: {e}")
+        return jsonify({'success': False, 'error': str(e)})
+
+
+@api_bp.route('/notifications/stream')
+@login_required
+def notification_stream():
+    """Server-Sent Events: new notifications and the unread count for the current user"""
+    user_id = current_user.id
+    # Subscribe before counting so nothing published in between is missed
+    subscription = event_bus.subscribe(user_channel(user_id))
+    try:
+        unread = get_notification_store(db).unread_count(user_id)
+    except Exception:
+        subscription.close()
+        raise
+    # The store publishes absolute 'unread' counts with every change
+    return sse_response(stream_subscription(subscription, [('unread', {'count': unread})]))
+
+
+@api_bp.route('/projects/<int:project_id>/board/stream')
+@login_required
+def board_stream(project_id):
+    """Server-Sent Events: card created/moved/updated/deleted deltas for one project's board"""
+    subscription = event_bus.subscribe(project_channel(project_id), max_queue=BOARD_STREAM_QUEUE,
+                                       max_bytes=BOARD_STREAM_MAX_BYTES)
+    return sse_response(stream_subscription(subscription))
+
+
 @api_bp.route('/team_members')
 @login_required
+@conditional()
 def get_team_members():
     try:
         data = load_data(db)
@@ -345,6 +555,7 @@ def add_project():
         
         data['projects'].append(project)
         save_data(data, db)
+        adjust_collection('projects', 1)
         
         return jsonify({'success': True, 'project': project})
         
@@ -355,43 +566,14 @@ def add_project():
 
 @api_bp.route('/projects/<int:project_id>/hierarchy', methods=['GET'])
 @login_required
+@conditional(project_arg='project_id')
 def get_project_hierarchy(project_id):
     try:
-        data = load_data(db)
-        
-        # Get project
-        project = next((p for p in data['projects'] if p['id'] == project_id), None)
-        if not project:
+        hierarchy, _ = get_hierarchy(project_id, lambda: load_data(db))
+        if hierarchy is None:
             return jsonify({'success': False, 'error': 'Project not found'})
         
-        # Get epics for this project
-        epics = [e for e in data.get('epics', []) if e['project_id'] == project_id]
-        
-        # Build hierarchy
-        hierarchy = {
-            'project': project,
-            'epics': []
-        }
-        
-        for epic in epics:
-            epic_data = {
-                'epic': epic,
-                'stories': []
-            }
-            
-            # Get stories for this epic
-            stories = [s for s in data.get('stories', []) if s['epic_id'] == epic['id']]
-            
-            for story in stories:
-                story_data = {
-                    'story': story,
-                    'cards': [c for c in data.get('cards', []) if c['story_id'] == story['id']]
-                }
-                epic_data['stories'].append(story_data)
-            
-            hierarchy['epics'].append(epic_data)
-        
-        return jsonify({'success': True, 'hierarchy': hierarchy})
+        return jsonify(dict(hierarchy, success=True))
         
     except Exception as e:
         print(f"Error getting project hierarchy: {e}")
@@ -410,7 +592,7 @@ def archive_project():
             project['archived'] = True
             project['archived_at'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
             project['archived_by'] = current_user.username
-            save_data(data, db)
+            save_data(data, db, project_id=project_id)
             return jsonify({'success': True})
         else:
             return jsonify({'success': False, 'error': 'Project not found'})
@@ -432,7 +614,7 @@ def restore_project():
             project['archived'] = False
             project['restored_at'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
             project['restored_by'] = current_user.username
-            save_data(data, db)
+            save_data(data, db, project_id=project_id)
             return jsonify({'success': True})
         else:
             return jsonify({'success': False, 'error': 'Project not found'})
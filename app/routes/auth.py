@@ -55,7 +55,7 @@ def login():
                 if u['id'] == user_data['id']:
                     u['last_login'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
                     break
-            save_data(data, db)
+            save_data(data, db, users=True)
             
             login_user(user)
             return redirect(url_for('dashboard.home'))
@@ -119,7 +119,7 @@ def profile():
                 user['email_notifications'] = email_notifications
                 break
         
-        save_data(data, db)
+        save_data(data, db, users=True)
         flash('Profile updated successfully!')
         return redirect(url_for('auth.profile'))
     
@@ -1,10 +1,16 @@
 """Dashboard and main navigation routes."""
 
-from flask import Blueprint, render_template, request, jsonify
+from flask import Blueprint, render_template, request, jsonify, url_for
 from flask_login import login_required
 
 from app.services.data_service import load_data
 from app.services.firebase_service import get_firestore_client
+from app.utils.pagination import get_page_args, paginate, InvalidCursor
+from app.services.card_index_service import get_card_index, filters_from_args
+from app.services.search_service import get_search_index
+from app.services.stats_service import get_stats_store
+from app.services.progress_service import get_progress
+from app.services.fragment_cache_service import render_issue_rows
 
 # Get database instance
 db = get_firestore_client()
@@ -13,6 +19,36 @@ db = get_firestore_client()
 dashboard_bp = Blueprint('dashboard', __name__)
 
 
+def _card_page(data, endpoint, **forced_filters):
+    """Query one page of cards for a list page from the request args.
+
+    Returns (cards, total, next_page_url). Filtering and sorting run on
+    the card index so only the visible rows reach the template.
+    """
+    limit, cursor = get_page_args(request.args, default_limit=100)
+    # Hand-edited sort or due date values fall back to the defaults
+    filters, labels, text_query, sort = filters_from_args(request.args, strict=False)
+    filters.update(forced_filters)
+    
+    ids = None
+    if text_query:
+        ids = get_search_index(lambda: data).match_ids(text_query, 'card')
+    
+    cards, key = get_card_index(lambda: data).query(filters, labels, ids, sort)
+    try:
+        page, next_cursor = paginate(cards, limit, cursor, key=key)
+    except InvalidCursor:
+        # Stale or malformed cursor - start again from the first page
+        page, next_cursor = paginate(cards, limit, key=key)
+    
+    next_page_url = None
+    if next_cursor:
+        args = request.args.to_dict()
+        args.update(limit=limit, cursor=next_cursor)
+        next_page_url = url_for(endpoint, **args)
+    return page, len(cards), next_page_url
+
+
 @dashboard_bp.route('/')
 @login_required
 def home():
@@ -25,14 +61,9 @@ def dashboard():
     data = load_data(db)
     # Filter out archived projects
     active_projects = [p for p in data['projects'] if not p.get('archived', False)]
-    all_cards = data['cards']
-    stats = {
-        'todo': len([c for c in all_cards if c['status'] == 'todo']),
-        'in_progress': len([c for c in all_cards if c['status'] == 'in_progress']),
-        'done': len([c for c in all_cards if c['status'] == 'done']),
-        'total': len(all_cards)
-    }
-    return render_template('dashboard.html', projects=active_projects, stats=stats, load_data=load_data)
+    stats = get_stats_store(lambda: data).get_card_stats()
+    pending_users = [u for u in data.get('users', []) if u.get('status') == 'pending']
+    return render_template('dashboard.html', projects=active_projects, stats=stats, pending_users=pending_users)
 
 
 @dashboard_bp.route('/issues')
@@ -42,21 +73,26 @@ def issues_list():
     project_id = request.args.get('project_id', type=int)
     
     if project_id:
-        cards = [c for c in data['cards'] if c['project_id'] == project_id]
         project = next((p for p in data['projects'] if p['id'] == project_id), None)
         epics = [e for e in data['epics'] if e['project_id'] == project_id]
         stories = [s for s in data['stories'] if s['project_id'] == project_id]
     else:
-        cards = data['cards']
         project = None
         epics = data['epics']
         stories = data['stories']
 
+    cards, total_cards, next_page_url = _card_page(data, 'dashboard.issues_list')
+
     # Filter out archived projects
     active_projects = [p for p in data['projects'] if not p.get('archived', False)]
+    # Unchanged rows come from the fragment cache
+    rows = render_issue_rows('issues', cards, data, active_projects, epics, stories)
     
     return render_template('issues.html', 
                          cards=cards, 
+                         rows=rows,
+                         total_cards=total_cards,
+                         next_page_url=next_page_url,
                          projects=active_projects,
                          project=project,
                          epics=epics,
@@ -68,10 +104,12 @@ def issues_list():
 @login_required
 def backlog():
     data = load_data(db)
-    backlog_cards = [c for c in data['cards'] if c['status'] == 'todo']
+    backlog_cards, total_cards, next_page_url = _card_page(data, 'dashboard.backlog', status='todo')
     # Filter out archived projects
     active_projects = [p for p in data['projects'] if not p.get('archived', False)]
-    return render_template('backlog.html', cards=backlog_cards, projects=active_projects)
+    rows = render_issue_rows('backlog', backlog_cards, data, active_projects)
+    return render_template('backlog.html', cards=backlog_cards, rows=rows, projects=active_projects,
+                         total_cards=total_cards, next_page_url=next_page_url)
 
 
 @dashboard_bp.route('/stories')
@@ -126,8 +164,8 @@ def epics():
 @dashboard_bp.route('/analytics')
 @login_required
 def analytics():
-    data = load_data(db)
-    return render_template('analytics.html', load_data=load_data)
+    # Figures are fetched by the page from /api/analytics/data
+    return render_template('gantt_analytics.html')
 
 
 @dashboard_bp.route('/settings')
@@ -174,46 +212,38 @@ def gantt_debug():
     print(f"Debug - Projects after filtering: {projects}")
     print(f"Debug - Cards: {cards}")
     
-    # Calculate project progress
-    def get_project_progress(project_id):
-        project_cards = [c for c in cards if c.get('project_id') == project_id]
-        if not project_cards:
-            return 0
-        completed = len([c for c in project_cards if c.get('status') == 'done'])
-        return round((completed / len(project_cards)) * 100)
+    progress, _ = get_progress(lambda: data)
+    for project in projects:
+        project['progress'] = progress.get(project['id'], {}).get('percent', 0)
     
     return render_template('gantt.html', 
                          projects=projects, 
-                         cards=cards,
-                         get_project_progress=get_project_progress)
+                         cards=cards)
 
 
 @dashboard_bp.route('/firebase')
 @login_required
 def firebase_dashboard():
-    data = load_data(db)
-    stats = {
-        'users_count': len(data['users']),
-        'projects_count': len(data['projects']),
-        'cards_count': len(data['cards']),
-        'comments_count': len(data['comments'])
-    }
+    stats = get_stats_store(lambda: load_data(db)).get_collection_counts()
     return render_template('firebase_dashboard.html', stats=stats)
 
 
 @dashboard_bp.route('/firebase-status')
 @login_required
 def firebase_status():
-    data = load_data(db)
-    return jsonify({
-        'success': True,
-        'data': {
-            'users_count': len(data['users']),
-            'projects_count': len(data['projects']),
-            'cards_count': len(data['cards']),
-            'comments_count': len(data['comments'])
-        }
-    })
+    store = get_stats_store(lambda: load_data(db))
+    response = {'success': True, 'data': store.get_collection_counts()}
+    
+    # ?verify=1 checks the running counters against a full recompute
+    if request.args.get('verify'):
+        data = load_data(db)
+        mismatches = store.verify(data)
+        if mismatches:
+            store.build(data)
+        response['verified'] = not mismatches
+        response['mismatches'] = mismatches
+    
+    return jsonify(response)
 
 
 @dashboard_bp.route('/migrate-to-firebase')
@@ -6,8 +6,23 @@ from datetime import datetime
 
 from app.services.data_service import load_data, save_data
 from app.services.firebase_service import get_firestore_client
-from app.utils.helpers import extract_mentions
-from app.services.notification_service import create_mention_notifications
+from app.utils.pagination import get_page_args, sort_and_paginate, paginate, InvalidCursor
+from app.utils.http_cache import conditional
+from app.services.notification_service import save_comment
+from app.services.search_service import get_search_index, index_card, index_comment, unindex_card
+from app.services.card_index_service import (
+    get_card_index, filters_from_args, track_card, untrack_card
+)
+from app.services.stats_service import record_card, forget_card, adjust_collection
+from app.services.notification_store_service import mark_read
+from app.services.job_service import enqueue
+from app.services.activity_service import (
+    get_activity_log, activity_version, record_card_event, record_comment_event
+)
+from app.services.board_event_service import (
+    publish_card_updated, publish_card_moved, publish_card_deleted
+)
+from app.services.card_history_service import snapshot, save_card_change, card_history, card_at_version
 
 # Get database instance
 db = get_firestore_client()
@@ -15,6 +30,30 @@ db = get_firestore_client()
 issues_bp = Blueprint('issues', __name__, url_prefix='/api')
 
 
+@issues_bp.route('/issues')
+@login_required
+def query_issues():
+    """Filtered, sorted and paginated cards for the issues and backlog pages."""
+    try:
+        limit, cursor = get_page_args(request.args)
+        filters, labels, text_query, sort = filters_from_args(request.args)
+        
+        ids = None
+        if text_query:
+            ids = get_search_index(lambda: load_data(db)).match_ids(text_query, 'card')
+        
+        cards, key = get_card_index(lambda: load_data(db)).query(filters, labels, ids, sort)
+        page, next_cursor = paginate(cards, limit, cursor, key=key)
+        return jsonify({'success': True, 'cards': page, 'total': len(cards), 'next_cursor': next_cursor})
+        
+    except ValueError as e:
+        # Malformed cursor (InvalidCursor), unknown sort field or due date filter
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        print(f"Error querying issues: {e}")
+        return jsonify({'success': False, 'error': str(e)})
+
+
 @issues_bp.route('/update_card', methods=['POST'])
 @login_required
 def update_card():
@@ -25,6 +64,7 @@ def update_card():
         card = next((c for c in data['cards'] if c['id'] == card_id), None)
         if not card:
             return jsonify({'success': False, 'error': 'Card not found'})
+        before = snapshot(card)
         
         # Update card fields
         if 'title' in request.json:
@@ -39,7 +79,12 @@ def update_card():
             card['labels'] = request.json['labels']
         
         card['updated_at'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        save_data(data, db)
+        change = save_card_change(db, data, before, card, current_user.username)
+        index_card(card)
+        track_card(card)
+        publish_card_updated(card)
+        if change:
+            record_card_event(db, 'card_updated', card, current_user.username, fields=sorted(change['d']))
         
         return jsonify({'success': True, 'card': card})
         
@@ -65,6 +110,55 @@ def get_card_details(card_id):
         return jsonify({'success': False, 'error': str(e)})
 
 
+@issues_bp.route('/card/<int:card_id>/history')
+@login_required
+def get_card_history(card_id):
+    try:
+        data = load_data(db)
+        card = next((c for c in data['cards'] if c['id'] == card_id), None)
+        if not card:
+            return jsonify({'success': False, 'error': 'Card not found'})
+        
+        limit = min(max(request.args.get('limit', 20, type=int), 1), 100)
+        cursor = request.args.get('cursor')
+        try:
+            before_version = int(cursor) if cursor else None
+        except ValueError:
+            raise InvalidCursor('Invalid cursor')
+        entries, next_cursor = card_history(db, card, limit, before_version)
+        return jsonify({
+            'success': True,
+            'version': card.get('version', 0),
+            'history': entries,
+            'next_cursor': next_cursor
+        })
+        
+    except InvalidCursor as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        print(f"Error getting card history: {e}")
+        return jsonify({'success': False, 'error': str(e)})
+
+
+@issues_bp.route('/card/<int:card_id>/history/<int:version>')
+@login_required
+def get_card_version(card_id, version):
+    try:
+        data = load_data(db)
+        card = next((c for c in data['cards'] if c['id'] == card_id), None)
+        if not card:
+            return jsonify({'success': False, 'error': 'Card not found'})
+        
+        state = card_at_version(db, card, version)
+        if state is None:
+            return jsonify({'success': False, 'error': 'Card did not exist at that version'})
+        return jsonify({'success': True, 'card': state})
+        
+    except Exception as e:
+        print(f"Error replaying card history: {e}")
+        return jsonify({'success': False, 'error': str(e)})
+
+
 @issues_bp.route('/card/<int:card_id>/comments', methods=['GET', 'POST'])
 @login_required
 def card_comments(card_id):
@@ -72,14 +166,23 @@ def card_comments(card_id):
         data = load_data(db)
         
         if request.method == 'GET':
+            limit, cursor = get_page_args(request.args)
             comments = [c for c in data.get('comments', []) if c['card_id'] == card_id]
-            return jsonify({'success': True, 'comments': comments})
+            comments, next_cursor = sort_and_paginate(
+                comments, limit, cursor,
+                key=lambda c: [c.get('created_at', ''), c.get('id', 0)]
+            )
+            return jsonify({'success': True, 'comments': comments, 'next_cursor': next_cursor})
         
         elif request.method == 'POST':
             content = request.json.get('content')
             if not content:
                 return jsonify({'success': False, 'error': 'Comment content is required'})
             
+            card = next((c for c in data['cards'] if c['id'] == card_id), None)
+            if not card:
+                return jsonify({'success': False, 'error': 'Card not found'})
+            
             # Get next comment ID
             comment_id = max([c.get('id', 0) for c in data.get('comments', [])], default=0) + 1
             
@@ -96,18 +199,16 @@ def card_comments(card_id):
             
             data['comments'].append(comment)
             
-            # Handle mentions
-            mentions = extract_mentions(content)
-            if mentions:
-                create_mention_notifications(
-                    mentions, card_id, current_user.username,
-                    lambda: load_data(db), lambda d: save_data(d, db)
-                )
-            
-            save_data(data, db)
+            # Comment and mention notifications are written together, without a full save
+            save_comment(comment, card, data, db)
+            record_comment_event(db, comment, card)
+            index_comment(comment)
+            adjust_collection('comments', 1)
             
             return jsonify({'success': True, 'comment': comment})
             
+    except InvalidCursor as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     except Exception as e:
         print(f"Error with card comments: {e}")
         return jsonify({'success': False, 'error': str(e)})
@@ -123,9 +224,14 @@ def update_card_due_date():
         
         card = next((c for c in data['cards'] if c['id'] == card_id), None)
         if card:
+            before = snapshot(card)
             card['due_date'] = due_date
             card['updated_at'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            save_data(data, db)
+            change = save_card_change(db, data, before, card, current_user.username)
+            track_card(card)
+            publish_card_updated(card)
+            if change:
+                record_card_event(db, 'card_updated', card, current_user.username, fields=['due_date'])
             return jsonify({'success': True})
         else:
             return jsonify({'success': False, 'error': 'Card not found'})
@@ -144,9 +250,16 @@ def move_to_backlog():
         
         card = next((c for c in data['cards'] if c['id'] == card_id), None)
         if card:
+            before = snapshot(card)
+            previous_status = card['status']
             card['status'] = 'todo'
             card['updated_at'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            save_data(data, db)
+            save_card_change(db, data, before, card, current_user.username)
+            track_card(card)
+            record_card(card)
+            publish_card_moved(card, previous_status)
+            if previous_status != 'todo':
+                record_card_event(db, 'card_moved', card, current_user.username, from_status=previous_status)
             return jsonify({'success': True})
         else:
             return jsonify({'success': False, 'error': 'Card not found'})
@@ -166,12 +279,18 @@ def delete_card():
         # Find and remove the card
         card_index = next((i for i, c in enumerate(data['cards']) if c['id'] == card_id), None)
         if card_index is not None:
-            data['cards'].pop(card_index)
+            card = data['cards'].pop(card_index)
             
             # Also remove associated comments
+            comment_count = len(data.get('comments', []))
             data['comments'] = [c for c in data.get('comments', []) if c['card_id'] != card_id]
             
-            save_data(data, db)
+            save_data(data, db, project_id=card['project_id'])
+            unindex_card(card_id)
+            untrack_card(card_id)
+            forget_card(card_id)
+            adjust_collection('comments', len(data['comments']) - comment_count)
+            publish_card_deleted(card)
             return jsonify({'success': True})
         else:
             return jsonify({'success': False, 'error': 'Card not found'})
@@ -184,14 +303,17 @@ def delete_card():
 @issues_bp.route('/send_to_assignee', methods=['POST'])
 @login_required
 def send_to_assignee():
-    # Placeholder for sending notification to assignee
     try:
         card_id = request.json.get('card_id')
-        message = request.json.get('message', '')
+        if card_id is None:
+            return jsonify({'success': False, 'error': 'card_id is required'})
         
-        # TODO: Implement actual notification sending
-        # For now, just return success
-        return jsonify({'success': True, 'message': 'Notification sent to assignee'})
+        # Loading the card and notifying its assignee happen in the background
+        job_id = enqueue('notify_assignee', {
+            'card_id': int(card_id),
+            'sender': current_user.username
+        })
+        return jsonify({'success': True, 'message': 'Notification sent to assignee', 'job_id': job_id})
         
     except Exception as e:
         print(f"Error sending to assignee: {e}")
@@ -202,15 +324,10 @@ def send_to_assignee():
 @login_required
 def mark_notification_read():
     try:
-        data = load_data(db)
         notification_id = request.json.get('notification_id')
         
-        notification = next((n for n in data.get('notifications', []) 
-                           if n['id'] == notification_id and n['user_id'] == current_user.id), None)
-        
-        if notification:
-            notification['read'] = True
-            save_data(data, db)
+        # Only the current user's store is searched, so other users' ids never match
+        if mark_read(db, current_user.id, str(notification_id)) is not None:
             return jsonify({'success': True})
         else:
             return jsonify({'success': False, 'error': 'Notification not found'})
@@ -222,50 +339,28 @@ def mark_notification_read():
 
 @issues_bp.route('/activity_feed')
 @login_required
+@conditional(version_for=lambda: activity_version(db))
 def activity_feed():
+    """Recent activity, newest first; filter with project_id and user, page with limit and cursor."""
     try:
-        data = load_data(db)
-        
-        # Generate activity feed from recent changes
-        activities = []
-        
-        # Recent cards
-        recent_cards = sorted(data.get('cards', []), 
-                            key=lambda x: x.get('updated_at', x.get('created_at', '')), 
-                            reverse=True)[:10]
-        
-        for card in recent_cards:
-            activities.append({
-                'type': 'card_update',
-                'card_id': card['id'],
-                'title': card['title'],
-                'user': card.get('updated_by', card.get('created_by', 'Unknown')),
-                'timestamp': card.get('updated_at', card.get('created_at', '')),
-                'action': 'updated' if card.get('updated_at') else 'created'
-            })
-        
-        # Recent comments
-        recent_comments = sorted(data.get('comments', []), 
-                               key=lambda x: x.get('created_at', ''), 
-                               reverse=True)[:5]
-        
-        for comment in recent_comments:
-            card = next((c for c in data['cards'] if c['id'] == comment['card_id']), None)
-            if card:
-                activities.append({
-                    'type': 'comment',
-                    'card_id': comment['card_id'],
-                    'card_title': card['title'],
-                    'user': comment['author'],
-                    'timestamp': comment['created_at'],
-                    'action': 'commented'
-                })
-        
-        # Sort all activities by timestamp
-        activities.sort(key=lambda x: x['timestamp'], reverse=True)
-        
-        return jsonify({'success': True, 'activities': activities[:15]})
+        limit, cursor = get_page_args(request.args, default_limit=15)
+        try:
+            before_id = int(cursor) if cursor else None
+        except ValueError:
+            raise InvalidCursor('Invalid cursor')
+        activities, next_id = get_activity_log(db).feed(
+            limit, before_id,
+            project_id=request.args.get('project_id', type=int),
+            user=request.args.get('user')
+        )
+        return jsonify({
+            'success': True,
+            'activities': activities,
+            'next_cursor': str(next_id) if next_id else None
+        })
         
+    except InvalidCursor as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     except Exception as e:
         print(f"Error getting activity feed: {e}")
         return jsonify({'success': False, 'error': str(e)})
\ No newline at end of file
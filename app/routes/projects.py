@@ -5,6 +5,10 @@ from flask_login import login_required
 
 from app.services.data_service import load_data
 from app.services.firebase_service import get_firestore_client
+from app.services.progress_service import get_progress
+from app.services.card_index_service import get_card_index, due_date_range
+from app.services.fragment_cache_service import render_board_columns
+from app.services.version_service import get_project_version
 
 # Get database instance
 db = get_firestore_client()
@@ -16,6 +20,7 @@ projects_bp = Blueprint('projects', __name__)
 @projects_bp.route('/board/<int:project_id>')
 @login_required
 def kanban_board(project_id):
+    version = get_project_version(project_id)
     data = load_data(db)
     project = next((p for p in data['projects'] if p['id'] == project_id), None)
     if not project:
@@ -29,11 +34,19 @@ def kanban_board(project_id):
     epics = [e for e in data['epics'] if e['project_id'] == project_id]
     stories = [s for s in data['stories'] if s['project_id'] == project_id]
     
-    return render_template('board.html', 
+    # Unchanged columns and cards come from the fragment cache
+    columns = render_board_columns(project_id, version, {
+        'todo': todo_cards,
+        'in_progress': in_progress_cards,
+        'done': done_cards
+    })
+    
+    return render_template('kanban.html', 
                          project=project,
                          todo_cards=todo_cards,
                          in_progress_cards=in_progress_cards,
                          done_cards=done_cards,
+                         columns=columns,
                          epics=epics,
                          stories=stories)
 
@@ -45,18 +58,13 @@ def gantt():
     # Filter out archived projects
     projects = [p for p in data.get('projects', []) if not p.get('archived', False)]
     cards = data.get('cards', [])
+    progress, _ = get_progress(lambda: data)
+    overdue = get_card_index(lambda: data).due_counts_by_project(due_date_range('overdue'))
     
-    # Calculate project progress
-    def get_project_progress(project_id):
-        project_cards = [c for c in cards if c.get('project_id') == project_id]
-        if not project_cards:
-            return 0
-        completed = len([c for c in project_cards if c.get('status') == 'done'])
-        return round((completed / len(project_cards)) * 100, 1)
-    
-    # Add progress to projects
+    # Add progress and overdue counts to projects
     for project in projects:
-        project['progress'] = get_project_progress(project['id'])
+        project['progress'] = progress.get(project['id'], {}).get('percent', 0)
+        project['overdue'] = overdue.get(project['id'], 0)
     
     return render_template('gantt.html', projects=projects, cards=cards)
 
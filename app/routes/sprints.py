@@ -1,11 +1,17 @@
 """Sprint management routes - both UI and API endpoints."""
 
-from flask import Blueprint, render_template, request, jsonify, flash, redirect, url_for
+from flask import Blueprint, render_template, request, jsonify, flash, redirect, url_for, abort
 from flask_login import login_required, current_user
-from datetime import datetime
+from datetime import datetime, date
 
 from app.services.data_service import load_data, save_data
 from app.services.firebase_service import get_firestore_client
+from app.utils.http_cache import conditional
+from app.services.activity_service import record_sprint_event
+from app.services.sprint_item_service import resolve_items, find_item, parse_fields
+from app.services.sprint_analytics_service import (
+    record_snapshot, get_sprint_analytics, analytics_version, DONE_STATUSES
+)
 
 # Get database instance
 db = get_firestore_client()
@@ -33,8 +39,50 @@ def sprints():
 @sprints_bp.route('/sprints/<int:sprint_id>')
 @login_required
 def sprint_detail(sprint_id):
-    # Placeholder for sprint detail - will implement later
-    return "Sprint detail page - Coming soon!", 200
+    data = load_data(db)
+    
+    sprint = next((s for s in data.get('sprints', []) if s['id'] == sprint_id), None)
+    if not sprint:
+        abort(404)
+    
+    sprint_issues = [i['data'] for i in resolve_items(sprint.get('items', []), data) if i['type'] == 'card']
+    in_sprint = {c['id'] for c in sprint_issues}
+    backlog_issues = [c for c in data.get('cards', [])
+                      if c.get('project_id') == sprint.get('project_id') and c['id'] not in in_sprint
+                      and c.get('status') not in DONE_STATUSES]
+    completed_issues = [c for c in sprint_issues if c.get('status') in DONE_STATUSES]
+    
+    duration_days = days_remaining = 0
+    try:
+        start = date.fromisoformat(sprint['start_date'][:10])
+        end = date.fromisoformat(sprint['end_date'][:10])
+        duration_days = (end - start).days + 1
+        days_remaining = max((end - date.today()).days, 0) if sprint.get('status') != 'completed' else 0
+    except (KeyError, TypeError, ValueError):
+        pass
+    
+    return render_template('sprint_detail.html',
+                         sprint=sprint,
+                         sprint_issues=sprint_issues,
+                         backlog_issues=backlog_issues,
+                         completed_issues=completed_issues,
+                         duration_days=duration_days,
+                         days_remaining=days_remaining)
+
+
+@sprints_bp.route('/api/sprints/<int:sprint_id>/analytics')
+@login_required
+@conditional(version_for=analytics_version)
+def sprint_analytics(sprint_id):
+    try:
+        analytics = get_sprint_analytics(db, sprint_id, lambda: load_data(db))
+        if analytics is None:
+            return jsonify({'success': False, 'error': 'Sprint not found'})
+        return jsonify({'success': True, **analytics})
+        
+    except Exception as e:
+        print(f"Error getting sprint analytics: {e}")
+        return jsonify({'success': False, 'error': str(e)})
 
 
 # Sprint API Routes
@@ -73,7 +121,7 @@ def create_sprint():
             data['sprints'] = []
         
         data['sprints'].append(sprint)
-        save_data(data, db)
+        save_data(data, db, project_id=project_id)
         
         return jsonify({'success': True, 'sprint': sprint})
         
@@ -108,7 +156,10 @@ def start_sprint(sprint_id):
         sprint['started_at'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         sprint['started_by'] = current_user.username
         
-        save_data(data, db)
+        save_data(data, db, project_id=project_id)
+        record_sprint_event(db, 'sprint_started', sprint, current_user.username)
+        # Baseline for the burndown
+        record_snapshot(db, data, sprint)
         
         return jsonify({'success': True, 'message': 'Sprint started successfully'})
         
@@ -135,7 +186,10 @@ def complete_sprint(sprint_id):
         sprint['completed_at'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         sprint['completed_by'] = current_user.username
         
-        save_data(data, db)
+        save_data(data, db, project_id=sprint.get('project_id'))
+        record_sprint_event(db, 'sprint_completed', sprint, current_user.username)
+        # Final point of the burndown and the sprint's velocity
+        record_snapshot(db, data, sprint)
         
         return jsonify({'success': True, 'message': 'Sprint completed successfully'})
         
@@ -146,6 +200,7 @@ def complete_sprint(sprint_id):
 
 @sprints_bp.route('/api/sprints/<int:sprint_id>/items', methods=['GET'])
 @login_required
+@conditional()
 def get_sprint_items(sprint_id):
     try:
         data = load_data(db)
@@ -154,27 +209,8 @@ def get_sprint_items(sprint_id):
         if not sprint:
             return jsonify({'success': False, 'error': 'Sprint not found'})
         
-        # Get sprint items (stories, epics, cards)
-        items = sprint.get('items', [])
-        
-        # Enrich items with full data
-        enriched_items = []
-        for item in items:
-            item_type = item.get('type')
-            item_id = item.get('id')
-            
-            if item_type == 'epic':
-                epic = next((e for e in data.get('epics', []) if e['id'] == item_id), None)
-                if epic:
-                    enriched_items.append({'type': 'epic', 'data': epic})
-            elif item_type == 'story':
-                story = next((s for s in data.get('stories', []) if s['id'] == item_id), None)
-                if story:
-                    enriched_items.append({'type': 'story', 'data': story})
-            elif item_type == 'card':
-                card = next((c for c in data.get('cards', []) if c['id'] == item_id), None)
-                if card:
-                    enriched_items.append({'type': 'card', 'data': card})
+        # Get sprint items (stories, epics, cards) with their full data
+        enriched_items = resolve_items(sprint.get('items', []), data, parse_fields(request.args.get('fields')))
         
         return jsonify({'success': True, 'items': enriched_items})
         
@@ -200,13 +236,7 @@ def add_sprint_item(sprint_id):
             return jsonify({'success': False, 'error': 'Type and ID are required'})
         
         # Check if item exists
-        item_data = None
-        if item_type == 'epic':
-            item_data = next((e for e in data.get('epics', []) if e['id'] == item_id), None)
-        elif item_type == 'story':
-            item_data = next((s for s in data.get('stories', []) if s['id'] == item_id), None)
-        elif item_type == 'card':
-            item_data = next((c for c in data.get('cards', []) if c['id'] == item_id), None)
+        item_data = find_item(data, item_type, item_id)
         
         if not item_data:
             return jsonify({'success': False, 'error': f'{item_type.title()} not found'})
@@ -227,7 +257,7 @@ def add_sprint_item(sprint_id):
             'added_by': current_user.username
         })
         
-        save_data(data, db)
+        save_data(data, db, project_id=sprint.get('project_id'))
         
         return jsonify({'success': True, 'message': f'{item_type.title()} added to sprint'})
         
@@ -0,0 +1,273 @@
+"""Append-only activity event log with an in-memory window of recent events.
+
+Write routes record events (card created/updated/moved, comment added,
+sprint started/completed) as they happen. Each event is appended to the
+log, an 'activity' Firestore collection or data/activity.jsonl locally,
+and to fixed-size ring buffers: one for all events and one per project
+and per user. The feed reads a page straight out of a buffer, newest
+first, so its cost depends on the page size rather than on the number
+of cards and comments. Only the buffered window is served; the log
+keeps the full history.
+
+Several processes may append to the same log. Before serving a page
+(or the feed's ETag version) each one buffers the events the others
+appended since it last looked: locally by reading the log file past
+the offset it has read to, with appends serialized by a file lock, and
+in Firestore by querying for newer ids at most every POLL_SECONDS.
+"""
+
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+from app.utils.file_lock import locked
+
+
+RECENT_EVENTS = 1000
+RECENT_EVENTS_PER_KEY = 200
+
+# How often the Firestore log is checked for events written by other processes
+POLL_SECONDS = 1.0
+
+
+def _project_key(project_id):
+    """Project ids arrive as ints or numeric strings depending on the writer."""
+    try:
+        return int(project_id)
+    except (TypeError, ValueError):
+        return project_id
+
+
+class RingBuffer:
+    """Fixed-capacity sequence that drops its oldest item when full; O(1) indexing."""
+
+    def __init__(self, capacity):
+        self._items = [None] * capacity
+        self._start = 0
+        self._len = 0
+
+    def __len__(self):
+        return self._len
+
+    def __getitem__(self, i):
+        if not 0 <= i < self._len:
+            raise IndexError(i)
+        return self._items[(self._start + i) % len(self._items)]
+
+    def append(self, item):
+        capacity = len(self._items)
+        if self._len < capacity:
+            self._items[(self._start + self._len) % capacity] = item
+            self._len += 1
+        else:
+            self._items[self._start] = item
+            self._start = (self._start + 1) % capacity
+
+    def page_before(self, before_id, limit):
+        """Up to limit items with id < before_id (all if None), newest first."""
+        hi = self._len
+        if before_id is not None:
+            # Ids increase with position; find the first id >= before_id
+            lo = 0
+            while lo < hi:
+                mid = (lo + hi) // 2
+                if self[mid]['id'] < before_id:
+                    lo = mid + 1
+                else:
+                    hi = mid
+        return [self[i] for i in range(hi - 1, max(hi - limit, 0) - 1, -1)]
+
+
+class ActivityLog:
+    """Persistent log plus the recent-event buffers."""
+
+    def __init__(self, db=None, log_path=os.path.join('data', 'activity.jsonl')):
+        self.db = db
+        self.log_path = log_path
+        self._lock = threading.Lock()
+        self._last_id = 0
+        self._offset = 0      # bytes of the local log already buffered
+        self._polled_at = 0   # last check of the Firestore log
+        self.recent = RingBuffer(RECENT_EVENTS)
+        self.by_project = {}
+        self.by_user = {}
+        self._load_recent()
+
+    def _load_recent(self):
+        if self.db is None:
+            self._catch_up()
+            return
+        from firebase_admin import firestore
+        query = self.db.collection('activity').order_by('id', direction=firestore.Query.DESCENDING)
+        events = [doc.to_dict() for doc in query.limit(RECENT_EVENTS).stream()]
+        for event in reversed(events):
+            self._buffer(event)
+        self._polled_at = time.time()
+
+    def _catch_up(self):
+        """Buffer events appended by other processes since the last look. Call under the lock."""
+        if self.db is not None:
+            if time.time() - self._polled_at < POLL_SECONDS:
+                return
+            query = (self.db.collection('activity').where('id', '>', self._last_id)
+                     .order_by('id').limit(RECENT_EVENTS))
+            for doc in query.stream():
+                self._buffer(doc.to_dict())
+            self._polled_at = time.time()
+            return
+        try:
+            if os.path.getsize(self.log_path) <= self._offset:
+                return
+            with open(self.log_path, 'rb') as f:
+                f.seek(self._offset)
+                chunk = f.read()
+        except OSError:
+            return
+        # Only whole lines; one still being written is read next time
+        chunk = chunk[:chunk.rfind(b'\n') + 1]
+        self._offset += len(chunk)
+        for line in chunk.splitlines():
+            try:
+                event = json.loads(line)
+            except ValueError:
+                continue
+            if event['id'] > self._last_id:
+                self._buffer(event)
+
+    def _buffer(self, event):
+        self._last_id = max(self._last_id, event['id'])
+        self.recent.append(event)
+        project_key = _project_key(event.get('project_id'))
+        if project_key is not None:
+            self.by_project.setdefault(project_key, RingBuffer(RECENT_EVENTS_PER_KEY)).append(event)
+        if event.get('user'):
+            self.by_user.setdefault(event['user'], RingBuffer(RECENT_EVENTS_PER_KEY)).append(event)
+
+    def _next_id(self):
+        # Microsecond timestamps, forced to increase, so ids order events across restarts;
+        # _last_id advances when the event is buffered
+        return max(self._last_id + 1, int(time.time() * 1000000))
+
+    def append(self, event):
+        """Assign an id, persist and buffer an event; returns it."""
+        with self._lock:
+            if self.db is not None:
+                event['id'] = self._next_id()
+                self.db.collection('activity').document(str(event['id'])).set(event)
+                self._buffer(event)
+                return event
+            with locked(self.log_path + '.lock'):
+                # Ids keep increasing along the file across processes
+                self._catch_up()
+                event['id'] = self._next_id()
+                line = json.dumps(event, separators=(',', ':')).encode('utf-8') + b'\n'
+                if os.path.exists(self.log_path) and os.path.getsize(self.log_path) > self._offset:
+                    # Torn last line from a writer that crashed; keep ours on a line of its own
+                    line = b'\n' + line
+                with open(self.log_path, 'ab') as f:
+                    f.write(line)
+                self._catch_up()
+        return event
+
+    def version(self):
+        with self._lock:
+            self._catch_up()
+            return self._last_id
+
+    def feed(self, limit, before_id=None, project_id=None, user=None):
+        """One page of events, newest first, and the cursor id for the next page."""
+        project_id = _project_key(project_id)
+        with self._lock:
+            self._catch_up()
+            if project_id is not None and user:
+                buffer = self.by_project.get(project_id)
+                # Both filters: scan the project's window, which is small, for the user
+                events = [e for e in (buffer.page_before(before_id, len(buffer)) if buffer else [])
+                          if e.get('user') == user][:limit + 1]
+            elif project_id is not None:
+                buffer = self.by_project.get(project_id)
+                events = buffer.page_before(before_id, limit + 1) if buffer else []
+            elif user:
+                buffer = self.by_user.get(user)
+                events = buffer.page_before(before_id, limit + 1) if buffer else []
+            else:
+                events = self.recent.page_before(before_id, limit + 1)
+        next_id = events[limit - 1]['id'] if len(events) > limit else None
+        return events[:limit], next_id
+
+
+_log = None
+_log_lock = threading.Lock()
+
+
+def get_activity_log(db):
+    """Return the shared log, loading its recent window on first use."""
+    global _log
+    if _log is None:
+        with _log_lock:
+            if _log is None:
+                _log = ActivityLog(db)
+    return _log
+
+
+def _now():
+    return datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+
+def _status_name(status):
+    return (status or '').replace('_', ' ').title()
+
+
+def record_card_event(db, event_type, card, user, **details):
+    """Log card_created, card_updated (details: fields) or card_moved (details: from_status)."""
+    label = f"#{card['id']} {card.get('title', '')}".strip()
+    if event_type == 'card_created':
+        message = f'{user} created {label}'
+    elif event_type == 'card_moved':
+        message = f"{user} moved {label} from {_status_name(details.get('from_status'))} to {_status_name(card.get('status'))}"
+    else:
+        message = f'{user} updated {label}'
+    return get_activity_log(db).append(dict(
+        details,
+        type=event_type,
+        user=user,
+        project_id=card.get('project_id'),
+        card_id=card['id'],
+        card_title=card.get('title', ''),
+        message=message,
+        timestamp=_now()
+    ))
+
+
+def record_comment_event(db, comment, card):
+    """Log comment_added."""
+    return get_activity_log(db).append({
+        'type': 'comment_added',
+        'user': comment['author'],
+        'project_id': card.get('project_id'),
+        'card_id': card['id'],
+        'card_title': card.get('title', ''),
+        'comment_id': comment['id'],
+        'message': f"{comment['author']} commented on #{card['id']} {card.get('title', '')}".strip(),
+        'timestamp': comment.get('created_at') or _now()
+    })
+
+
+def record_sprint_event(db, event_type, sprint, user):
+    """Log sprint_started or sprint_completed."""
+    verb = 'started' if event_type == 'sprint_started' else 'completed'
+    return get_activity_log(db).append({
+        'type': event_type,
+        'user': user,
+        'project_id': sprint.get('project_id'),
+        'sprint_id': sprint['id'],
+        'message': f"{user} {verb} sprint {sprint.get('name', sprint['id'])}",
+        'timestamp': _now()
+    })
+
+
+def activity_version(db):
+    """Id of the newest event in the shared log; changes with every append by any process."""
+    return get_activity_log(db).version()
@@ -0,0 +1,152 @@
+"""Org-wide analytics for the analytics dashboard.
+
+Project health, per-assignee workload and status / priority breakdowns
+are aggregated in one pass over the cards. Due dates are compared as
+ISO strings against precomputed bounds, so no card's date is parsed.
+The result holds only aggregates, so its size depends on the number
+of projects and assignees rather than cards, and it is cached per data
+version and day: after the first request the dashboard is served from
+the cache until the next write.
+"""
+
+import re
+import threading
+from datetime import date
+
+from app.services.card_index_service import DUE_SOON_DAYS, due_date_range
+from app.services.version_service import get_data_version
+
+
+# Open cards an assignee can carry at 100% utilization
+ASSIGNEE_CAPACITY = 10
+
+STATUSES = ('todo', 'in_progress', 'review', 'done')
+PRIORITIES = ('Low', 'Medium', 'High')
+
+_ISO_DATE_RE = re.compile(r'^\d{4}-\d{2}-\d{2}$')
+
+
+def _percent(part, total):
+    return round(part / total * 100, 1) if total else 0
+
+
+def _project_status(project):
+    """'completed', 'overdue', 'at-risk' or 'on-track' from a project's card counts."""
+    if project['total'] and project['done'] == project['total']:
+        return 'completed'
+    if project['overdue']:
+        return 'overdue'
+    if project['due_soon']:
+        return 'at-risk'
+    return 'on-track'
+
+
+def compute_analytics(data, today=None):
+    """Aggregate cards of active projects into project, assignee and breakdown totals."""
+    today = today or date.today()
+    _, overdue_before = due_date_range('overdue', today)
+    _, soon_before = due_date_range(f'due_in_{DUE_SOON_DAYS}', today)
+
+    projects = {}
+    for project in data.get('projects', []):
+        if project.get('archived', False):
+            continue
+        projects[project['id']] = {
+            'id': project['id'],
+            'name': project.get('name', ''),
+            'total': 0, 'done': 0, 'overdue': 0, 'due_soon': 0,
+            'statuses': dict.fromkeys(STATUSES, 0),
+            'priorities': dict.fromkeys(PRIORITIES, 0)
+        }
+    assignees = {}
+    statuses = dict.fromkeys(STATUSES, 0)
+    priorities = dict.fromkeys(PRIORITIES, 0)
+    totals = {'cards': 0, 'done': 0, 'overdue': 0, 'due_soon': 0, 'unassigned': 0}
+
+    for card in data.get('cards', []):
+        project = projects.get(card.get('project_id'))
+        if project is None:
+            continue
+        status = card.get('status') or 'todo'
+        priority = card.get('priority') or 'Medium'
+        done = status == 'done'
+        due = card.get('due_date')
+        overdue = due_soon = False
+        if not done and due and _ISO_DATE_RE.match(due):
+            overdue = due < overdue_before
+            due_soon = not overdue and due < soon_before
+
+        project['total'] += 1
+        project['statuses'][status] = project['statuses'].get(status, 0) + 1
+        project['priorities'][priority] = project['priorities'].get(priority, 0) + 1
+        statuses[status] = statuses.get(status, 0) + 1
+        priorities[priority] = priorities.get(priority, 0) + 1
+        totals['cards'] += 1
+        if done:
+            project['done'] += 1
+            totals['done'] += 1
+        if overdue:
+            project['overdue'] += 1
+            totals['overdue'] += 1
+        if due_soon:
+            project['due_soon'] += 1
+            totals['due_soon'] += 1
+
+        assignee = card.get('assignee')
+        if not assignee:
+            totals['unassigned'] += 1
+            continue
+        workload = assignees.get(assignee)
+        if workload is None:
+            workload = assignees[assignee] = {'name': assignee, 'total': 0, 'open': 0, 'in_progress': 0,
+                                              'done': 0, 'overdue': 0, 'high_priority': 0}
+        workload['total'] += 1
+        if done:
+            workload['done'] += 1
+        else:
+            workload['open'] += 1
+            if status == 'in_progress':
+                workload['in_progress'] += 1
+            if priority == 'High':
+                workload['high_priority'] += 1
+        if overdue:
+            workload['overdue'] += 1
+
+    for project in projects.values():
+        project['progress'] = _percent(project['done'], project['total'])
+        project['status'] = _project_status(project)
+    for workload in assignees.values():
+        workload['capacity'] = ASSIGNEE_CAPACITY
+        workload['utilization'] = _percent(workload['open'], ASSIGNEE_CAPACITY)
+
+    totals['progress'] = _percent(totals['done'], totals['cards'])
+    return {
+        'generated_on': today.isoformat(),
+        'projects': list(projects.values()),
+        'resources': sorted(assignees.values(), key=lambda w: (-w['open'], w['name'].lower())),
+        'statuses': statuses,
+        'priorities': priorities,
+        'summary': totals
+    }
+
+
+def analytics_data_version():
+    """Changes with every write and every new day (overdue counts depend on the date)."""
+    return f'{get_data_version()}:{date.today().isoformat()}'
+
+
+_cache = {'version': None, 'analytics': None}
+_cache_lock = threading.Lock()
+
+
+def get_analytics(data_loader):
+    """Return (analytics, version), recomputing only when the data version or day changed."""
+    version = analytics_data_version()
+    with _cache_lock:
+        if _cache['version'] == version:
+            return _cache['analytics'], version
+    analytics = compute_analytics(data_loader())
+    with _cache_lock:
+        _cache['version'] = version
+        _cache['analytics'] = analytics
+    return analytics, version
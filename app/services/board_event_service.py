@@ -0,0 +1,42 @@
+"""Card deltas broadcast to open kanban boards of a project."""
+
+from app.services.event_service import bus, project_channel
+from app.services.fragment_cache_service import render_card
+
+
+# Fields a board needs to place a card; everything else is in the rendered html
+DELTA_FIELDS = ('id', 'status', 'title', 'priority', 'assignee', 'due_date', 'labels')
+
+
+def _card_delta(card):
+    delta = {field: card.get(field) for field in DELTA_FIELDS}
+    # Same partial (and fragment cache) as the server-rendered board
+    delta['html'] = str(render_card(card))
+    return delta
+
+
+def _publish(project_id, event_type, build):
+    """Publish build() only when someone is watching, so unwatched boards cost nothing."""
+    channel = project_channel(project_id)
+    if bus.subscriber_count(channel):
+        bus.publish(channel, event_type, build())
+
+
+def publish_card_created(card):
+    _publish(card.get('project_id'), 'card_created', lambda: _card_delta(card))
+
+
+def publish_card_updated(card):
+    _publish(card.get('project_id'), 'card_updated', lambda: _card_delta(card))
+
+
+def publish_card_moved(card, previous_status):
+    if previous_status == card.get('status'):
+        return
+    _publish(card.get('project_id'), 'card_moved',
+             lambda: {'id': card['id'], 'status': card.get('status'), 'from': previous_status})
+
+
+def publish_card_deleted(card):
+    _publish(card.get('project_id'), 'card_deleted',
+             lambda: {'id': card['id'], 'status': card.get('status')})
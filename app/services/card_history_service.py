@@ -0,0 +1,162 @@
+"""Per-card change history stored as field-level diffs.
+
+Every write to a card bumps card['version'] and records one entry
+{'v': version, 'at': timestamp, 'by': username, 'd': {field: [old, new]},
+'a': [field, ...]} holding only the fields that changed; 'a' lists the
+changed fields the card did not have before, so undoing the entry
+removes them while a field that held None gets None back. Entries live
+in the card's Firestore 'history' subcollection, written in the same
+batch as the card itself, or in data/history/<card_id>.jsonl locally.
+Creation is entry 1 with [None, value] for every field, all of them
+added, so any past state can be rebuilt from the current card by undoing
+the diffs newer than it.
+"""
+
+import copy
+import json
+import os
+from datetime import datetime
+
+from app.services.data_service import card_document, issue_subcollection, save_local_collection
+from app.services.version_service import bump_data_version
+
+
+HISTORY_DIR = os.path.join('data', 'history')
+
+# Bookkeeping fields that change on every write and are not history
+UNTRACKED_FIELDS = ('updated_at', 'version')
+
+# Stands for a field the card does not have, which differs from one holding None
+_MISSING = object()
+
+
+def snapshot(card):
+    """Copy of a card to diff against after it has been modified."""
+    return copy.deepcopy(card)
+
+
+def diff_card(before, after):
+    """{field: [old, new]} for every field that differs; before may be None for a new card.
+
+    A field added or removed counts as changed even when the value on
+    the other side is None; the missing side is recorded as None.
+    """
+    before = before or {}
+    diff = {}
+    for field in set(before) | set(after):
+        if field in UNTRACKED_FIELDS:
+            continue
+        old, new = before.get(field, _MISSING), after.get(field, _MISSING)
+        if old is _MISSING or new is _MISSING or old != new:
+            diff[field] = [None if old is _MISSING else old, None if new is _MISSING else new]
+    return diff
+
+
+def added_fields(before, diff):
+    """The fields of diff that before did not have, sorted."""
+    return sorted(field for field in diff if field not in (before or {}))
+
+
+def _history_path(card_id):
+    return os.path.join(HISTORY_DIR, f'{card_id}.jsonl')
+
+
+def save_card_change(db, data, before, card, user):
+    """Persist a modified card together with its history entry.
+
+    before is a snapshot() taken before the change, or None when the
+    card was just created. Returns the new entry, or None when nothing
+    tracked changed (the card itself is still saved).
+    """
+    diff = diff_card(before, card)
+    entry = None
+    if diff:
+        card['version'] = card.get('version', 0) + 1
+        entry = {
+            'v': card['version'],
+            'at': card.get('updated_at') or card.get('created_at') or datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'by': user,
+            'd': diff,
+            'a': added_fields(before, diff)
+        }
+    if db is not None:
+        batch = db.batch()
+        card_ref, card_copy = card_document(db, card)
+        batch.set(card_ref, card_copy)
+        if entry:
+            batch.set(issue_subcollection(db, card, 'history').document(str(entry['v'])), entry)
+        batch.commit()
+    else:
+        if entry:
+            # History first: a card never carries a version whose entry is missing
+            os.makedirs(HISTORY_DIR, exist_ok=True)
+            with open(_history_path(card['id']), 'a') as f:
+                f.write(json.dumps(entry, separators=(',', ':')) + '\n')
+        save_local_collection(data, 'cards')
+    bump_data_version(card.get('project_id'))
+    return entry
+
+
+def _local_entries(card_id):
+    entries = []
+    try:
+        with open(_history_path(card_id)) as f:
+            for line in f:
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    continue
+    except OSError:
+        pass
+    return entries
+
+
+def card_history(db, card, limit, before_version=None):
+    """One page of entries, newest first, and the cursor version for the next page."""
+    if db is not None:
+        from firebase_admin import firestore
+        query = issue_subcollection(db, card, 'history').order_by('v', direction=firestore.Query.DESCENDING)
+        if before_version is not None:
+            query = query.where('v', '<', before_version)
+        entries = [doc.to_dict() for doc in query.limit(limit + 1).stream()]
+    else:
+        entries = [e for e in _local_entries(card['id'])
+                   if before_version is None or e['v'] < before_version]
+        entries.sort(key=lambda e: e['v'], reverse=True)
+        entries = entries[:limit + 1]
+    next_version = entries[limit - 1]['v'] if len(entries) > limit else None
+    return entries[:limit], next_version
+
+
+def _entries_after(db, card, version):
+    if db is not None:
+        query = issue_subcollection(db, card, 'history').where('v', '>', version)
+        return [doc.to_dict() for doc in query.stream()]
+    return [e for e in _local_entries(card['id']) if e['v'] > version]
+
+
+def replay(card, entries, version):
+    """Undo entries newer than version on a copy of card; None if the card did not exist yet."""
+    state = snapshot(card)
+    for entry in sorted(entries, key=lambda e: e['v'], reverse=True):
+        if entry['v'] <= version:
+            break
+        # Entries written before 'a' existed only know absent fields as None
+        added = entry['a'] if 'a' in entry else [f for f, (old, _new) in entry['d'].items() if old is None]
+        for field, (old, _new) in entry['d'].items():
+            if field in added:
+                state.pop(field, None)
+            else:
+                state[field] = old
+    if 'id' not in state:
+        # Undid the creation entry
+        return None
+    state['version'] = version
+    return state
+
+
+def card_at_version(db, card, version):
+    """The card as it was at version, reading only the entries written since."""
+    if version >= card.get('version', 0):
+        return card
+    return replay(card, _entries_after(db, card, version), version)
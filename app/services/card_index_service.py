@@ -0,0 +1,362 @@
+"""Secondary indexes over cards for server-side filtering and sorting.
+
+The index is built once from load_data and kept current by the routes
+that create, update and delete cards, so the issues list can be
+filtered by set intersections instead of scanning every card. Open
+cards are also kept sorted by due date, so overdue / due today / due
+in N days queries are a binary search over ISO date strings instead of
+parsing every card's date.
+"""
+
+import bisect
+import re
+import threading
+from datetime import date, timedelta
+
+
+# Fields with an equality index; labels are indexed per label id
+INDEXED_FIELDS = ('project_id', 'epic_id', 'story_id', 'status', 'priority', 'assignee')
+
+SORTABLE_FIELDS = ('id', 'title', 'status', 'priority', 'assignee', 'due_date', 'created_at', 'updated_at')
+
+PRIORITY_RANKS = {'Low': 1, 'Medium': 2, 'High': 3}
+
+# Cards due within this many days count as due soon, as on the boards
+DUE_SOON_DAYS = 3
+
+_ISO_DATE_RE = re.compile(r'^\d{4}-\d{2}-\d{2}$')
+
+# Shorthand sort values used by the backlog page
+SORT_PRESETS = {
+    'created_desc': '-created_at',
+    'created_asc': 'created_at',
+    'priority': '-priority',
+    'due_date': 'due_date',
+    'title': 'title'
+}
+
+
+def parse_sort(sort):
+    """Parse 'field,-field' into [(field, descending)], always ending with id."""
+    sort = SORT_PRESETS.get(sort, sort) if sort else 'id'
+    fields = []
+    for part in sort.split(','):
+        part = part.strip()
+        descending = part.startswith('-')
+        field = part.lstrip('-')
+        if field not in SORTABLE_FIELDS:
+            raise ValueError(f'Cannot sort by {field}')
+        if field not in [f for f, _ in fields]:
+            fields.append((field, descending))
+    if 'id' not in [f for f, _ in fields]:
+        fields.append(('id', False))
+    return fields
+
+
+def _sort_value(card, field):
+    """Normalize a card field for comparison; None sorts last."""
+    value = card.get(field)
+    if value in (None, ''):
+        return None
+    if field == 'priority':
+        return PRIORITY_RANKS.get(value, 0)
+    if field in ('title', 'assignee'):
+        return str(value).lower()
+    return value
+
+
+def is_open(card):
+    return card.get('status') != 'done'
+
+
+def due_date_range(name, today=None):
+    """Half-open [start, before) ISO date range for a due date filter name.
+
+    Either bound may be None. Returns None for 'no_date' and raises
+    ValueError for unknown names. 'due_in_<n>' covers today and the
+    next n days.
+    """
+    today = today or date.today()
+    week_start = today - timedelta(days=today.weekday())
+    if name == 'overdue':
+        return None, today.isoformat()
+    if name == 'today':
+        return today.isoformat(), (today + timedelta(days=1)).isoformat()
+    if name == 'due_soon':
+        name = f'due_in_{DUE_SOON_DAYS}'
+    if name.startswith('due_in_') and name[len('due_in_'):].isdigit():
+        days = int(name[len('due_in_'):])
+        return today.isoformat(), (today + timedelta(days=days + 1)).isoformat()
+    if name == 'this_week':
+        return week_start.isoformat(), (week_start + timedelta(days=7)).isoformat()
+    if name == 'next_week':
+        return (week_start + timedelta(days=7)).isoformat(), (week_start + timedelta(days=14)).isoformat()
+    if name == 'no_date':
+        return None
+    raise ValueError(f'Unknown due date filter: {name}')
+
+
+class SortKey(list):
+    """Multi-field sort key with per-field direction.
+
+    It is a list of normalized values so it can be JSON-encoded into a
+    pagination cursor, and compares against plain lists decoded from one.
+    """
+
+    def __init__(self, values, directions):
+        super().__init__(values)
+        self.directions = directions
+
+    def _compare(self, other):
+        for value, other_value, descending in zip(self, other, self.directions):
+            if value == other_value:
+                continue
+            if value is None:
+                return 1
+            if other_value is None:
+                return -1
+            if descending:
+                return -1 if value > other_value else 1
+            return -1 if value < other_value else 1
+        return 0
+
+    def __lt__(self, other):
+        return self._compare(other) < 0
+
+    def __gt__(self, other):
+        return self._compare(other) > 0
+
+    def __le__(self, other):
+        return self._compare(other) <= 0
+
+    def __ge__(self, other):
+        return self._compare(other) >= 0
+
+
+def sort_key_for(sort_fields):
+    """Return a key function building SortKeys for parsed sort fields."""
+    directions = [descending for _, descending in sort_fields]
+
+    def key(card):
+        return SortKey([_sort_value(card, field) for field, _ in sort_fields], directions)
+    return key
+
+
+class CardIndex:
+    """Cards by id plus equality indexes on the filterable fields."""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.cards = {}    # card id -> card
+        self.fields = {field: {} for field in INDEXED_FIELDS}  # field -> value -> set of ids
+        self.labels = {}   # label id -> set of ids
+        self.due = []      # sorted (due_date, id) of open cards with a valid due date
+        self.due_keys = {}  # card id -> its entry in due
+        self.undated = set()
+
+    def __len__(self):
+        return len(self.cards)
+
+    def build(self, cards):
+        """Index every card in a list."""
+        with self._lock:
+            self.cards = {}
+            self.fields = {field: {} for field in INDEXED_FIELDS}
+            self.labels = {}
+            self.due = []
+            self.due_keys = {}
+            self.undated = set()
+            for card in cards:
+                self.add(card)
+
+    def add(self, card):
+        """Index a new card, or re-index one whose fields changed."""
+        with self._lock:
+            if card['id'] in self.cards:
+                self.remove(card['id'])
+            self.cards[card['id']] = card
+            for field in INDEXED_FIELDS:
+                self.fields[field].setdefault(card.get(field), set()).add(card['id'])
+            for label in card.get('labels') or []:
+                self.labels.setdefault(label, set()).add(card['id'])
+            due_date = card.get('due_date')
+            if not due_date:
+                self.undated.add(card['id'])
+            elif is_open(card) and _ISO_DATE_RE.match(due_date):
+                key = (due_date, card['id'])
+                bisect.insort(self.due, key)
+                self.due_keys[card['id']] = key
+
+    def remove(self, card_id):
+        """Drop a card from every index."""
+        with self._lock:
+            card = self.cards.pop(card_id, None)
+            if card is None:
+                return
+            for field in INDEXED_FIELDS:
+                self._discard(self.fields[field], card.get(field), card_id)
+            for label in card.get('labels') or []:
+                self._discard(self.labels, label, card_id)
+            self.undated.discard(card_id)
+            key = self.due_keys.pop(card_id, None)
+            if key is not None:
+                del self.due[bisect.bisect_left(self.due, key)]
+
+    @staticmethod
+    def _discard(index, value, card_id):
+        ids = index.get(value)
+        if ids is not None:
+            ids.discard(card_id)
+            if not ids:
+                del index[value]
+
+    def get(self, card_id):
+        return self.cards.get(card_id)
+
+    def _due_slice(self, start, before):
+        lo = bisect.bisect_left(self.due, (start,)) if start else 0
+        hi = bisect.bisect_left(self.due, (before,)) if before else len(self.due)
+        return self.due[lo:hi]
+
+    def due_ids(self, due_range):
+        """Ids of open cards due in a due_date_range(), or of undated cards for None."""
+        with self._lock:
+            if due_range is None:
+                return set(self.undated)
+            return {card_id for _, card_id in self._due_slice(*due_range)}
+
+    def due_cards(self, start=None, before=None):
+        """Open cards due in [start, before), ordered by due date then id."""
+        with self._lock:
+            return [self.cards[card_id] for _, card_id in self._due_slice(start, before)]
+
+    def due_counts_by_project(self, due_range):
+        """{project_id: number of open cards due in a due_date_range()}"""
+        counts = {}
+        for card in self.due_cards(*due_range):
+            counts[card.get('project_id')] = counts.get(card.get('project_id'), 0) + 1
+        return counts
+
+    def filter_ids(self, filters, labels=None):
+        """Return ids of cards matching every filter, or None when unfiltered.
+
+        filters maps an indexed field to one value or a collection of
+        accepted values, or 'due_date' to a due_date_range(). Sets are
+        intersected smallest first.
+        """
+        with self._lock:
+            id_sets = []
+            for field, value in filters.items():
+                if field == 'due_date':
+                    id_sets.append(self.due_ids(value))
+                    continue
+                index = self.fields[field]
+                if isinstance(value, (list, tuple, set)):
+                    ids = set()
+                    for option in value:
+                        ids |= index.get(option, set())
+                else:
+                    ids = index.get(value, set())
+                id_sets.append(ids)
+            for label in labels or []:
+                id_sets.append(self.labels.get(label, set()))
+            if not id_sets:
+                return None
+
+            id_sets.sort(key=len)
+            result = set(id_sets[0])
+            for ids in id_sets[1:]:
+                result &= ids
+                if not result:
+                    break
+            return result
+
+    def query(self, filters=None, labels=None, ids=None, sort=None):
+        """Return matching cards sorted by the given sort spec.
+
+        ids optionally restricts the result further (e.g. to text search
+        hits). Filtering is done on the indexes, so only matching rows
+        are materialized and sorted.
+        """
+        sort_fields = parse_sort(sort)
+        with self._lock:
+            matched = self.filter_ids(filters or {}, labels)
+            if ids is not None:
+                matched = set(ids) if matched is None else matched & set(ids)
+            if matched is None:
+                cards = list(self.cards.values())
+            else:
+                cards = [self.cards[card_id] for card_id in matched if card_id in self.cards]
+        key = sort_key_for(sort_fields)
+        cards.sort(key=key)
+        return cards, key
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_card_index(data_loader):
+    """Return the shared card index, building it from data_loader() on first use."""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                index = CardIndex()
+                index.build(data_loader().get('cards', []))
+                _index = index
+    return _index
+
+
+def reset_card_index():
+    """Discard the shared index so it is rebuilt on next use."""
+    global _index
+    with _index_lock:
+        _index = None
+
+
+def track_card(card):
+    """Re-index a created or updated card if the index has been built."""
+    if _index is not None:
+        _index.add(card)
+
+
+def untrack_card(card_id):
+    """Drop a deleted card from the index if it has been built."""
+    if _index is not None:
+        _index.remove(card_id)
+
+
+def filters_from_args(args, strict=True):
+    """Read card filters from request args.
+
+    Returns (filters, labels, text_query, sort). Comma-separated values
+    match any of the listed values; several labels must all be present.
+    due_date_filter takes a due_date_range() name. An unknown sort or
+    due date filter raises ValueError, or is ignored when strict is False.
+    """
+    filters = {}
+    for field in ('project_id', 'epic_id', 'story_id'):
+        value = args.get(field, type=int)
+        if value is not None:
+            filters[field] = value
+    for field in ('status', 'priority', 'assignee'):
+        value = args.get(field)
+        if value:
+            values = [v for v in value.split(',') if v]
+            filters[field] = values if len(values) > 1 else values[0]
+    due_filter = args.get('due_date_filter')
+    if due_filter:
+        try:
+            filters['due_date'] = due_date_range(due_filter)
+        except ValueError:
+            if strict:
+                raise
+    sort = args.get('sort')
+    if sort and not strict:
+        try:
+            parse_sort(sort)
+        except ValueError:
+            sort = None
+    labels = [label for label in (args.get('label') or '').split(',') if label]
+    return filters, labels, args.get('q', '').strip(), sort
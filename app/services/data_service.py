@@ -1,9 +1,12 @@
 """Data loading and saving service for Firebase and local files."""
 
 import json
+import os
 from datetime import datetime
 from werkzeug.security import generate_password_hash
 
+from app.services.version_service import bump_data_version
+
 
 def load_data(db=None):
     """Load data from Firebase or local files"""
@@ -183,8 +186,13 @@ def load_data(db=None):
     return data
 
 
-def save_data(data, db=None):
-    """Save data to Firebase and local files"""
+def save_data(data, db=None, project_id=None, users=False):
+    """Save data to Firebase and local files
+    
+    project_id names the only project the write touched, if any, so
+    cached data of other projects stays valid. users=True marks a write
+    that changed users.
+    """
     # Always save to local files as backup
     try:
         from data_manager import DataManager
@@ -195,6 +203,7 @@ def save_data(data, db=None):
     
     if db is None:
         print("WARNING: Firebase not initialized! Data saved locally only.")
+        bump_data_version(project_id, users)
         return
     
     try:
@@ -260,4 +269,57 @@ def save_data(data, db=None):
                 
         print("Data saved to Firebase successfully")
     except Exception as e:
-        print(f"Error saving to Firebase: {e}")
\ No newline at end of file
+        print(f"Error saving to Firebase: {e}")
+    
+    bump_data_version(project_id, users)
+
+
+def _issue_ref(db, card):
+    """Firestore reference of a card under projects/{id}/epics/{id}/stories/{id}/issues."""
+    project_ref = db.collection('projects').document(str(card['project_id']))
+    epic_ref = project_ref.collection('epics').document(str(card['epic_id']))
+    story_ref = epic_ref.collection('stories').document(str(card['story_id']))
+    return story_ref.collection('issues').document(str(card['id']))
+
+
+def card_document(db, card):
+    """Firestore reference and stored fields for a card."""
+    card_copy = card.copy()
+    for key in ('id', 'story_id', 'epic_id', 'project_id'):
+        card_copy.pop(key, None)
+    return _issue_ref(db, card), card_copy
+
+
+def issue_subcollection(db, card, name):
+    """A subcollection (comments, history) under a card's Firestore document."""
+    return _issue_ref(db, card).collection(name)
+
+
+def comment_document(db, card, comment):
+    """Firestore reference and stored fields for one comment on a card."""
+    comment_copy = comment.copy()
+    comment_copy.pop('id', None)
+    comment_copy.pop('card_id', None)
+    return issue_subcollection(db, card, 'comments').document(str(comment['id'])), comment_copy
+
+
+_local_files_complete = False
+
+
+def save_local_collection(data, name):
+    """Write a single collection's local file instead of the whole dataset."""
+    global _local_files_complete
+    from data_manager import DataManager
+    dm = DataManager()
+    if not _local_files_complete:
+        # Until users.json has users, load_data reads data.json and would ignore a lone file
+        try:
+            with open(os.path.join(dm.data_dir, dm.files['users'])) as f:
+                _local_files_complete = bool(json.load(f))
+        except (OSError, ValueError):
+            pass
+    if _local_files_complete:
+        dm._save_file(name, data.get(name, []))
+    else:
+        dm.save_data(data)
+        _local_files_complete = bool(data.get('users'))
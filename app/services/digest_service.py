@@ -0,0 +1,80 @@
+"""Daily overdue / due-soon email digest.
+
+Overdue and due-soon cards come from range queries on the card index's
+due dates and are grouped by assignee; each recipient gets only their
+own cards, every email is rendered once, and the whole batch is sent
+over a single SMTP connection.
+"""
+
+from datetime import date
+
+from flask import render_template
+
+from app.services.card_index_service import DUE_SOON_DAYS, due_date_range, get_card_index
+from app.services.email_service import build_message, send_messages
+from app.services.user_index_service import get_user_index
+
+
+def build_digests(index, today, due_soon_days=DUE_SOON_DAYS):
+    """{assignee: {'overdue': [...], 'due_soon': [...]}} from a CardIndex's due-date range queries."""
+    overdue_start, overdue_before = due_date_range('overdue', today)
+    soon_start, soon_before = due_date_range(f'due_in_{due_soon_days}', today)
+    digests = {}
+    for bucket, cards in (('overdue', index.due_cards(overdue_start, overdue_before)),
+                          ('due_soon', index.due_cards(soon_start, soon_before))):
+        # Already in due date order
+        for card in cards:
+            if card.get('assignee'):
+                digests.setdefault(card['assignee'], {'overdue': [], 'due_soon': []})[bucket].append(card)
+    return digests
+
+
+def digest_recipients(users, digests):
+    """(user, digest) for assignees with an account, an email and notifications enabled."""
+    index = get_user_index(users)
+    recipients = []
+    for assignee, digest in digests.items():
+        for user in index.resolve([assignee]):
+            if user.get('email') and user.get('email_notifications', True) and user.get('status', 'active') == 'active':
+                recipients.append((user, digest))
+    return recipients
+
+
+def render_digest(user, digest, projects, today):
+    """Build the email for one recipient."""
+    overdue, due_soon = digest['overdue'], digest['due_soon']
+    html = render_template('email/overdue_digest.html', user=user, overdue=overdue, due_soon=due_soon,
+                           projects=projects, today=today)
+    if overdue:
+        subject = f"PM Tool: {len(overdue)} overdue card{'s' if len(overdue) != 1 else ''}"
+    else:
+        subject = f"PM Tool: {len(due_soon)} card{'s' if len(due_soon) != 1 else ''} due soon"
+    return build_message(user['email'], subject, html)
+
+
+def send_overdue_digest(data, today=None, skip_user_ids=(), on_sent=None):
+    """Email every recipient their digest; returns (sent count, failed [(user id, error)]).
+
+    skip_user_ids lets a retried run leave out users who already got
+    theirs; on_sent(user_id) is called after each successful send.
+    """
+    today = today or date.today()
+    projects = {p['id']: p.get('name', 'Unknown') for p in data.get('projects', [])}
+    digests = build_digests(get_card_index(lambda: data), today)
+    recipients = [(user, digest) for user, digest in digest_recipients(data['users'], digests)
+                  if user['id'] not in skip_user_ids]
+    messages = []
+    user_ids = {}
+    for user, digest in recipients:
+        message = render_digest(user, digest, projects, today)
+        user_ids[id(message)] = user['id']
+        messages.append(message)
+    sent = []
+
+    def mark_sent(message):
+        sent.append(user_ids[id(message)])
+        if on_sent:
+            on_sent(user_ids[id(message)])
+
+    failed = send_messages(messages, on_sent=mark_sent)
+    return len(sent), [(user_ids[id(message)], str(error)) for message, error in failed]
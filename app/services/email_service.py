@@ -0,0 +1,128 @@
+"""Outgoing email over SMTP.
+
+Settings are read from app.config (MAIL_SERVER, MAIL_PORT, MAIL_USE_TLS,
+MAIL_USE_SSL, MAIL_USERNAME, MAIL_PASSWORD, MAIL_DEFAULT_SENDER, and
+APP_BASE_URL for links), which init_mail fills from environment
+variables of the same names. A batch of messages goes over one
+connection instead of a login per message; to test locally, point
+MAIL_SERVER/MAIL_PORT at a stub such as `python -m aiosmtpd -n -l
+localhost:1025` (pip install aiosmtpd; the smtpd module is gone since
+Python 3.12).
+"""
+
+import os
+import smtplib
+from email.message import EmailMessage
+
+from flask import current_app
+
+
+# Reconnect after this many messages; many servers cap messages per session
+MAX_MESSAGES_PER_CONNECTION = 100
+SMTP_TIMEOUT = 30
+
+MAIL_DEFAULTS = {
+    'MAIL_SERVER': 'localhost',
+    'MAIL_PORT': 25,
+    'MAIL_USE_TLS': False,
+    'MAIL_USE_SSL': False,
+    'MAIL_USERNAME': None,
+    'MAIL_PASSWORD': None,
+    'MAIL_DEFAULT_SENDER': 'pmtool@localhost',
+    # Links in emails are absolute
+    'APP_BASE_URL': 'http://localhost:5000'
+}
+
+
+def init_mail(app):
+    """Fill unset mail settings from the environment, then from defaults."""
+    for key, default in MAIL_DEFAULTS.items():
+        value = os.environ.get(key)
+        if value is None:
+            value = default
+        elif isinstance(default, bool):
+            value = value.lower() in ('1', 'true', 'yes')
+        elif isinstance(default, int):
+            value = int(value)
+        app.config.setdefault(key, value)
+
+
+def build_message(recipient, subject, html, text=None, sender=None):
+    """An HTML email with a plain-text alternative."""
+    message = EmailMessage()
+    message['Subject'] = subject
+    message['From'] = sender or current_app.config['MAIL_DEFAULT_SENDER']
+    message['To'] = recipient
+    message.set_content(text or 'This message requires an HTML capable mail client.')
+    message.add_alternative(html, subtype='html')
+    return message
+
+
+class SMTPConnection:
+    """One SMTP session reused for many messages; reconnects when dropped or at the per-session cap."""
+
+    def __init__(self, config):
+        self.config = config
+        self.server = None
+        self.sent_on_connection = 0
+
+    def __enter__(self):
+        self.connect()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def connect(self):
+        config = self.config
+        smtp_class = smtplib.SMTP_SSL if config['MAIL_USE_SSL'] else smtplib.SMTP
+        server = smtp_class(config['MAIL_SERVER'], config['MAIL_PORT'], timeout=SMTP_TIMEOUT)
+        if config['MAIL_USE_TLS']:
+            server.starttls()
+        if config['MAIL_USERNAME']:
+            server.login(config['MAIL_USERNAME'], config['MAIL_PASSWORD'])
+        self.server = server
+        self.sent_on_connection = 0
+
+    def close(self):
+        if self.server is not None:
+            try:
+                self.server.quit()
+            except smtplib.SMTPException:
+                self.server.close()
+            self.server = None
+
+    def send(self, message):
+        if self.server is None or self.sent_on_connection >= MAX_MESSAGES_PER_CONNECTION:
+            self.close()
+            self.connect()
+        try:
+            self.server.send_message(message)
+        except smtplib.SMTPServerDisconnected:
+            # Idle sessions get dropped by servers; retry once on a fresh one
+            self.connect()
+            self.server.send_message(message)
+        self.sent_on_connection += 1
+
+
+def send_messages(messages, on_sent=None):
+    """Send messages over one connection.
+
+    Messages the server refuses are skipped and returned as
+    [(message, error)]; connection failures propagate so the caller
+    (usually a retried job) can try again later. on_sent(message) is
+    called after each successful send.
+    """
+    failed = []
+    if not messages:
+        return failed
+    with SMTPConnection(current_app.config) as connection:
+        for message in messages:
+            try:
+                connection.send(message)
+            except (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused, smtplib.SMTPDataError) as e:
+                failed.append((message, e))
+                continue
+            if on_sent:
+                on_sent(message)
+    return failed
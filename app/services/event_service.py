@@ -0,0 +1,117 @@
+"""In-process publish/subscribe bus for pushing live updates to clients.
+
+Routes publish events on a channel ('user:<id>', 'project:<id>') after
+they save; each connected stream holds a Subscription with a bounded
+queue, limited both in events and in encoded bytes. A subscriber that
+falls too far behind is dropped rather than letting its queue grow; its
+stream ends and the client reconnects and resyncs. Events only reach
+streams served by the same process.
+"""
+
+import itertools
+import json
+import queue
+import threading
+
+
+DEFAULT_QUEUE_SIZE = 100
+DEFAULT_MAX_BYTES = 256 * 1024
+
+
+def user_channel(user_id):
+    return f'user:{user_id}'
+
+
+def project_channel(project_id):
+    return f'project:{project_id}'
+
+
+class Subscription:
+    """One stream's view of a channel."""
+
+    def __init__(self, bus, channel, max_queue, max_bytes):
+        self.bus = bus
+        self.channel = channel
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.max_bytes = max_bytes
+        self.queued_bytes = 0
+        self._bytes_lock = threading.Lock()
+        self.overflowed = False
+
+    def deliver(self, event, size):
+        """Queue an event; returns False if the subscriber is too far behind."""
+        with self._bytes_lock:
+            if self.queued_bytes + size > self.max_bytes:
+                self.overflowed = True
+                return False
+            try:
+                self.queue.put_nowait((event, size))
+            except queue.Full:
+                self.overflowed = True
+                return False
+            self.queued_bytes += size
+            return True
+
+    def get(self, timeout):
+        """Next event as (id, type, data), or None after timeout."""
+        try:
+            event, size = self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        with self._bytes_lock:
+            self.queued_bytes -= size
+        return event
+
+    def close(self):
+        self.bus.unsubscribe(self)
+
+
+class EventBus:
+    """Channels of subscriptions; publish fans out without blocking."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._channels = {}  # channel -> set of Subscriptions
+        self._ids = itertools.count(1)
+
+    def subscribe(self, channel, max_queue=DEFAULT_QUEUE_SIZE, max_bytes=DEFAULT_MAX_BYTES):
+        subscription = Subscription(self, channel, max_queue, max_bytes)
+        with self._lock:
+            self._channels.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._channels.get(subscription.channel)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._channels[subscription.channel]
+
+    def publish(self, channel, event_type, data):
+        """Send an event to every subscriber of a channel; returns how many got it."""
+        event = (next(self._ids), event_type, data)
+        with self._lock:
+            subscribers = list(self._channels.get(channel, ()))
+        if not subscribers:
+            return 0
+        size = len(json.dumps(data, separators=(',', ':')))
+        delivered = 0
+        for subscription in subscribers:
+            if subscription.deliver(event, size):
+                delivered += 1
+            else:
+                self.unsubscribe(subscription)
+        return delivered
+
+    def subscriber_count(self, channel):
+        with self._lock:
+            return len(self._channels.get(channel, ()))
+
+
+bus = EventBus()
+
+
+def publish(channel, event_type, data):
+    """Publish on the shared bus."""
+    return bus.publish(channel, event_type, data)
@@ -0,0 +1,147 @@
+"""Cache of rendered kanban cards and columns and of issue table rows.
+
+A card fragment is keyed by the card id and the values of every field
+the partial renders, so an edited card misses and an unchanged one is
+reused without invalidation hooks. A column is keyed by project version
+and status, so a board whose project has not changed since the last
+visit reuses its columns without touching the cards at all. Issue and
+backlog rows are keyed like cards, plus the project, epic and story
+names and the comment count they show. All keys include today's date
+because due-date classes depend on it.
+"""
+
+import threading
+from collections import OrderedDict
+from datetime import date
+
+from flask import current_app
+from markupsafe import Markup
+
+
+CARD_TEMPLATE = 'partials/kanban_card.html'
+CARD_FIELDS = ('title', 'description', 'priority', 'due_date', 'assignee')
+BOARD_STATUSES = ('todo', 'in_progress', 'done')
+
+ROW_TEMPLATES = {'issues': 'partials/issue_row.html', 'backlog': 'partials/backlog_row.html'}
+ROW_FIELDS = ('title', 'description', 'project_id', 'status', 'priority', 'assignee', 'due_date',
+              'story_points', 'created_at')
+
+
+class FragmentCache:
+    """Bounded LRU mapping of keys to rendered Markup."""
+
+    def __init__(self, max_entries):
+        self._lock = threading.Lock()
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            fragment = self.entries.get(key)
+            if fragment is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return fragment
+
+    def set(self, key, fragment):
+        with self._lock:
+            self.entries[key] = fragment
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+
+
+card_fragments = FragmentCache(max_entries=5000)
+column_fragments = FragmentCache(max_entries=500)
+row_fragments = FragmentCache(max_entries=5000)
+
+
+def card_key(card, today):
+    """Key covering everything the card partial renders."""
+    return (card['id'], today) + tuple(card.get(field) for field in CARD_FIELDS) + tuple(card.get('labels') or ())
+
+
+def render_card(card, today=None):
+    """Rendered card partial, from cache when the card is unchanged."""
+    today = today or date.today().isoformat()
+    key = card_key(card, today)
+    fragment = card_fragments.get(key)
+    if fragment is None:
+        template = current_app.jinja_env.get_template(CARD_TEMPLATE)
+        fragment = Markup(template.render(card=card))
+        card_fragments.set(key, fragment)
+    return fragment
+
+
+def render_board_columns(project_id, version, cards_by_status):
+    """Return {status: Markup} for a board's columns.
+
+    version is the project version read before the cards were loaded,
+    so a write racing with the page leaves the cache stale-keyed rather
+    than caching new data under an old key. cards_by_status maps each
+    status to its cards in display order.
+    """
+    today = date.today().isoformat()
+    columns = {}
+    for status in BOARD_STATUSES:
+        key = (project_id, status, version, today)
+        column = column_fragments.get(key)
+        if column is None:
+            column = Markup('\n').join(render_card(card, today) for card in cards_by_status.get(status, []))
+            column_fragments.set(key, column)
+        columns[status] = column
+    return columns
+
+
+def comment_counts(comments, card_ids):
+    """{card id: number of comments} for the given cards, in one pass over the comments."""
+    counts = dict.fromkeys(card_ids, 0)
+    for comment in comments:
+        card_id = comment.get('card_id')
+        if card_id in counts:
+            counts[card_id] += 1
+    return counts
+
+
+def _shown_name(item, field):
+    """Key part for a related item a row names; an item without the field still differs from none."""
+    return None if item is None else (item.get(field),)
+
+
+def render_issue_rows(kind, cards, data, projects, epics=(), stories=()):
+    """Rendered table rows ('issues' or 'backlog' layout) for a page of cards.
+
+    projects, epics and stories are the lists the page shows names
+    from; a card whose project is not among them gets an empty project
+    cell. Rows whose inputs are unchanged come from the cache.
+    """
+    today = date.today().isoformat()
+    projects_by_id = {project['id']: project for project in projects}
+    epics_by_id = {epic['id']: epic for epic in epics}
+    stories_by_id = {story['id']: story for story in stories}
+    counts = comment_counts(data.get('comments', []), [card['id'] for card in cards])
+    template = None
+    rows = []
+    for card in cards:
+        project = projects_by_id.get(card.get('project_id'))
+        epic = epics_by_id.get(card.get('epic_id'))
+        story = stories_by_id.get(card.get('story_id'))
+        key = (kind, card['id'], today, counts[card['id']],
+               _shown_name(project, 'name'), _shown_name(epic, 'title'), _shown_name(story, 'title')) \
+            + tuple(card.get(field) for field in ROW_FIELDS) + tuple(card.get('labels') or ())
+        row = row_fragments.get(key)
+        if row is None:
+            template = template or current_app.jinja_env.get_template(ROW_TEMPLATES[kind])
+            row = Markup(template.render(card=card, project=project, epic=epic, story=story,
+                                         comment_count=counts[card['id']]))
+            row_fragments.set(key, row)
+        rows.append(row)
+    return rows
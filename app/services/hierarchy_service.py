@@ -0,0 +1,70 @@
+"""Project epic/story/issue tree for the sprint planning modal."""
+
+import threading
+
+from app.services.version_service import get_project_version
+
+
+def build_hierarchy(data, project_id):
+    """Build the project tree from parent -> children indexes.
+
+    One pass over each of epics, stories and cards. Stories whose epic
+    is not in the project and issues whose story is not in the project
+    are returned as orphans. Returns None if the project does not exist.
+    Items are copied, so the loaded data is left untouched.
+    """
+    project = next((p for p in data.get('projects', []) if p['id'] == project_id), None)
+    if project is None:
+        return None
+
+    epics = [dict(e, stories=[]) for e in data.get('epics', []) if e.get('project_id') == project_id]
+    epics_by_id = {epic['id']: epic for epic in epics}
+
+    stories_by_id = {}
+    orphaned_stories = []
+    for story in data.get('stories', []):
+        if story.get('project_id') != project_id:
+            continue
+        story = dict(story, issues=[])
+        stories_by_id[story['id']] = story
+        epic = epics_by_id.get(story.get('epic_id'))
+        if epic is not None:
+            epic['stories'].append(story)
+        else:
+            orphaned_stories.append(story)
+
+    orphaned_issues = []
+    for card in data.get('cards', []):
+        if card.get('project_id') != project_id:
+            continue
+        story = stories_by_id.get(card.get('story_id'))
+        if story is not None:
+            story['issues'].append(card)
+        else:
+            orphaned_issues.append(card)
+
+    return {
+        'project_id': project_id,
+        'project': project,
+        'epics': epics,
+        'orphaned_stories': orphaned_stories,
+        'orphaned_issues': orphaned_issues
+    }
+
+
+_cache = {}  # project id -> (version, hierarchy)
+_cache_lock = threading.Lock()
+
+
+def get_hierarchy(project_id, data_loader):
+    """Return (hierarchy, version) for a project, rebuilding only after it changed."""
+    version = get_project_version(project_id)
+    with _cache_lock:
+        cached = _cache.get(project_id)
+    if cached is not None and cached[0] == version:
+        return cached[1], version
+    hierarchy = build_hierarchy(data_loader(), project_id)
+    if hierarchy is not None:
+        with _cache_lock:
+            _cache[project_id] = (version, hierarchy)
+    return hierarchy, version
@@ -0,0 +1,85 @@
+"""Background job handlers.
+
+Imported by create_app so every job type is registered before the
+runner requeues jobs persisted by a previous run.
+"""
+
+import os
+from datetime import date
+
+from app.services.data_service import load_data
+from app.services.digest_service import send_overdue_digest
+from app.services.firebase_service import get_firestore_client
+from app.services.job_service import job_handler
+from app.services.notification_store_service import new_notification, add_notifications
+from app.services.report_service import generate_report
+from app.services.sprint_analytics_service import record_active_snapshots
+from app.services.user_index_service import get_user_index
+
+# Get database instance
+db = get_firestore_client()
+
+# Local time the overdue card digest is emailed
+DIGEST_HOUR = int(os.environ.get('DIGEST_HOUR', 9))
+# Local time active sprints' daily burndown snapshots are taken
+SNAPSHOT_HOUR = int(os.environ.get('SNAPSHOT_HOUR', 23))
+SNAPSHOT_MINUTE = int(os.environ.get('SNAPSHOT_MINUTE', 55))
+
+# (job type, hour, minute) enqueued every day when SCHEDULE_JOBS is set
+DAILY_JOBS = [
+    ('overdue_digest', DIGEST_HOUR, 0),
+    ('sprint_snapshots', SNAPSHOT_HOUR, SNAPSHOT_MINUTE)
+]
+
+
+@job_handler('notify_assignee')
+def notify_assignee(payload):
+    """Notify a card's assignee, if they have an account, on behalf of another user.
+
+    The recipient is whoever the card is assigned to when the job runs,
+    never a name from the request.
+    """
+    data = load_data(db)
+    card = next((c for c in data['cards'] if c['id'] == payload['card_id']), None)
+    if card is None or not card.get('assignee'):
+        return
+    users = get_user_index(data['users']).resolve([card['assignee']])
+    if not users:
+        return
+    message = f"{payload['sender']} sent you #{card['id']}: {card['title']}"
+    add_notifications(db, [new_notification(users[0]['id'], 'assignee', message, card_id=card['id'])])
+
+
+@job_handler('overdue_digest', max_attempts=3)
+def overdue_digest(payload):
+    """Email assignees their overdue and due-soon cards.
+
+    Users already emailed are recorded in the payload, which is saved
+    with the job before a retry, so a retry after a dropped connection
+    only sends the rest.
+    """
+    # Fixed on the first attempt so a retry after midnight reports the same day
+    today = date.fromisoformat(payload.setdefault('date', date.today().isoformat()))
+    sent_to = payload.setdefault('sent_to', [])
+    data = load_data(db)
+    sent, failed = send_overdue_digest(data, today, skip_user_ids=set(sent_to), on_sent=sent_to.append)
+    for user_id, error in failed:
+        print(f"Overdue digest to user {user_id} refused: {error}")
+    print(f"Overdue digest for {today}: {sent} sent, {len(failed)} refused")
+
+
+@job_handler('sprint_snapshots')
+def sprint_snapshots(payload):
+    """Record today's burndown snapshot of every active sprint."""
+    day = date.fromisoformat(payload.setdefault('date', date.today().isoformat()))
+    count = record_active_snapshots(db, load_data(db), day)
+    print(f"Sprint snapshots for {day}: {count} active sprints")
+
+
+@job_handler('analytics_report', max_attempts=1)
+def analytics_report(payload):
+    """Build an analytics report into the report cache.
+
+    Not retried: the requester is waiting on it and can ask again.
+    """
+    generate_report(payload, lambda: load_data(db), db)
@@ -0,0 +1,369 @@
+"""In-process background jobs with a persistent local queue.
+
+Routes enqueue a job type and a JSON payload instead of doing slow side
+effects inline. Each job is written to disk before it is accepted and
+removed once it succeeds. A failed job is retried with exponential
+backoff; after its last attempt it is moved to queue_dir/failed with the
+error. Jobs run on a thread pool inside an app context of the process
+that enqueued them.
+
+Several processes may share one queue_dir. Every runner owns a
+directory queue_dir/running/<owner> and holds the lock file next to it
+while it lives; its jobs, queued or waiting for a retry, are kept there.
+A runner that starts takes over the jobs of owners whose lock is free
+(the process stopped) by moving them to queue_dir/pending, then claims
+pending jobs one by one with a rename, so each job runs in one process.
+
+Daily jobs are scheduled only when the app's SCHEDULE_JOBS flag is set,
+and then by one process: the one holding queue_dir/scheduler.lock.
+"""
+
+import heapq
+import itertools
+import json
+import os
+import random
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from app.utils.file_lock import try_lock
+
+
+DEFAULT_WORKERS = 4
+DEFAULT_MAX_ATTEMPTS = 5
+RETRY_BASE_SECONDS = 2
+RETRY_MAX_SECONDS = 300
+
+# job type -> (handler, max attempts)
+_handlers = {}
+
+
+def job_handler(job_type, max_attempts=DEFAULT_MAX_ATTEMPTS):
+    """Register a function to run jobs of job_type; it receives the payload dict."""
+    def decorator(func):
+        _handlers[job_type] = (func, max_attempts)
+        return func
+    return decorator
+
+
+def retry_delay(attempts):
+    """Seconds to wait before the next attempt: doubling from the base, capped, with jitter."""
+    delay = min(RETRY_MAX_SECONDS, RETRY_BASE_SECONDS * 2 ** (attempts - 1))
+    return delay * random.uniform(0.5, 1.0)
+
+
+class JobMetrics:
+    """Counters and timings per job type."""
+
+    FIELDS = ('enqueued', 'succeeded', 'retried', 'failed', 'running', 'total_seconds', 'max_seconds')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._types = {}
+
+    def _counts(self, job_type):
+        return self._types.setdefault(job_type, dict.fromkeys(self.FIELDS, 0))
+
+    def incr(self, job_type, field, amount=1):
+        with self._lock:
+            self._counts(job_type)[field] += amount
+
+    def record_run(self, job_type, seconds):
+        with self._lock:
+            counts = self._counts(job_type)
+            counts['running'] -= 1
+            counts['total_seconds'] += seconds
+            counts['max_seconds'] = max(counts['max_seconds'], seconds)
+
+    def snapshot(self):
+        with self._lock:
+            types = {name: dict(counts) for name, counts in self._types.items()}
+        for counts in types.values():
+            finished = counts['succeeded'] + counts['retried'] + counts['failed']
+            counts['avg_seconds'] = round(counts['total_seconds'] / finished, 4) if finished else 0
+            counts['total_seconds'] = round(counts['total_seconds'], 4)
+            counts['max_seconds'] = round(counts['max_seconds'], 4)
+        return types
+
+
+class JobRunner:
+    """Thread pool plus a scheduler thread that releases delayed jobs when they are due."""
+
+    def __init__(self, queue_dir, workers=DEFAULT_WORKERS, app=None):
+        self.queue_dir = queue_dir
+        self.pending_dir = os.path.join(queue_dir, 'pending')
+        self.failed_dir = os.path.join(queue_dir, 'failed')
+        self.owners_dir = os.path.join(queue_dir, 'running')
+        self.owner = f'{os.getpid()}-{uuid.uuid4().hex[:8]}'
+        self.running_dir = os.path.join(self.owners_dir, self.owner)
+        self.app = app
+        self.metrics = JobMetrics()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='job')
+        self._delayed = []  # heap of (run_at, seq, job)
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._started = False
+        self._stopped = False
+        self._scheduler_lock = None
+        self._owner_lock = None
+
+    def start(self):
+        """Start the scheduler and take over jobs left by stopped processes."""
+        with self._cond:
+            if self._started:
+                return
+            self._started = True
+            for directory in (self.pending_dir, self.failed_dir, self.running_dir):
+                os.makedirs(directory, exist_ok=True)
+            self._owner_lock = try_lock(self.running_dir + '.lock')
+        threading.Thread(target=self._schedule_loop, name='job-scheduler', daemon=True).start()
+        self._release_orphans()
+        for name in sorted(os.listdir(self.pending_dir)):
+            if name.endswith('.json'):
+                self._claim(name)
+
+    def _release_orphans(self):
+        """Move the jobs of runners whose process is gone back to pending."""
+        for name in os.listdir(self.owners_dir):
+            directory = os.path.join(self.owners_dir, name)
+            if name == self.owner or not os.path.isdir(directory):
+                continue
+            lock = try_lock(directory + '.lock')
+            if lock is None:
+                continue  # Its process is alive and runs them
+            try:
+                for job_name in os.listdir(directory):
+                    if job_name.endswith('.json'):
+                        os.replace(os.path.join(directory, job_name), os.path.join(self.pending_dir, job_name))
+                    else:
+                        os.remove(os.path.join(directory, job_name))
+                os.rmdir(directory)
+                os.remove(directory + '.lock')
+            except OSError as e:
+                print(f"Could not release jobs of stopped runner {name}: {e}")
+            finally:
+                lock.close()
+
+    def _claim(self, name):
+        """Move a pending job into this runner's directory and schedule it, unless another runner got it first."""
+        path = os.path.join(self.running_dir, name)
+        try:
+            os.rename(os.path.join(self.pending_dir, name), path)
+        except OSError:
+            return
+        try:
+            with open(path) as f:
+                job = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Skipping unreadable job {name}: {e}")
+            return
+        if job.get('type') not in _handlers:
+            print(f"Skipping job {name}: no handler for {job.get('type')}")
+            return
+        self._schedule(job)
+
+    def enqueue(self, job_type, payload=None, delay=0):
+        """Persist a job and schedule it; returns its id."""
+        if job_type not in _handlers:
+            raise ValueError(f'Unknown job type: {job_type}')
+        job = {
+            'id': uuid.uuid4().hex,
+            'type': job_type,
+            'payload': payload or {},
+            'attempts': 0,
+            'enqueued_at': time.time(),
+            'run_at': time.time() + delay
+        }
+        # Start first: starting claims this runner's directory
+        self.start()
+        self._persist(job)
+        self.metrics.incr(job_type, 'enqueued')
+        self._schedule(job)
+        return job['id']
+
+    def schedule_daily(self, job_type, hour, minute=0, payload=None):
+        """Enqueue job_type every day at hour:minute local time."""
+        def loop():
+            while not self._stopped:
+                now = datetime.now()
+                next_run = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+                if next_run <= now:
+                    next_run += timedelta(days=1)
+                time.sleep((next_run - now).total_seconds())
+                if not self._stopped:
+                    self.enqueue(job_type, payload)
+
+        threading.Thread(target=loop, name=f'job-daily-{job_type}', daemon=True).start()
+
+    def schedule_daily_jobs(self, daily_jobs):
+        """Schedule [(job_type, hour, minute)] unless another process already does.
+
+        Only the process holding queue_dir/scheduler.lock schedules, so
+        several workers (or the debug reloader's two processes) enqueue
+        each daily job once. Returns whether this runner schedules.
+        """
+        with self._cond:
+            if self._scheduler_lock is not None:
+                return True
+            os.makedirs(self.queue_dir, exist_ok=True)
+            self._scheduler_lock = try_lock(os.path.join(self.queue_dir, 'scheduler.lock'))
+            if self._scheduler_lock is None:
+                return False
+        self.start()
+        for job_type, hour, minute in daily_jobs:
+            self.schedule_daily(job_type, hour, minute)
+        return True
+
+    def pending_count(self):
+        """Jobs persisted and not finished, across every runner sharing the queue."""
+        directories = [self.pending_dir]
+        try:
+            directories += [os.path.join(self.owners_dir, n) for n in os.listdir(self.owners_dir)]
+        except OSError:
+            pass
+        count = 0
+        for directory in directories:
+            try:
+                count += len([n for n in os.listdir(directory) if n.endswith('.json')])
+            except OSError:
+                pass
+        return count
+
+    def shutdown(self, wait=True):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+            if self._scheduler_lock is not None:
+                self._scheduler_lock.close()
+                self._scheduler_lock = None
+        self._executor.shutdown(wait=wait)
+        # Jobs still waiting for a retry are taken over by the next runner to start
+        with self._cond:
+            if self._owner_lock is not None:
+                self._owner_lock.close()
+                self._owner_lock = None
+
+    def _path(self, directory, job):
+        return os.path.join(directory, f"{job['id']}.json")
+
+    def _persist(self, job, directory=None):
+        directory = directory or self.running_dir
+        os.makedirs(directory, exist_ok=True)
+        path = self._path(directory, job)
+        with open(path + '.tmp', 'w') as f:
+            json.dump(job, f)
+        os.replace(path + '.tmp', path)
+
+    def _schedule(self, job):
+        if job['run_at'] <= time.time():
+            self._executor.submit(self._run, job)
+            return
+        with self._cond:
+            heapq.heappush(self._delayed, (job['run_at'], next(self._seq), job))
+            self._cond.notify()
+
+    def _schedule_loop(self):
+        while True:
+            with self._cond:
+                while not self._stopped:
+                    if self._delayed and self._delayed[0][0] <= time.time():
+                        break
+                    timeout = self._delayed[0][0] - time.time() if self._delayed else None
+                    self._cond.wait(timeout)
+                if self._stopped:
+                    return
+                job = heapq.heappop(self._delayed)[2]
+            self._executor.submit(self._run, job)
+
+    def _run(self, job):
+        handler, max_attempts = _handlers[job['type']]
+        job['attempts'] += 1
+        self.metrics.incr(job['type'], 'running')
+        started = time.perf_counter()
+        try:
+            if self.app is not None:
+                with self.app.app_context():
+                    handler(job['payload'])
+            else:
+                handler(job['payload'])
+        except Exception as e:
+            self.metrics.record_run(job['type'], time.perf_counter() - started)
+            job['traceback'] = traceback.format_exc()
+            self._retry_or_fail(job, max_attempts, e)
+            return
+        self.metrics.record_run(job['type'], time.perf_counter() - started)
+        self.metrics.incr(job['type'], 'succeeded')
+        try:
+            os.remove(self._path(self.running_dir, job))
+        except OSError:
+            pass
+
+    def _retry_or_fail(self, job, max_attempts, error):
+        job['last_error'] = f'{type(error).__name__}: {error}'
+        if job['attempts'] < max_attempts:
+            job['run_at'] = time.time() + retry_delay(job['attempts'])
+            self.metrics.incr(job['type'], 'retried')
+            print(f"Job {job['type']} {job['id']} failed (attempt {job['attempts']}), retrying: {error}")
+            self._persist(job)
+            self._schedule(job)
+            return
+        self.metrics.incr(job['type'], 'failed')
+        print(f"Job {job['type']} {job['id']} failed after {job['attempts']} attempts: {error}")
+        self._persist(job, self.failed_dir)
+        try:
+            os.remove(self._path(self.running_dir, job))
+        except OSError:
+            pass
+
+
+_runner = None
+_runner_lock = threading.Lock()
+
+
+def init_jobs(app, queue_dir, workers=DEFAULT_WORKERS, daily_jobs=()):
+    """Create the shared runner for an app; it starts on the first enqueue or start_jobs().
+
+    With app.config['SCHEDULE_JOBS'] set, the runner starts now and
+    schedules daily_jobs, unless another process holds the schedule.
+    """
+    global _runner
+    with _runner_lock:
+        if _runner is None:
+            _runner = JobRunner(queue_dir, workers, app)
+    app.extensions['job_runner'] = _runner
+    if app.config.get('SCHEDULE_JOBS') and daily_jobs:
+        if not _runner.schedule_daily_jobs(daily_jobs):
+            print(f"Daily jobs are scheduled by another process ({queue_dir})")
+    return _runner
+
+
+def get_job_runner():
+    """The shared runner; one without an app context if init_jobs was not called."""
+    global _runner
+    if _runner is None:
+        with _runner_lock:
+            if _runner is None:
+                _runner = JobRunner(os.path.join('data', 'jobs'))
+    return _runner
+
+
+def start_jobs():
+    """Start the runner now so jobs left by a previous run resume without waiting for a new one."""
+    runner = get_job_runner()
+    runner.start()
+    return runner
+
+
+def enqueue(job_type, payload=None, delay=0):
+    """Queue a job on the shared runner."""
+    return get_job_runner().enqueue(job_type, payload, delay)
+
+
+def job_metrics():
+    """Per-type metrics plus the number of persisted pending jobs."""
+    runner = get_job_runner()
+    return {'jobs': runner.metrics.snapshot(), 'pending': runner.pending_count()}
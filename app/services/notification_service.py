@@ -1,28 +1,36 @@
 """Notification service for user mentions and notifications."""
 
-from datetime import datetime
+from app.services.data_service import comment_document, save_local_collection
+from app.services.notification_store_service import new_notification, add_notifications
+from app.services.user_index_service import get_user_index
+from app.services.version_service import bump_data_version
+from app.utils.helpers import extract_mentions
 
 
-def create_mention_notifications(mentions, card_id, author, data_loader, data_saver):
-    """Create notifications for mentioned users."""
-    data = data_loader()
-    
-    for username in mentions:
-        # Check if user exists
-        user = next((u for u in data['users'] if u['username'] == username), None)
-        if user:
-            notification = {
-                'id': max([n.get('id', 0) for n in data.get('notifications', [])], default=0) + 1,
-                'user_id': user['id'],
-                'type': 'mention',
-                'message': f'{author} mentioned you in a comment',
-                'card_id': card_id,
-                'read': False,
-                'created_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            }
-            
-            if 'notifications' not in data:
-                data['notifications'] = []
-            data['notifications'].append(notification)
-    
-    data_saver(data)
\ No newline at end of file
+def mention_notifications(mentions, card_id, author, users):
+    """Build notifications for the mentioned users that exist."""
+    return [
+        new_notification(user['id'], 'mention', f'{author} mentioned you in a comment', card_id=card_id)
+        for user in get_user_index(users).resolve(mentions)
+    ]
+
+
+def save_comment(comment, card, data, db):
+    """Persist a new comment and its mention notifications in one write.
+
+    With Firestore the comment document and every notification (with
+    its counter update) go into a single batch; locally only the
+    mentioned users' notification files are written. Either way the
+    local comments file is rewritten as a backup. The comment must
+    already be appended to data['comments'].
+    """
+    notifications = mention_notifications(
+        extract_mentions(comment['content']), card['id'], comment['author'], data['users']
+    )
+    save_local_collection(data, 'comments')
+    if db is not None:
+        add_notifications(db, notifications, writes=[comment_document(db, card, comment)])
+    else:
+        add_notifications(db, notifications)
+    bump_data_version(card.get('project_id'))
+    return notifications
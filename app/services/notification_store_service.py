@@ -0,0 +1,302 @@
+"""Per-user notification storage with a maintained unread counter.
+
+Notifications live under their user instead of in one global list:
+users/{id}/notifications/{notification id} in Firestore, or
+data/notifications/{user id}.json locally. Each user also has an
+unread counter that is adjusted in the same write as the change it
+counts, so reading it is one lookup, and a change counter that is
+persisted with the notifications so ETags stay valid across restarts and
+processes. Every change is published to the user's event channel for the
+notification stream.
+"""
+
+import json
+import os
+import threading
+import uuid
+from datetime import datetime
+
+from app.services.event_service import publish, user_channel
+from app.utils.pagination import paginate
+
+
+# Firestore caps a batched write at 500 operations
+FIRESTORE_BATCH_LIMIT = 500
+
+
+def new_notification(user_id, notification_type, message, **fields):
+    """Build a notification document."""
+    return dict(
+        fields,
+        id=uuid.uuid4().hex[:20],
+        user_id=user_id,
+        type=notification_type,
+        message=message,
+        read=False,
+        created_at=datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    )
+
+
+def _sort_key(notification):
+    return [notification.get('created_at', ''), notification.get('id', '')]
+
+
+def _file_stamp(path):
+    """Identifies one version of a file; every write replaces it with a new inode."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_ino, stat.st_mtime_ns
+
+
+class LocalNotificationStore:
+    """One JSON file per user, cached in memory and reloaded when another process rewrites it."""
+
+    def __init__(self, data_dir=os.path.join('data', 'notifications')):
+        self.data_dir = data_dir
+        self._lock = threading.RLock()
+        # user id -> {'unread': int, 'version': int, 'notifications': [oldest .. newest]}
+        self._users = {}
+        self._stamps = {}  # user id -> stamp of the file the cached state was read from
+
+    def _path(self, user_id):
+        return os.path.join(self.data_dir, f'{user_id}.json')
+
+    def _user(self, user_id):
+        with self._lock:
+            stamp = _file_stamp(self._path(user_id))
+            if user_id not in self._users or self._stamps.get(user_id) != stamp:
+                try:
+                    with open(self._path(user_id)) as f:
+                        state = json.load(f)
+                except (OSError, ValueError):
+                    state = {'unread': 0, 'notifications': []}
+                state.setdefault('version', 0)
+                state['notifications'].sort(key=_sort_key)
+                self._users[user_id] = state
+                self._stamps[user_id] = stamp
+            return self._users[user_id]
+
+    def _write(self, user_id):
+        os.makedirs(self.data_dir, exist_ok=True)
+        path = self._path(user_id)
+        self._users[user_id]['version'] += 1
+        with open(path + '.tmp', 'w') as f:
+            json.dump(self._users[user_id], f, indent=2)
+        os.replace(path + '.tmp', path)
+        self._stamps[user_id] = _file_stamp(path)
+
+    def version(self, user_id):
+        with self._lock:
+            return str(self._user(user_id)['version'])
+
+    def add_many(self, notifications):
+        """Store notifications; one file write per affected user."""
+        by_user = {}
+        for notification in notifications:
+            by_user.setdefault(notification['user_id'], []).append(notification)
+        with self._lock:
+            for user_id, items in by_user.items():
+                state = self._user(user_id)
+                state['notifications'].extend(items)
+                state['notifications'].sort(key=_sort_key)
+                state['unread'] += len([n for n in items if not n.get('read')])
+                self._write(user_id)
+        return {user_id: self.unread_count(user_id) for user_id in by_user}
+
+    def list(self, user_id, limit, cursor=None):
+        """Newest first; returns (notifications, next_cursor)."""
+        with self._lock:
+            newest_first = list(reversed(self._user(user_id)['notifications']))
+        return paginate(newest_first, limit, cursor, key=_sort_key, reverse=True)
+
+    def unread_count(self, user_id):
+        with self._lock:
+            return self._user(user_id)['unread']
+
+    def mark_read(self, user_id, notification_id):
+        """Returns None if not found, else whether it was unread."""
+        with self._lock:
+            state = self._user(user_id)
+            notification = next((n for n in state['notifications'] if n['id'] == notification_id), None)
+            if notification is None:
+                return None
+            if notification.get('read'):
+                return False
+            notification['read'] = True
+            state['unread'] = max(0, state['unread'] - 1)
+            self._write(user_id)
+            return True
+
+    def mark_all_read(self, user_id):
+        """Returns how many notifications changed."""
+        with self._lock:
+            state = self._user(user_id)
+            changed = 0
+            for notification in state['notifications']:
+                if not notification.get('read'):
+                    notification['read'] = True
+                    changed += 1
+            if changed:
+                state['unread'] = 0
+                self._write(user_id)
+            return changed
+
+
+class FirestoreNotificationStore:
+    """users/{id}/notifications documents plus a users/{id}/meta/notifications counter.
+
+    The counter document holds the unread count and a change version,
+    both updated in the same batch as the change. It is kept outside the
+    user document because save_data overwrites user documents wholesale.
+    """
+
+    def __init__(self, db):
+        self.db = db
+
+    def _collection(self, user_id):
+        return self.db.collection('users').document(str(user_id)).collection('notifications')
+
+    def _counter(self, user_id):
+        return self.db.collection('users').document(str(user_id)).collection('meta').document('notifications')
+
+    def version(self, user_id):
+        snapshot = self._counter(user_id).get()
+        return str((snapshot.to_dict() or {}).get('version', 0)) if snapshot.exists else '0'
+
+    def add_many(self, notifications, writes=()):
+        """Store notifications and bump counters in batched writes.
+
+        writes are extra (reference, document) pairs to set in the same
+        first batch, so a change and the notifications it causes commit
+        together.
+        """
+        from firebase_admin import firestore
+
+        unread = {}
+        for notification in notifications:
+            unread.setdefault(notification['user_id'], 0)
+            if not notification.get('read'):
+                unread[notification['user_id']] += 1
+        operations = [(ref, 'set', document) for ref, document in writes]
+        operations += [(self._collection(n['user_id']).document(n['id']), 'set', n) for n in notifications]
+        operations += [(self._counter(user_id), 'increment', count) for user_id, count in unread.items()]
+        for start in range(0, len(operations), FIRESTORE_BATCH_LIMIT):
+            batch = self.db.batch()
+            for ref, kind, value in operations[start:start + FIRESTORE_BATCH_LIMIT]:
+                if kind == 'set':
+                    batch.set(ref, {k: v for k, v in value.items() if k != 'id'})
+                else:
+                    batch.set(ref, {'unread': firestore.Increment(value), 'version': firestore.Increment(1)},
+                              merge=True)
+            batch.commit()
+        return {user_id: self.unread_count(user_id) for user_id in unread}
+
+    def list(self, user_id, limit, cursor=None):
+        """Newest first, reading one page; returns (notifications, next_cursor)."""
+        from firebase_admin import firestore
+        from app.utils.pagination import decode_cursor, encode_cursor
+
+        query = (self._collection(user_id)
+                 .order_by('created_at', direction=firestore.Query.DESCENDING)
+                 .order_by(firestore.FieldPath.document_id(), direction=firestore.Query.DESCENDING))
+        position = decode_cursor(cursor)
+        if position:
+            query = query.start_after({'created_at': position[0], '__name__': self._collection(user_id).document(position[1])})
+        snapshots = list(query.limit(limit + 1).stream())
+        notifications = [dict(doc.to_dict(), id=doc.id) for doc in snapshots[:limit]]
+        next_cursor = None
+        if len(snapshots) > limit:
+            next_cursor = encode_cursor(_sort_key(notifications[-1]))
+        return notifications, next_cursor
+
+    def unread_count(self, user_id):
+        snapshot = self._counter(user_id).get()
+        return max(0, (snapshot.to_dict() or {}).get('unread', 0)) if snapshot.exists else 0
+
+    def mark_read(self, user_id, notification_id):
+        """Single-document update plus counter decrement, committed together."""
+        from firebase_admin import firestore
+
+        ref = self._collection(user_id).document(str(notification_id))
+        snapshot = ref.get()
+        if not snapshot.exists:
+            return None
+        if snapshot.to_dict().get('read'):
+            return False
+        batch = self.db.batch()
+        batch.update(ref, {'read': True})
+        batch.set(self._counter(user_id), {'unread': firestore.Increment(-1), 'version': firestore.Increment(1)},
+                  merge=True)
+        batch.commit()
+        return True
+
+    def mark_all_read(self, user_id):
+        """Update every unread document in batches and reset the counter."""
+        from firebase_admin import firestore
+
+        refs = [doc.reference for doc in self._collection(user_id).where('read', '==', False).stream()]
+        for start in range(0, len(refs), FIRESTORE_BATCH_LIMIT - 1):
+            batch = self.db.batch()
+            for ref in refs[start:start + FIRESTORE_BATCH_LIMIT - 1]:
+                batch.update(ref, {'read': True})
+            batch.set(self._counter(user_id), {'unread': 0, 'version': firestore.Increment(1)}, merge=True)
+            batch.commit()
+        return len(refs)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_notification_store(db):
+    """Return the shared store for the configured backend."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = FirestoreNotificationStore(db) if db is not None else LocalNotificationStore()
+    return _store
+
+
+def notification_version(db, user_id):
+    """Changes whenever the user's notifications change; used for ETags.
+
+    Read from the persisted counter, so it is the same in every process
+    and survives restarts.
+    """
+    return get_notification_store(db).version(user_id)
+
+
+def add_notifications(db, notifications, writes=()):
+    """Store notifications in one batched write and push them to connected users.
+
+    writes are extra Firestore (reference, document) pairs committed in
+    the same batch; they are only accepted with the Firestore backend.
+    """
+    if not notifications and not writes:
+        return
+    store = get_notification_store(db)
+    counts = store.add_many(notifications, writes) if writes else store.add_many(notifications)
+    for notification in notifications:
+        publish(user_channel(notification['user_id']), 'notification', notification)
+    for user_id, count in counts.items():
+        publish(user_channel(user_id), 'unread', {'count': count})
+
+
+def mark_read(db, user_id, notification_id):
+    """Mark one notification read; returns None if it does not exist."""
+    store = get_notification_store(db)
+    changed = store.mark_read(user_id, notification_id)
+    if changed:
+        publish(user_channel(user_id), 'unread', {'count': store.unread_count(user_id)})
+    return changed
+
+
+def mark_all_read(db, user_id):
+    """Mark all of a user's notifications read; returns how many changed."""
+    changed = get_notification_store(db).mark_all_read(user_id)
+    if changed:
+        publish(user_channel(user_id), 'unread', {'count': 0})
+    return changed
@@ -0,0 +1,66 @@
+"""Grouped completion progress per project and epic for the gantt view."""
+
+import threading
+
+from app.services.version_service import get_data_version
+
+
+def _percent(done, total):
+    return round(done / total * 100, 1) if total else 0
+
+
+def compute_progress(data):
+    """Aggregate card totals and done counts per project and per epic.
+
+    One pass over the cards; returns {project_id: {'total', 'done',
+    'percent', 'epics': {epic_id: {'total', 'done', 'percent'}}}} for
+    every project, including those without cards.
+    """
+    progress = {p['id']: {'total': 0, 'done': 0, 'epics': {}} for p in data.get('projects', [])}
+    for card in data.get('cards', []):
+        project = progress.setdefault(card.get('project_id'), {'total': 0, 'done': 0, 'epics': {}})
+        epic = project['epics'].setdefault(card.get('epic_id'), {'total': 0, 'done': 0})
+        done = 1 if card.get('status') == 'done' else 0
+        for group in (project, epic):
+            group['total'] += 1
+            group['done'] += done
+    for project in progress.values():
+        project['percent'] = _percent(project['done'], project['total'])
+        for epic in project['epics'].values():
+            epic['percent'] = _percent(epic['done'], epic['total'])
+    return progress
+
+
+_cache = {'version': None, 'progress': None}
+_cache_lock = threading.Lock()
+
+
+def get_progress(data_loader):
+    """Return (progress, version), recomputing only when the data version changed.
+
+    The version is read before loading so a write racing with the
+    computation leaves the cache stale rather than mislabelled.
+    """
+    version = get_data_version()
+    with _cache_lock:
+        if _cache['version'] == version:
+            return _cache['progress'], version
+    progress = compute_progress(data_loader())
+    with _cache_lock:
+        _cache['version'] = version
+        _cache['progress'] = progress
+    return progress, version
+
+
+def progress_to_json(progress):
+    """List form of compute_progress output, safe for jsonify (no mixed/None keys)."""
+    return [
+        {
+            'project_id': project_id,
+            'total': project['total'],
+            'done': project['done'],
+            'percent': project['percent'],
+            'epics': [dict(epic, epic_id=epic_id) for epic_id, epic in project['epics'].items()]
+        }
+        for project_id, project in progress.items()
+    ]
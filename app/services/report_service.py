@@ -0,0 +1,312 @@
+"""Analytics reports generated in the background and cached by content key.
+
+A report is identified by a key hashed from its type and the analytics
+data version, so a report for unchanged data is built once and then
+served straight from data/reports/<key>.json (or .csv) until the next
+write. A missing report is built by an 'analytics_report' job; its
+progress is kept in memory and published on the 'report:<key>' event
+channel for streaming. A request for a report that is already being
+built joins the running job, unless its status has not moved for
+REPORT_JOB_TIMEOUT (the job was lost to a restart or taken over by
+another process), in which case the job counts as failed and a new one
+is queued. After a failure, requests get the error back for
+REPORT_RETRY_SECONDS before a new job is queued, and finished statuses
+are dropped after REPORT_STATUS_TTL.
+"""
+
+import csv
+import hashlib
+import io
+import json
+import math
+import os
+import threading
+import time
+from datetime import datetime
+
+from app.services.analytics_service import analytics_data_version, compute_analytics
+from app.services.event_service import publish
+from app.services.sprint_analytics_service import velocity
+
+
+REPORT_DIR = os.path.join('data', 'reports')
+
+# Cached report files kept on disk; the oldest are removed beyond this
+REPORT_CACHE_SIZE = 100
+
+# Resources above this utilization (percent) are flagged in the risk report
+OVER_UTILIZED = 90
+
+FORMATS = ('json', 'csv')
+
+# A failed report is not queued again for this long; requests get the error
+REPORT_RETRY_SECONDS = 60
+# Done and failed statuses are forgotten after this long, oldest first beyond the limit
+REPORT_STATUS_TTL = 3600
+REPORT_STATUS_LIMIT = 500
+# A queued or running status not updated for this long belongs to a lost job
+REPORT_JOB_TIMEOUT = 300
+
+_status = {}     # report key -> {'state', 'progress', 'message', 'updated_at', ...}
+_job_keys = {}   # job id -> report key, for the latest job of each key
+_status_lock = threading.Lock()
+
+
+class ReportFailed(RuntimeError):
+    """The report's last build failed and may not be retried for retry_after seconds."""
+
+    def __init__(self, status, retry_after):
+        super().__init__(status.get('error') or 'Report generation failed')
+        self.status = status
+        self.retry_after = retry_after
+
+
+def report_key(report_type, version=None):
+    """Content key of a report type at a data version (default: the current one)."""
+    version = version or analytics_data_version()
+    return hashlib.sha256(f'{report_type}|{version}'.encode('utf-8')).hexdigest()[:32]
+
+
+def report_channel(key):
+    return f'report:{key}'
+
+
+def _report_path(key, fmt):
+    return os.path.join(REPORT_DIR, f'{key}.{fmt}')
+
+
+def cached_report_path(key, fmt='json'):
+    """Path of a finished report file, or None."""
+    path = os.path.abspath(_report_path(key, fmt))
+    return path if os.path.exists(path) else None
+
+
+def load_report(key):
+    """A finished report as a dict, or None."""
+    path = cached_report_path(key)
+    if path is None:
+        return None
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _project_health(analytics, data, db):
+    projects = analytics['projects']
+    return {
+        'projects': projects,
+        'columns': ['Project', 'Status', 'Progress %', 'Cards', 'Done', 'Overdue', 'Due soon'],
+        'rows': [[p['name'], p['status'], p['progress'], p['total'], p['done'], p['overdue'], p['due_soon']]
+                 for p in projects]
+    }
+
+
+def _resource_utilization(analytics, data, db):
+    resources = analytics['resources']
+    return {
+        'resources': resources,
+        'columns': ['Assignee', 'Utilization %', 'Open', 'In progress', 'Overdue', 'High priority', 'Done'],
+        'rows': [[r['name'], r['utilization'], r['open'], r['in_progress'], r['overdue'], r['high_priority'],
+                  r['done']] for r in resources]
+    }
+
+
+def _performance_metrics(analytics, data, db):
+    projects = []
+    for project in analytics['projects']:
+        project_velocity = velocity(db, data, project['id'])
+        projects.append({
+            'id': project['id'],
+            'name': project['name'],
+            'progress': project['progress'],
+            'completed_sprints': len(project_velocity['sprints']),
+            'average_velocity': project_velocity['average'],
+            'unit': project_velocity['sprints'][-1]['unit'] if project_velocity['sprints'] else 'points'
+        })
+    with_sprints = [p for p in projects if p['completed_sprints']]
+    return {
+        'projects': projects,
+        'average_velocity': round(sum(p['average_velocity'] for p in with_sprints) / len(with_sprints), 2)
+        if with_sprints else 0,
+        'completion_rate': analytics['summary']['progress'],
+        'columns': ['Project', 'Progress %', 'Completed sprints', 'Average velocity', 'Unit'],
+        'rows': [[p['name'], p['progress'], p['completed_sprints'], p['average_velocity'], p['unit']]
+                 for p in projects]
+    }
+
+
+def _risk_assessment(analytics, data, db):
+    risks = []
+    for project in analytics['projects']:
+        if project['status'] == 'overdue':
+            risks.append({'kind': 'project', 'name': project['name'], 'severity': 'high',
+                          'reason': f"{project['overdue']} overdue card{'s' if project['overdue'] != 1 else ''}"})
+        elif project['status'] == 'at-risk':
+            risks.append({'kind': 'project', 'name': project['name'], 'severity': 'medium',
+                          'reason': f"{project['due_soon']} card{'s' if project['due_soon'] != 1 else ''} due soon"})
+    for resource in analytics['resources']:
+        if resource['utilization'] > OVER_UTILIZED:
+            risks.append({'kind': 'resource', 'name': resource['name'], 'severity': 'high',
+                          'reason': f"over-utilized at {resource['utilization']}%"})
+        elif resource['overdue']:
+            risks.append({'kind': 'resource', 'name': resource['name'], 'severity': 'medium',
+                          'reason': f"{resource['overdue']} overdue card{'s' if resource['overdue'] != 1 else ''}"})
+    return {
+        'risks': risks,
+        'summary': analytics['summary'],
+        'columns': ['Kind', 'Name', 'Severity', 'Reason'],
+        'rows': [[r['kind'], r['name'], r['severity'], r['reason']] for r in risks]
+    }
+
+
+REPORT_BUILDERS = {
+    'project-health': _project_health,
+    'resource-utilization': _resource_utilization,
+    'performance-metrics': _performance_metrics,
+    'risk-assessment': _risk_assessment
+}
+
+
+def _is_lost(status, now):
+    return status['state'] in ('queued', 'running') and now - status['updated_at'] > REPORT_JOB_TIMEOUT
+
+
+def report_status(key):
+    with _status_lock:
+        status = _status.get(key)
+        if status and _is_lost(status, time.time()):
+            return dict(status, state='failed', message='Failed', error='Report job stopped responding')
+        return dict(status) if status else None
+
+
+def job_report_key(job_id):
+    with _status_lock:
+        return _job_keys.get(job_id)
+
+
+def _set_status(key, **fields):
+    with _status_lock:
+        status = _status.setdefault(key, {})
+        status.update(fields, updated_at=time.time())
+        snapshot = dict(status)
+    publish(report_channel(key), 'progress', snapshot)
+    return snapshot
+
+
+def _forget(key):
+    status = _status.pop(key)
+    _job_keys.pop(status.get('job_id'), None)
+
+
+def _prune_statuses(now):
+    """Drop lost jobs and expired done / failed statuses, then the oldest until a new one fits. Call under the lock."""
+    for key in [key for key, status in _status.items() if _is_lost(status, now)]:
+        _forget(key)
+    finished = sorted((status['updated_at'], key) for key, status in _status.items()
+                      if status['state'] in ('done', 'failed'))
+    excess = len(_status) + 1 - REPORT_STATUS_LIMIT
+    for updated_at, key in finished:
+        if now - updated_at <= REPORT_STATUS_TTL and excess <= 0:
+            break
+        _forget(key)
+        excess -= 1
+
+
+def _discard_files(key):
+    for fmt in FORMATS:
+        try:
+            os.remove(_report_path(key, fmt))
+        except OSError:
+            pass
+
+
+def request_report(report_type, enqueue, rebuild=False):
+    """Return (key, job id) for a report; the job id is None when it is already cached.
+
+    enqueue(payload) queues the generation job and returns its id. A
+    report that is being built returns the running job's id. rebuild
+    discards cached files that turned out to be unreadable. Raises
+    ReportFailed within REPORT_RETRY_SECONDS of a failed build.
+    """
+    version = analytics_data_version()
+    key = report_key(report_type, version)
+    if not rebuild and all(cached_report_path(key, fmt) for fmt in FORMATS):
+        return key, None
+    now = time.time()
+    with _status_lock:
+        _prune_statuses(now)
+        status = _status.get(key)
+        if status and status['state'] in ('queued', 'running'):
+            return key, status['job_id']
+        if status and status['state'] == 'failed' and now - status['updated_at'] < REPORT_RETRY_SECONDS:
+            raise ReportFailed(dict(status), math.ceil(status['updated_at'] + REPORT_RETRY_SECONDS - now))
+        if status:
+            _forget(key)
+        if rebuild:
+            _discard_files(key)
+        # Enqueued under the lock so a concurrent request joins this job
+        job_id = enqueue({'report_type': report_type, 'key': key, 'version': version})
+        _job_keys[job_id] = key
+        _status[key] = {'state': 'queued', 'progress': 0, 'message': 'Queued', 'updated_at': now,
+                        'report_type': report_type, 'report_id': key, 'job_id': job_id}
+    return key, job_id
+
+
+def _write_atomic(path, text):
+    with open(path + '.tmp', 'w', newline='') as f:
+        f.write(text)
+    os.replace(path + '.tmp', path)
+
+
+def _to_csv(report):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(report['columns'])
+    writer.writerows(report['rows'])
+    return buffer.getvalue()
+
+
+def _prune():
+    try:
+        names = [os.path.join(REPORT_DIR, n) for n in os.listdir(REPORT_DIR) if n.endswith('.json')]
+    except OSError:
+        return
+    names.sort(key=os.path.getmtime)
+    for path in names[:-REPORT_CACHE_SIZE]:
+        for fmt in FORMATS:
+            try:
+                os.remove(os.path.splitext(path)[0] + '.' + fmt)
+            except OSError:
+                pass
+
+
+def generate_report(payload, data_loader, db=None):
+    """Build a report into the cache (JSON and CSV), publishing progress as it goes."""
+    report_type, key = payload['report_type'], payload['key']
+    try:
+        _set_status(key, state='running', progress=10, message='Loading data', report_type=report_type,
+                    report_id=key)
+        data = data_loader()
+        _set_status(key, progress=40, message='Aggregating')
+        analytics = compute_analytics(data)
+        _set_status(key, progress=70, message='Building report')
+        report = dict(REPORT_BUILDERS[report_type](analytics, data, db),
+                      success=True,
+                      report_type=report_type,
+                      report_id=key,
+                      generated_at=datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+        _set_status(key, progress=90, message='Saving')
+        os.makedirs(REPORT_DIR, exist_ok=True)
+        # CSV first: the JSON file marks the report as finished
+        _write_atomic(_report_path(key, 'csv'), _to_csv(report))
+        _write_atomic(_report_path(key, 'json'), json.dumps(report, separators=(',', ':')))
+        _prune()
+    except Exception as e:
+        _set_status(key, state='failed', message='Failed', error=str(e))
+        publish(report_channel(key), 'failed', report_status(key))
+        raise
+    status = _set_status(key, state='done', progress=100, message='Done')
+    publish(report_channel(key), 'done', status)
+    return report
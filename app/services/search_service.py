@@ -0,0 +1,643 @@
+"""Full-text search over cards, epics, stories and comments.
+
+Two in-process indexes are built once from load_data and then kept
+current by the write routes (add/update/delete), so a search request
+never has to scan the whole dataset:
+
+- SearchIndex, a word-level inverted index with prefix matching and
+  relevance ranking.
+- TrigramIndex, which answers substring queries (matching inside
+  identifiers, like the original linear scan) and typo-tolerant
+  queries via edit distance. It is built in the background at startup;
+  until it is ready those queries fall back to the word index.
+"""
+
+import heapq
+import math
+import re
+import threading
+from bisect import bisect_left, insort
+
+
+TOKEN_RE = re.compile(r'\w+')
+
+# Title matches count for more than description/content matches
+TITLE_WEIGHT = 3.0
+BODY_WEIGHT = 1.0
+
+SNIPPET_LENGTH = 100
+
+# Shorter tokens only match whole words; expanding them would touch most of the vocabulary
+MIN_PREFIX_LENGTH = 2
+
+# Cap on the completions a prefix expands to; the shortest (closest) completions win
+MAX_PREFIX_EXPANSIONS = 32
+
+
+def tokenize(text):
+    """Split text into lowercase word tokens."""
+    if not text:
+        return []
+    return TOKEN_RE.findall(str(text).lower())
+
+
+def _item_title(item):
+    """Epics and stories use 'name' when created via the API, 'title' when migrated."""
+    return item.get('title') or item.get('name') or ''
+
+
+# Index entries are keyed by a single int packing type and id, which hashes
+# and sorts much faster than (type, id) tuples; the order is type, then id.
+DOC_TYPES = ('card', 'comment', 'epic', 'story')
+_TYPE_RANKS = {doc_type: rank for rank, doc_type in enumerate(DOC_TYPES)}
+ID_BITS = 40
+
+
+def doc_key(doc_type, doc_id):
+    """Pack an item type and id into an index key."""
+    return (_TYPE_RANKS[doc_type] << ID_BITS) | int(doc_id)
+
+
+def _type_ranks(types):
+    """Translate a set of type names into key prefixes, or None for all types."""
+    if types is None:
+        return None
+    return {_TYPE_RANKS[doc_type] for doc_type in types if doc_type in _TYPE_RANKS}
+
+
+class SearchIndex:
+    """Tokenized inverted index with prefix matching and ranked results."""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.docs = {}        # key -> result document
+        self.doc_terms = {}   # key -> {term: weight}
+        self.postings = {}    # term -> {key: weight}
+        self.terms = []       # sorted vocabulary for prefix lookups
+        self.card_comments = {}  # card id -> set of comment ids
+
+    def __len__(self):
+        return len(self.docs)
+
+    def build(self, data):
+        """Index every searchable item in a loaded dataset."""
+        with self._lock:
+            self.docs, self.doc_terms, self.postings, self.terms = {}, {}, {}, []
+            self.card_comments = {}
+            for card in data.get('cards', []):
+                self.add_card(card)
+            for epic in data.get('epics', []):
+                self.add_epic(epic)
+            for story in data.get('stories', []):
+                self.add_story(story)
+            for comment in data.get('comments', []):
+                self.add_comment(comment)
+
+    def add_card(self, card):
+        with self._lock:
+            self._add('card', card['id'], _item_title(card), card.get('description', ''),
+                      project_id=card.get('project_id'))
+            # Comment results display the title of their card
+            for comment_id in self.card_comments.get(card['id'], ()):
+                self.docs[doc_key('comment', comment_id)]['title'] = _item_title(card)
+
+    def add_epic(self, epic):
+        self._add('epic', epic['id'], _item_title(epic), epic.get('description', ''),
+                  project_id=epic.get('project_id'))
+
+    def add_story(self, story):
+        self._add('story', story['id'], _item_title(story), story.get('description', ''),
+                  project_id=story.get('project_id'))
+
+    def add_comment(self, comment):
+        with self._lock:
+            card_id = comment.get('card_id')
+            card = self.docs.get(doc_key('card', card_id)) if card_id is not None else None
+            self._add('comment', comment['id'], card['title'] if card else '', comment.get('content', ''),
+                      card_id=card_id, index_title=False)
+            self.card_comments.setdefault(card_id, set()).add(comment['id'])
+
+    def remove(self, doc_type, doc_id):
+        """Drop one item from the index."""
+        with self._lock:
+            key = doc_key(doc_type, doc_id)
+            self.docs.pop(key, None)
+            for term in self.doc_terms.pop(key, {}):
+                posting = self.postings.get(term)
+                if posting is None:
+                    continue
+                posting.pop(key, None)
+                if not posting:
+                    del self.postings[term]
+                    index = bisect_left(self.terms, term)
+                    if index < len(self.terms) and self.terms[index] == term:
+                        self.terms.pop(index)
+
+    def remove_card(self, card_id):
+        """Drop a card and the comments that belong to it."""
+        with self._lock:
+            self.remove('card', card_id)
+            for comment_id in self.card_comments.pop(card_id, ()):
+                self.remove('comment', comment_id)
+
+    def _add(self, doc_type, doc_id, title, body, index_title=True, **extra):
+        key = doc_key(doc_type, doc_id)
+        weights = {}
+        if index_title:
+            for term in tokenize(title):
+                weights[term] = weights.get(term, 0) + TITLE_WEIGHT
+        for term in tokenize(body):
+            weights[term] = weights.get(term, 0) + BODY_WEIGHT
+
+        with self._lock:
+            if key in self.docs:
+                self.remove(doc_type, doc_id)
+            self.docs[key] = dict({
+                'type': doc_type,
+                'id': doc_id,
+                'title': title,
+                'description': (body or '')[:SNIPPET_LENGTH]
+            }, **extra)
+            self.doc_terms[key] = weights
+            for term, weight in weights.items():
+                posting = self.postings.get(term)
+                if posting is None:
+                    posting = self.postings[term] = {}
+                    insort(self.terms, term)
+                posting[key] = weight
+
+    def _expand(self, token):
+        """Return vocabulary terms starting with token."""
+        if len(token) < MIN_PREFIX_LENGTH:
+            return [token] if token in self.postings else []
+        start = bisect_left(self.terms, token)
+        end = bisect_left(self.terms, token + '\uffff')
+        if end - start <= MAX_PREFIX_EXPANSIONS:
+            return self.terms[start:end]
+        return sorted(self.terms[start:end], key=len)[:MAX_PREFIX_EXPANSIONS]
+
+    def _score(self, tokens):
+        """Return {key: score} for items matching every token (prefix match)."""
+        total_docs = max(len(self.docs), 1)
+        token_terms = []
+        for token in set(tokens):
+            terms = [(self.postings[term], math.log(1 + total_docs / len(self.postings[term])))
+                     for term in self._expand(token)]
+            if not terms:
+                return {}
+            token_terms.append((sum(len(posting) for posting, _ in terms), terms))
+
+        # Seed candidates from the rarest token, then only probe the others
+        token_terms.sort(key=lambda entry: entry[0])
+        first_terms = token_terms[0][1]
+        if len(first_terms) == 1:
+            posting, idf = first_terms[0]
+            scores = {key: weight * idf for key, weight in posting.items()}
+        else:
+            scores = {}
+            for posting, idf in first_terms:
+                for key, weight in posting.items():
+                    scores[key] = scores.get(key, 0) + weight * idf
+        for _, terms in token_terms[1:]:
+            next_scores = {}
+            for key, score in scores.items():
+                extra = 0
+                for posting, idf in terms:
+                    weight = posting.get(key)
+                    if weight:
+                        extra += weight * idf
+                if extra:
+                    next_scores[key] = score + extra
+            scores = next_scores
+            if not scores:
+                return {}
+        return scores
+
+    def search(self, query, limit=50, after=None, types=None):
+        """Return up to limit (sort_key, document) pairs ranked by relevance.
+
+        Every query token is prefix-matched and all tokens must match.
+        Scores are tf-idf style sums; ties break on the item key so the
+        ordering is stable and after (a sort key) can resume a page.
+        """
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+
+        with self._lock:
+            scores = self._score(tokens)
+            type_ranks = _type_ranks(types)
+            ranked = (
+                (-score, key) for key, score in scores.items()
+                if type_ranks is None or key >> ID_BITS in type_ranks
+            )
+            if after is not None:
+                after = tuple(after)
+                ranked = (sort_key for sort_key in ranked if sort_key > after)
+            top = heapq.nsmallest(limit, ranked)
+            return [(list(sort_key), dict(self.docs[sort_key[1]], score=round(-sort_key[0], 4)))
+                    for sort_key in top]
+
+    def match_ids(self, query, doc_type):
+        """Return the set of ids of one item type matching every query token."""
+        tokens = tokenize(query)
+        if not tokens:
+            return set()
+        rank = _TYPE_RANKS[doc_type]
+        id_mask = (1 << ID_BITS) - 1
+        with self._lock:
+            return {key & id_mask for key in self._score(tokens) if key >> ID_BITS == rank}
+
+
+def trigrams(text):
+    """Return the set of 3-character substrings of text."""
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _word_trigrams(word):
+    """Trigrams of a word padded so short words and word edges still produce grams."""
+    return trigrams('  ' + word + ' ')
+
+
+def edit_distance(a, b, max_distance):
+    """Edit distance between a and b counting adjacent swaps as one edit.
+
+    Returns max_distance + 1 as soon as the distance is known to exceed
+    max_distance.
+    """
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    before_previous = None
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            cost = min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (char_a != char_b)
+            )
+            if (before_previous is not None and j > 1 and char_a == b[j - 2]
+                    and a[i - 2] == char_b):
+                cost = min(cost, before_previous[j - 2] + 1)
+            current.append(cost)
+        if min(current) > max_distance:
+            return max_distance + 1
+        before_previous, previous = previous, current
+    return previous[-1]
+
+
+def default_max_distance(word):
+    """Typo allowance that grows with the length of the query word."""
+    if len(word) <= 3:
+        return 0
+    if len(word) <= 6:
+        return 1
+    return 2
+
+
+class TrigramIndex:
+    """Trigram index over card, epic and story text.
+
+    Document trigrams narrow substring queries to the items that contain
+    every trigram of the query before the exact check. Word trigrams
+    narrow fuzzy queries to vocabulary words with enough overlap before
+    computing edit distance (a word within distance k of the query
+    shares at least len(grams) - 4k of its trigrams: an insertion, deletion
+    or substitution changes at most 3, an adjacent swap at most 4).
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.docs = {}        # key -> result document
+        self.texts = {}       # key -> lowercased searchable text
+        self.grams = {}       # trigram -> set of keys
+        self.doc_words = {}   # key -> set of words
+        self.word_docs = {}   # word -> set of keys
+        self.word_grams = {}  # padded word trigram -> set of words
+
+    def __len__(self):
+        return len(self.docs)
+
+    def build(self, data):
+        """Index every card, epic and story in a loaded dataset."""
+        with self._lock:
+            self.docs, self.texts, self.grams = {}, {}, {}
+            self.doc_words, self.word_docs, self.word_grams = {}, {}, {}
+            for card in data.get('cards', []):
+                self.add_card(card)
+            for epic in data.get('epics', []):
+                self.add_epic(epic)
+            for story in data.get('stories', []):
+                self.add_story(story)
+
+    def add_card(self, card):
+        self._add('card', card, project_id=card.get('project_id'))
+
+    def add_epic(self, epic):
+        self._add('epic', epic, project_id=epic.get('project_id'))
+
+    def add_story(self, story):
+        self._add('story', story, project_id=story.get('project_id'))
+
+    def add_comment(self, comment):
+        """Comments are only covered by the word index."""
+
+    def remove_card(self, card_id):
+        self.remove('card', card_id)
+
+    def remove(self, doc_type, doc_id):
+        """Drop one item from the index."""
+        with self._lock:
+            key = doc_key(doc_type, doc_id)
+            self.docs.pop(key, None)
+            text = self.texts.pop(key, None)
+            if text is None:
+                return
+            for gram in trigrams(text):
+                keys = self.grams.get(gram)
+                if keys is not None:
+                    keys.discard(key)
+                    if not keys:
+                        del self.grams[gram]
+            for word in self.doc_words.pop(key, ()):
+                keys = self.word_docs.get(word)
+                if keys is None:
+                    continue
+                keys.discard(key)
+                if not keys:
+                    del self.word_docs[word]
+                    for gram in _word_trigrams(word):
+                        words = self.word_grams.get(gram)
+                        if words is not None:
+                            words.discard(word)
+                            if not words:
+                                del self.word_grams[gram]
+
+    def _add(self, doc_type, item, **extra):
+        key = doc_key(doc_type, item['id'])
+        title = _item_title(item)
+        description = item.get('description', '') or ''
+        text = (title + '\n' + description).lower()
+        words = set(tokenize(text))
+
+        with self._lock:
+            if key in self.docs:
+                self.remove(doc_type, item['id'])
+            self.docs[key] = dict({
+                'type': doc_type,
+                'id': item['id'],
+                'title': title,
+                'description': description[:SNIPPET_LENGTH]
+            }, **extra)
+            self.texts[key] = text
+            for gram in trigrams(text):
+                self.grams.setdefault(gram, set()).add(key)
+            self.doc_words[key] = words
+            for word in words:
+                if word not in self.word_docs:
+                    self.word_docs[word] = set()
+                    for gram in _word_trigrams(word):
+                        self.word_grams.setdefault(gram, set()).add(word)
+                self.word_docs[word].add(key)
+
+    def search_substring(self, query, limit=50, after=None, types=None):
+        """Return up to limit (sort_key, document) pairs whose text contains query.
+
+        Results are ordered by type and id, matching the original linear
+        scan. Queries shorter than a trigram are checked against every
+        item.
+        """
+        query = query.lower().strip()
+        if not query:
+            return []
+
+        with self._lock:
+            query_grams = trigrams(query)
+            if query_grams:
+                posting_sets = sorted((self.grams.get(gram, set()) for gram in query_grams), key=len)
+                candidates = set(posting_sets[0])
+                for keys in posting_sets[1:]:
+                    candidates &= keys
+                    if not candidates:
+                        return []
+            else:
+                candidates = self.texts.keys()
+
+            type_ranks = _type_ranks(types)
+            if type_ranks is not None:
+                candidates = [key for key in candidates if key >> ID_BITS in type_ranks]
+            if after is not None:
+                candidates = [key for key in candidates if key > after[0]]
+
+            # Walk candidates in order and stop once a page has been verified
+            results = []
+            for key in sorted(candidates):
+                if query in self.texts[key]:
+                    results.append(([key], dict(self.docs[key])))
+                    if len(results) == limit:
+                        break
+            return results
+
+    def similar_words(self, word, max_distance=None):
+        """Return {vocabulary word: edit distance} for words close to word."""
+        word = word.lower()
+        if max_distance is None:
+            max_distance = default_max_distance(word)
+
+        with self._lock:
+            if max_distance == 0:
+                return {word: 0} if word in self.word_docs else {}
+
+            word_grams = _word_trigrams(word)
+            overlap = {}
+            for gram in word_grams:
+                for candidate in self.word_grams.get(gram, ()):
+                    overlap[candidate] = overlap.get(candidate, 0) + 1
+
+            min_overlap = len(word_grams) - 4 * max_distance
+            matches = {}
+            for candidate, count in overlap.items():
+                if count < min_overlap:
+                    continue
+                distance = edit_distance(word, candidate, max_distance)
+                if distance <= max_distance:
+                    matches[candidate] = distance
+            return matches
+
+    def search_fuzzy(self, query, limit=50, after=None, types=None, max_distance=None):
+        """Return up to limit (sort_key, document) pairs matching every query word within a typo budget.
+
+        Items are ranked by the total edit distance of their closest
+        words, then by type and id.
+        """
+        words = tokenize(query)
+        if not words:
+            return []
+
+        with self._lock:
+            distances = None
+            for word in set(words):
+                word_distances = {}
+                for match, distance in self.similar_words(word, max_distance).items():
+                    for key in self.word_docs[match]:
+                        if distance < word_distances.get(key, distance + 1):
+                            word_distances[key] = distance
+                if distances is None:
+                    distances = word_distances
+                else:
+                    distances = {key: total + word_distances[key]
+                                 for key, total in distances.items() if key in word_distances}
+                if not distances:
+                    return []
+
+            type_ranks = _type_ranks(types)
+            ranked = (
+                (total, key) for key, total in distances.items()
+                if type_ranks is None or key >> ID_BITS in type_ranks
+            )
+            if after is not None:
+                after = tuple(after)
+                ranked = (sort_key for sort_key in ranked if sort_key > after)
+            top = heapq.nsmallest(limit, ranked)
+            return [(list(sort_key), dict(self.docs[sort_key[1]], distance=sort_key[0])) for sort_key in top]
+
+
+_index = None
+_index_lock = threading.Lock()
+# Updates that arrive while the word index is first built, replayed onto it
+_index_building = False
+_index_pending = []
+_index_pending_lock = threading.Lock()
+
+# The trigram index takes far longer to build than the word index (tens
+# of seconds on a large dataset), so it is built in a background thread
+# under its own lock. Updates that arrive during the build are replayed
+# onto it before it is published.
+_trigram_index = None
+_trigram_lock = threading.Lock()
+_trigram_thread = None
+_trigram_generation = 0
+_trigram_pending = []
+
+
+def get_search_index(data_loader):
+    """Return the shared word index, building it from data_loader() on first use."""
+    global _index, _index_building
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                with _index_pending_lock:
+                    _index_building = True
+                built = None
+                try:
+                    index = SearchIndex()
+                    index.build(data_loader())
+                    built = index
+                finally:
+                    with _index_pending_lock:
+                        if built is not None:
+                            for method, args in _index_pending:
+                                getattr(built, method)(*args)
+                            _index = built
+                        _index_pending.clear()
+                        _index_building = False
+    return _index
+
+
+def _build_trigram_index(data_loader, generation):
+    global _trigram_index, _trigram_thread
+    try:
+        index = TrigramIndex()
+        index.build(data_loader())
+        with _trigram_lock:
+            if generation != _trigram_generation:
+                return
+            for method, args in _trigram_pending:
+                getattr(index, method)(*args)
+            _trigram_index = index
+    except Exception as e:
+        print(f"Error building trigram index: {e}")
+    finally:
+        with _trigram_lock:
+            if generation == _trigram_generation:
+                _trigram_pending.clear()
+                _trigram_thread = None
+
+
+def start_trigram_build(data_loader):
+    """Build the shared trigram index in a background thread unless it exists or is being built.
+
+    Returns the build thread, or None if there is nothing to build.
+    """
+    global _trigram_thread
+    with _trigram_lock:
+        if _trigram_index is not None:
+            return None
+        if _trigram_thread is None:
+            _trigram_thread = threading.Thread(target=_build_trigram_index,
+                                               args=(data_loader, _trigram_generation),
+                                               name='trigram-index', daemon=True)
+            _trigram_thread.start()
+        return _trigram_thread
+
+
+def get_trigram_index(data_loader):
+    """Return the shared trigram index, or None while it is still being built.
+
+    The first call without an index starts the background build.
+    """
+    if _trigram_index is None:
+        start_trigram_build(data_loader)
+    return _trigram_index
+
+
+def reset_search_index():
+    """Discard the shared indexes so they are rebuilt on next use."""
+    global _index, _trigram_index, _trigram_thread, _trigram_generation
+    with _index_lock, _index_pending_lock:
+        _index = None
+    with _trigram_lock:
+        # A build still running belongs to the old data and is dropped
+        _trigram_generation += 1
+        _trigram_index = None
+        _trigram_thread = None
+        _trigram_pending.clear()
+
+
+def _with_index(method, *args):
+    """Apply an incremental update to whichever indexes have been built or are being built."""
+    with _index_pending_lock:
+        index = _index
+        if index is None and _index_building:
+            _index_pending.append((method, args))
+    if index is not None:
+        getattr(index, method)(*args)
+    with _trigram_lock:
+        if _trigram_index is not None:
+            index = _trigram_index
+        else:
+            if _trigram_thread is not None:
+                _trigram_pending.append((method, args))
+            return
+    getattr(index, method)(*args)
+
+
+def index_card(card):
+    _with_index('add_card', card)
+
+
+def index_epic(epic):
+    _with_index('add_epic', epic)
+
+
+def index_story(story):
+    _with_index('add_story', story)
+
+
+def index_comment(comment):
+    _with_index('add_comment', comment)
+
+
+def unindex_card(card_id):
+    _with_index('remove_card', card_id)
@@ -0,0 +1,228 @@
+"""Sprint burndown, burnup and velocity from daily snapshots.
+
+A snapshot records a sprint's scope and remaining work on one day:
+story points of its items and, for sprints whose items carry no
+points, item counts. Snapshots are taken when a sprint starts, by a
+daily job for every active sprint, and when it completes; they live in
+data/sprint_snapshots/<sprint_id>.json locally or in the sprint's
+Firestore 'snapshots' subcollection. Burndown and burnup read the
+snapshots (today's point of an active sprint is computed live) and
+velocity is the completed work of each finished sprint in the project,
+with a rolling average. Results are cached per sprint and recomputed
+only after a write, a new snapshot or a change of day.
+"""
+
+import json
+import os
+import threading
+from datetime import date, datetime, timedelta
+
+from app.services.sprint_item_service import resolve_items
+from app.services.version_service import bump_data_version, get_data_version
+
+
+SNAPSHOT_DIR = os.path.join('data', 'sprint_snapshots')
+
+# Completed sprints averaged for the rolling velocity
+VELOCITY_WINDOW = 3
+
+DONE_STATUSES = ('done', 'completed')
+
+_snapshot_lock = threading.Lock()
+_cache = {}  # sprint id -> (key, analytics)
+_cache_lock = threading.Lock()
+
+
+def _points(obj):
+    try:
+        return max(int(obj.get('story_points') or 0), 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def _parse_date(value):
+    """Date of an ISO date or 'YYYY-MM-DD HH:MM:SS' string, or None."""
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(str(value)[:10])
+    except ValueError:
+        return None
+
+
+def measure(sprint, data):
+    """Scope and remaining work of a sprint's items right now."""
+    snapshot = {'total': 0, 'remaining': 0, 'items': 0, 'items_remaining': 0}
+    for item in resolve_items(sprint.get('items', []), data, ['status', 'story_points']):
+        points = _points(item['data'])
+        done = item['data'].get('status') in DONE_STATUSES
+        snapshot['total'] += points
+        snapshot['items'] += 1
+        if not done:
+            snapshot['remaining'] += points
+            snapshot['items_remaining'] += 1
+    return snapshot
+
+
+def _snapshot_path(sprint_id):
+    return os.path.join(SNAPSHOT_DIR, f'{sprint_id}.json')
+
+
+def load_snapshots(db, sprint_id):
+    """{iso date: snapshot} for a sprint."""
+    if db is not None:
+        docs = db.collection('sprints').document(str(sprint_id)).collection('snapshots').stream()
+        return {doc.id: doc.to_dict() for doc in docs}
+    try:
+        with open(_snapshot_path(sprint_id)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def record_snapshot(db, data, sprint, day=None):
+    """Measure a sprint and store the result as its snapshot for day (default today)."""
+    day = (day or date.today()).isoformat()
+    snapshot = dict(measure(sprint, data), recorded_at=datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+    with _snapshot_lock:
+        if db is not None:
+            db.collection('sprints').document(str(sprint['id'])).collection('snapshots').document(day).set(snapshot)
+        else:
+            snapshots = load_snapshots(db, sprint['id'])
+            snapshots[day] = snapshot
+            os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+            path = _snapshot_path(sprint['id'])
+            with open(path + '.tmp', 'w') as f:
+                json.dump(snapshots, f, separators=(',', ':'))
+            os.replace(path + '.tmp', path)
+    # Shared with the other workers, so their cached burndowns are recomputed too
+    bump_data_version(sprint.get('project_id'))
+    return snapshot
+
+
+def record_active_snapshots(db, data, day=None):
+    """Snapshot every active sprint; returns how many were recorded."""
+    active = [s for s in data.get('sprints', []) if s.get('status') == 'active']
+    for sprint in active:
+        record_snapshot(db, data, sprint, day)
+    return len(active)
+
+
+def _sprint_dates(sprint, today):
+    start = _parse_date(sprint.get('start_date')) or _parse_date(sprint.get('started_at')) or today
+    end = _parse_date(sprint.get('end_date')) or _parse_date(sprint.get('completed_at')) or today
+    return start, max(start, end)
+
+
+def burndown(sprint, snapshots, live, today):
+    """Per-day ideal and actual remaining work plus burnup (completed and scope).
+
+    Days without a snapshot carry the previous one forward; days after
+    today (or after completion) are None. live is measure() of the
+    sprint now and supplies today's point of an active sprint.
+    """
+    start, end = _sprint_dates(sprint, today)
+    use_points = live['total'] > 0 or any(s.get('total') for s in snapshots.values())
+    total_key, remaining_key = ('total', 'remaining') if use_points else ('items', 'items_remaining')
+    last_day = min(end, today)
+    if sprint.get('status') == 'completed':
+        last_day = min(last_day, _parse_date(sprint.get('completed_at')) or last_day)
+
+    first = snapshots.get(start.isoformat()) or (min(snapshots.items())[1] if snapshots else live)
+    baseline = first[total_key]
+    days = (end - start).days + 1
+    series = {'days': [], 'ideal': [], 'remaining': [], 'completed': [], 'scope': []}
+    current = None
+    for i in range(days):
+        day = start + timedelta(days=i)
+        iso = day.isoformat()
+        if iso in snapshots:
+            current = snapshots[iso]
+        elif current is None:
+            # Snapshots from before the sprint's first day (planned start moved)
+            earlier = [s for d, s in sorted(snapshots.items()) if d < iso]
+            current = earlier[-1] if earlier else None
+        if day == today and sprint.get('status') == 'active':
+            current = live
+        series['days'].append(iso)
+        series['ideal'].append(round(baseline * (1 - i / (days - 1)), 2) if days > 1 else 0)
+        if day > last_day or current is None:
+            series['remaining'].append(None)
+            series['completed'].append(None)
+            series['scope'].append(None)
+        else:
+            series['remaining'].append(current[remaining_key])
+            series['completed'].append(current[total_key] - current[remaining_key])
+            series['scope'].append(current[total_key])
+    series['unit'] = 'points' if use_points else 'items'
+    series['start_date'], series['end_date'] = start.isoformat(), end.isoformat()
+    return series
+
+
+def _completed_work(db, sprint, data):
+    """Points (or items) done by the end of a completed sprint."""
+    completed_on = _parse_date(sprint.get('completed_at'))
+    final = None
+    for day, snapshot in sorted(load_snapshots(db, sprint['id']).items()):
+        if completed_on is None or _parse_date(day) <= completed_on:
+            final = snapshot
+    # Sprints completed before snapshots existed are measured as they are now
+    final = final or measure(sprint, data)
+    if final['total'] > 0:
+        return final['total'] - final['remaining'], 'points'
+    return final['items'] - final['items_remaining'], 'items'
+
+
+def velocity(db, data, project_id, window=VELOCITY_WINDOW):
+    """Completed work of each finished sprint in a project, oldest first, with a rolling average."""
+    completed = [s for s in data.get('sprints', [])
+                 if s.get('project_id') == project_id and s.get('status') == 'completed']
+    completed.sort(key=lambda s: (str(s.get('completed_at') or s.get('end_date') or ''), s['id']))
+    sprints = []
+    recent = []
+    for sprint in completed:
+        work, unit = _completed_work(db, sprint, data)
+        recent = (recent + [work])[-window:]
+        sprints.append({
+            'sprint_id': sprint['id'],
+            'name': sprint.get('name', ''),
+            'completed': work,
+            'unit': unit,
+            'committed': _points(sprint),
+            'rolling_average': round(sum(recent) / len(recent), 2)
+        })
+    return {
+        'sprints': sprints,
+        'average': sprints[-1]['rolling_average'] if sprints else 0,
+        'window': window
+    }
+
+
+def analytics_version():
+    """Changes with every write (recording a snapshot is one) and every new day."""
+    return f'{get_data_version()}:{date.today().isoformat()}'
+
+
+def get_sprint_analytics(db, sprint_id, data_loader):
+    """Burndown, burnup and project velocity for a sprint, or None if it does not exist."""
+    key = analytics_version()
+    with _cache_lock:
+        cached = _cache.get(sprint_id)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    data = data_loader()
+    sprint = next((s for s in data.get('sprints', []) if s['id'] == sprint_id), None)
+    if sprint is None:
+        return None
+    today = date.today()
+    live = measure(sprint, data)
+    analytics = {
+        'sprint_id': sprint_id,
+        'status': sprint.get('status'),
+        'current': live,
+        'burndown': burndown(sprint, load_snapshots(db, sprint_id), live, today),
+        'velocity': velocity(db, data, sprint.get('project_id'))
+    }
+    with _cache_lock:
+        _cache[sprint_id] = (key, analytics)
+    return analytics
@@ -0,0 +1,71 @@
+"""Resolve sprint items ({'type', 'id'} references) to their epics, stories and cards.
+
+Items are grouped by type and each type is looked up in one batch:
+cards through the shared card index, epics and stories through an id
+map built in a single pass over that collection, and only for types
+the sprint actually references. Resolving a sprint therefore costs one
+pass per referenced type rather than one scan per item.
+"""
+
+from app.services.card_index_service import get_card_index
+
+
+ITEM_TYPES = ('epic', 'story', 'card')
+
+_COLLECTIONS = {'epic': 'epics', 'story': 'stories'}
+
+
+def _lookup(data, item_type, ids):
+    """{id: object} for the requested ids of one item type."""
+    if item_type == 'card':
+        index = get_card_index(lambda: data)
+        found = {item_id: index.get(item_id) for item_id in ids}
+    else:
+        ids = set(ids)
+        found = {obj['id']: obj for obj in data.get(_COLLECTIONS[item_type], []) if obj.get('id') in ids}
+    return {item_id: obj for item_id, obj in found.items() if obj is not None}
+
+
+def parse_fields(value):
+    """Field projection from a comma separated query arg; None means every field."""
+    if not value:
+        return None
+    fields = [f.strip() for f in value.split(',') if f.strip()]
+    return fields or None
+
+
+def _project(obj, fields):
+    if fields is None:
+        return obj
+    projected = {'id': obj['id']}
+    for field in fields:
+        if field in obj:
+            projected[field] = obj[field]
+    return projected
+
+
+def resolve_items(items, data, fields=None):
+    """[{'type', 'data'}] for the items that still exist, in sprint order.
+
+    fields, if given, limits each item's data to those fields (id is
+    always kept).
+    """
+    ids_by_type = {}
+    for item in items:
+        if item.get('type') in ITEM_TYPES:
+            ids_by_type.setdefault(item['type'], []).append(item.get('id'))
+    found = {item_type: _lookup(data, item_type, ids) for item_type, ids in ids_by_type.items()}
+
+    enriched = []
+    for item in items:
+        obj = found.get(item.get('type'), {}).get(item.get('id'))
+        if obj is not None:
+            enriched.append({'type': item['type'], 'data': _project(obj, fields)})
+    return enriched
+
+
+def find_item(data, item_type, item_id):
+    """The epic, story or card an item would reference, or None."""
+    if item_type not in ITEM_TYPES:
+        return None
+    return _lookup(data, item_type, [item_id]).get(item_id)
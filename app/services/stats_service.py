@@ -0,0 +1,164 @@
+"""Materialized dashboard statistics.
+
+Card status counts (global and per project) and collection sizes are
+computed once from load_data and then adjusted by the write routes, so
+the dashboard and Firebase status pages can report them without
+loading or scanning the whole dataset.
+"""
+
+import threading
+
+
+CARD_STATUSES = ('todo', 'in_progress', 'done')
+COUNTED_COLLECTIONS = ('users', 'projects', 'comments')
+
+
+def _empty_counts():
+    return {'todo': 0, 'in_progress': 0, 'done': 0, 'total': 0}
+
+
+def compute_stats(data):
+    """Compute all statistics from scratch with a single pass over cards."""
+    card_stats = _empty_counts()
+    project_stats = {}
+    for card in data.get('cards', []):
+        counts = project_stats.setdefault(card.get('project_id'), _empty_counts())
+        status = card.get('status')
+        for target in (card_stats, counts):
+            target['total'] += 1
+            if status in CARD_STATUSES:
+                target[status] += 1
+    return {
+        'cards': card_stats,
+        'projects': project_stats,
+        'collections': dict(
+            {name: len(data.get(name, [])) for name in COUNTED_COLLECTIONS},
+            cards=card_stats['total']
+        )
+    }
+
+
+class StatsStore:
+    """Running card counts per status, per project and collection sizes."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.card_states = {}  # card id -> (project_id, status)
+        self.card_stats = _empty_counts()
+        self.project_stats = {}
+        self.collections = {name: 0 for name in COUNTED_COLLECTIONS}
+
+    def build(self, data):
+        """Reset every counter from a full recompute."""
+        stats = compute_stats(data)
+        with self._lock:
+            self.card_states = {c['id']: (c.get('project_id'), c.get('status')) for c in data.get('cards', [])}
+            self.card_stats = stats['cards']
+            self.project_stats = stats['projects']
+            self.collections = {name: stats['collections'][name] for name in COUNTED_COLLECTIONS}
+
+    def _apply(self, state, delta):
+        project_id, status = state
+        counts = self.project_stats.setdefault(project_id, _empty_counts())
+        for target in (self.card_stats, counts):
+            target['total'] += delta
+            if status in CARD_STATUSES:
+                target[status] += delta
+
+    def record_card(self, card):
+        """Count a created card, or move an updated card between statuses/projects."""
+        state = (card.get('project_id'), card.get('status'))
+        with self._lock:
+            previous = self.card_states.get(card['id'])
+            if previous == state:
+                return
+            if previous is not None:
+                self._apply(previous, -1)
+            self._apply(state, 1)
+            self.card_states[card['id']] = state
+
+    def forget_card(self, card_id):
+        """Uncount a deleted card."""
+        with self._lock:
+            previous = self.card_states.pop(card_id, None)
+            if previous is not None:
+                self._apply(previous, -1)
+
+    def adjust(self, collection, delta):
+        """Change the size of a counted collection."""
+        with self._lock:
+            self.collections[collection] = max(0, self.collections.get(collection, 0) + delta)
+
+    def get_card_stats(self, project_id=None):
+        """Status counts for all cards, or for one project."""
+        with self._lock:
+            if project_id is None:
+                return dict(self.card_stats)
+            return dict(self.project_stats.get(project_id) or _empty_counts())
+
+    def get_collection_counts(self):
+        """Sizes of users, projects, cards and comments."""
+        with self._lock:
+            return {
+                'users_count': self.collections['users'],
+                'projects_count': self.collections['projects'],
+                'cards_count': self.card_stats['total'],
+                'comments_count': self.collections['comments']
+            }
+
+    def verify(self, data):
+        """Compare the running counters with a full recompute.
+
+        Returns a list of mismatch descriptions (empty when consistent).
+        """
+        expected = compute_stats(data)
+        mismatches = []
+        with self._lock:
+            if self.card_stats != expected['cards']:
+                mismatches.append(f"cards: stored {self.card_stats}, computed {expected['cards']}")
+            project_ids = set(self.project_stats) | set(expected['projects'])
+            for project_id in project_ids:
+                stored = self.project_stats.get(project_id) or _empty_counts()
+                computed = expected['projects'].get(project_id) or _empty_counts()
+                if stored != computed:
+                    mismatches.append(f"project {project_id}: stored {stored}, computed {computed}")
+            for name in COUNTED_COLLECTIONS:
+                if self.collections[name] != expected['collections'][name]:
+                    mismatches.append(
+                        f"{name}: stored {self.collections[name]}, computed {expected['collections'][name]}"
+                    )
+        return mismatches
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_stats_store(data_loader):
+    """Return the shared stats store, building it from data_loader() on first use."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                store = StatsStore()
+                store.build(data_loader())
+                _store = store
+    return _store
+
+
+def record_card(card):
+    """Update card counts after a create or status/project change."""
+    if _store is not None:
+        _store.record_card(card)
+
+
+def forget_card(card_id):
+    """Update card counts after a delete."""
+    if _store is not None:
+        _store.forget_card(card_id)
+
+
+def adjust_collection(collection, delta):
+    """Update a collection size after items are added or removed."""
+    if _store is not None:
+        _store.adjust(collection, delta)
@@ -0,0 +1,45 @@
+"""Username lookup index for resolving @mentions.
+
+Built from the loaded users the first time it is needed and rebuilt
+after every write that changed users, so resolving the mentions of a comment is one dictionary lookup
+per name instead of a scan of every user per name.
+"""
+
+import threading
+
+from app.services.version_service import get_users_version
+
+
+class UserIndex:
+    """username -> user"""
+
+    def __init__(self, users, version=None):
+        self.by_username = {u['username']: u for u in users if u.get('username')}
+        self.size = len(users)
+        self.version = version
+
+    def resolve(self, usernames):
+        """Users for the names that exist, in the order given."""
+        return [self.by_username[name] for name in usernames if name in self.by_username]
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def _is_current(index, users, version):
+    # The size check also catches a users list loaded before a write that bumped the version
+    return index is not None and index.version == version and index.size == len(users)
+
+
+def get_user_index(users):
+    """Return the shared index, rebuilding it from users if they changed since it was built."""
+    global _index
+    version = get_users_version()
+    index = _index
+    if not _is_current(index, users, version):
+        with _index_lock:
+            index = _index
+            if not _is_current(index, users, version):
+                index = _index = UserIndex(users, version)
+    return index
@@ -0,0 +1,207 @@
+"""Data version counters used to key caches of derived data.
+
+Every save_data call bumps the global version, so anything computed
+from a load_data snapshot can be cached under the version it was
+computed at and reused until the next write. Writes that only touch one
+project also bump that project's version; writes that don't say which
+project they touched bump every project's version. Writes that change
+users also bump the users version, which keys caches built from users
+alone.
+
+The counters are shared by every process working on the same data:
+they live in data/versions.json locally (re-read when another process
+rewrites it) or in the meta/versions Firestore document (re-read at most
+every VERSION_POLL_SECONDS). A write in one worker therefore changes the
+ETags and cache keys of all of them. Each counter set carries an epoch,
+so versions issued after the counters are deleted never repeat old ones.
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+
+from app.utils.file_lock import file_stamp, locked
+
+
+VERSION_POLL_SECONDS = 1.0
+
+# Last-Modified before the first recorded write
+_started_at = time.time()
+
+
+def _project_key(project_id):
+    """Project ids arrive as ints or numeric strings depending on the client; stored as strings."""
+    try:
+        return str(int(project_id))
+    except (TypeError, ValueError):
+        return str(project_id)
+
+
+def _initial_state():
+    return {
+        'epoch': '0',
+        'version': 0,
+        'all_projects': 0,
+        'projects': {},
+        'users': 0,
+        # Wall-clock time of the last bump, globally and per project
+        'modified_at': _started_at,
+        'all_projects_modified_at': _started_at,
+        'projects_modified_at': {}
+    }
+
+
+class LocalVersionStore:
+    """Counters in one JSON file, replaced on every bump under a cross-process lock."""
+
+    def __init__(self, path=os.path.join('data', 'versions.json')):
+        self.path = path
+        self._state = None
+        self._stamp = None
+
+    def _read(self):
+        state = _initial_state()
+        try:
+            with open(self.path) as f:
+                state.update(json.load(f))
+        except (OSError, ValueError):
+            pass
+        return state
+
+    def _write(self, state):
+        with open(self.path + '.tmp', 'w') as f:
+            json.dump(state, f, separators=(',', ':'))
+        os.replace(self.path + '.tmp', self.path)
+        self._state, self._stamp = state, file_stamp(self.path)
+
+    def state(self):
+        stamp = file_stamp(self.path)
+        if stamp is None:
+            # First use: start the counters with a new epoch
+            with locked(self.path + '.lock'):
+                if not os.path.exists(self.path):
+                    self._write(dict(_initial_state(), epoch=uuid.uuid4().hex[:8]))
+                stamp = file_stamp(self.path)
+        if self._state is None or stamp != self._stamp:
+            self._state, self._stamp = self._read(), stamp
+        return self._state
+
+    def bump(self, project_id, users=False):
+        with locked(self.path + '.lock'):
+            state = self._read()
+            if state['epoch'] == '0':
+                state['epoch'] = uuid.uuid4().hex[:8]
+            now = time.time()
+            state['version'] += 1
+            state['modified_at'] = now
+            if project_id is None:
+                state['all_projects'] += 1
+                state['all_projects_modified_at'] = now
+            else:
+                key = _project_key(project_id)
+                state['projects'][key] = state['projects'].get(key, 0) + 1
+                state['projects_modified_at'][key] = now
+            if users:
+                state['users'] += 1
+            self._write(state)
+
+
+class FirestoreVersionStore:
+    """Counters in the meta/versions document, bumped with server-side increments."""
+
+    def __init__(self, db):
+        self.db = db
+        self._state = None
+        self._read_at = 0
+
+    def _ref(self):
+        return self.db.collection('meta').document('versions')
+
+    def state(self):
+        if self._state is None or time.time() - self._read_at >= VERSION_POLL_SECONDS:
+            state = _initial_state()
+            snapshot = self._ref().get()
+            if snapshot.exists:
+                state.update(snapshot.to_dict())
+                # Recreating the document starts a new epoch
+                state['epoch'] = format(int(snapshot.create_time.timestamp() * 1000000), 'x')
+            self._state, self._read_at = state, time.time()
+        return self._state
+
+    def bump(self, project_id, users=False):
+        from firebase_admin import firestore
+
+        now = time.time()
+        update = {'version': firestore.Increment(1), 'modified_at': now}
+        if project_id is None:
+            update.update(all_projects=firestore.Increment(1), all_projects_modified_at=now)
+        else:
+            key = _project_key(project_id)
+            update.update(projects={key: firestore.Increment(1)}, projects_modified_at={key: now})
+        if users:
+            update['users'] = firestore.Increment(1)
+        self._ref().set(update, merge=True)
+        # This process sees its own write on the next read
+        self._state = None
+
+
+_store = None
+_lock = threading.Lock()
+
+
+def init_versions(db):
+    """Use the shared counters of the configured backend."""
+    global _store
+    with _lock:
+        _store = FirestoreVersionStore(db) if db is not None else LocalVersionStore()
+
+
+def _state():
+    global _store
+    with _lock:
+        if _store is None:
+            _store = LocalVersionStore()
+        return _store.state()
+
+
+def get_data_version():
+    """Return the current data version as an opaque string."""
+    state = _state()
+    return f"{state['epoch']}-{state['version']}"
+
+
+def get_project_version(project_id):
+    """Return the current version of one project's data as an opaque string."""
+    state = _state()
+    return f"{state['epoch']}-{state['all_projects']}.{state['projects'].get(_project_key(project_id), 0)}"
+
+
+def get_users_version():
+    """Return the current version of the users as an opaque string."""
+    state = _state()
+    return f"{state['epoch']}-{state['users']}"
+
+
+def get_last_modified(project_id=None):
+    """Return the time (epoch seconds) of the last write, globally or for one project."""
+    state = _state()
+    if project_id is None:
+        return state['modified_at']
+    return max(state['all_projects_modified_at'],
+               state['projects_modified_at'].get(_project_key(project_id), 0))
+
+
+def bump_data_version(project_id=None, users=False):
+    """Mark cached derived data as stale in every process; returns the new global version.
+
+    project_id limits per-project invalidation to that project; None
+    invalidates every project. users marks a write that changed users.
+    """
+    global _store
+    with _lock:
+        if _store is None:
+            _store = LocalVersionStore()
+        _store.bump(project_id, users)
+    return get_data_version()
@@ -0,0 +1,148 @@
+"""gzip/brotli response compression and precompressed static files.
+
+Brotli is used when the optional brotli package is installed (see
+requirements-optional.txt) and the client accepts it; gzip otherwise.
+"""
+
+import gzip
+import mimetypes
+import os
+
+from flask import request, send_from_directory
+from werkzeug.security import safe_join
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+DEFAULT_MIMETYPES = (
+    'text/html', 'text/css', 'text/plain', 'text/javascript',
+    'application/javascript', 'application/json', 'image/svg+xml'
+)
+
+# Suffix of the precompressed sibling file for each encoding
+STATIC_SUFFIXES = {'br': '.br', 'gzip': '.gz'}
+
+
+def accepted_encodings():
+    """Encodings the client accepts that we can produce, best first."""
+    accept = request.accept_encodings
+    encodings = []
+    if brotli is not None and accept['br']:
+        encodings.append('br')
+    if accept['gzip']:
+        encodings.append('gzip')
+    return encodings
+
+
+def compress(body, encoding, level):
+    """Compress a bytes body with the given encoding."""
+    if encoding == 'br':
+        return brotli.compress(body, quality=level)
+    return gzip.compress(body, compresslevel=level)
+
+
+def _should_compress(response, min_size, mimetypes_allowed):
+    if response.direct_passthrough or response.is_streamed:
+        return False
+    if response.status_code < 200 or response.status_code >= 300 or response.status_code == 204:
+        return False
+    if 'Content-Encoding' in response.headers:
+        return False
+    if response.mimetype not in mimetypes_allowed:
+        return False
+    return response.content_length is None or response.content_length >= min_size
+
+
+def init_compression(app):
+    """Compress eligible responses and serve precompressed static files.
+
+    Settings (app.config): COMPRESS_MIN_SIZE (bytes, default 1024),
+    COMPRESS_LEVEL (1-9, default 6), COMPRESS_MIMETYPES.
+    """
+    app.config.setdefault('COMPRESS_MIN_SIZE', 1024)
+    app.config.setdefault('COMPRESS_LEVEL', 6)
+    app.config.setdefault('COMPRESS_MIMETYPES', DEFAULT_MIMETYPES)
+
+    @app.after_request
+    def compress_response(response):
+        min_size = app.config['COMPRESS_MIN_SIZE']
+        if not _should_compress(response, min_size, app.config['COMPRESS_MIMETYPES']):
+            return response
+        encodings = accepted_encodings()
+        response.vary.add('Accept-Encoding')
+        if not encodings:
+            return response
+
+        body = response.get_data()
+        if len(body) < min_size:
+            return response
+        response.set_data(compress(body, encodings[0], app.config['COMPRESS_LEVEL']))
+        response.headers['Content-Encoding'] = encodings[0]
+
+        # The compressed bytes are a different representation of the same data
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
+
+    if app.has_static_folder:
+        app.view_functions['static'] = _precompressed_static_view(app)
+
+
+def _precompressed_static_view(app):
+    """Static view that prefers a .br/.gz sibling written by precompress_static."""
+    def static(filename):
+        for encoding in accepted_encodings():
+            compressed = filename + STATIC_SUFFIXES[encoding]
+            if _is_fresh(app.static_folder, filename, compressed):
+                mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+                response = send_from_directory(app.static_folder, compressed, mimetype=mimetype)
+                response.headers['Content-Encoding'] = encoding
+                response.vary.add('Accept-Encoding')
+                return response
+        response = app.send_static_file(filename)
+        response.vary.add('Accept-Encoding')
+        return response
+    return static
+
+
+def _is_fresh(folder, filename, compressed):
+    """True if the compressed sibling exists and is not older than its source."""
+    source = safe_join(folder, filename)
+    path = safe_join(folder, compressed)
+    if not source or not path or not os.path.isfile(path) or not os.path.isfile(source):
+        return False
+    return os.path.getmtime(path) >= os.path.getmtime(source)
+
+
+def precompress_static(static_folder, level=9, min_size=1024):
+    """Write .gz (and .br when brotli is installed) siblings for text assets.
+
+    Returns a list of (path, original bytes, {encoding: compressed bytes}).
+    """
+    results = []
+    for root, _, files in os.walk(static_folder):
+        for name in files:
+            if name.endswith(tuple(STATIC_SUFFIXES.values())):
+                continue
+            mimetype = mimetypes.guess_type(name)[0]
+            if mimetype not in DEFAULT_MIMETYPES:
+                continue
+            path = os.path.join(root, name)
+            with open(path, 'rb') as f:
+                body = f.read()
+            if len(body) < min_size:
+                continue
+            sizes = {}
+            encodings = ['gzip'] + (['br'] if brotli is not None else [])
+            for encoding in encodings:
+                # Done once at build time, so brotli can use its slowest, densest setting
+                compressed = compress(body, encoding, 11 if encoding == 'br' else level)
+                with open(path + STATIC_SUFFIXES[encoding], 'wb') as f:
+                    f.write(compressed)
+                sizes[encoding] = len(compressed)
+            results.append((path, len(body), sizes))
+    return results
@@ -0,0 +1,57 @@
+"""Cross-process locks and change stamps for files shared by several workers.
+
+Local stores that more than one process writes (the job queue, the data
+version counters, the activity log) serialize writers with an exclusive
+lock on a lock file and notice each other's writes by comparing a file's
+stamp with the one they last read.
+"""
+
+import os
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+def file_stamp(path):
+    """Identifies one version of a file: replacing or appending to it changes the stamp."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+
+def _lock(f, blocking):
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+    else:
+        msvcrt.locking(f.fileno(), msvcrt.LK_LOCK if blocking else msvcrt.LK_NBLCK, 1)
+
+
+def try_lock(path):
+    """An open file holding an exclusive lock on path, or None if another process holds it.
+
+    The lock lasts until the file is closed or the process exits.
+    """
+    f = open(path, 'a+')
+    try:
+        _lock(f, blocking=False)
+    except OSError:
+        f.close()
+        return None
+    return f
+
+
+@contextmanager
+def locked(path):
+    """Hold an exclusive lock on path, waiting for other processes to release it."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'a+') as f:
+        _lock(f, blocking=True)
+        yield
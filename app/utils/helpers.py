@@ -2,40 +2,51 @@
 
 import re
 from datetime import datetime, date
+from functools import lru_cache
 
 
-def get_due_date_text_class(due_date_str):
-    """Get CSS class for due date text based on status."""
-    if not due_date_str:
-        return ''
+@lru_cache(maxsize=4096)
+def _due_date_state(due_date_str, today):
+    """'overdue', 'today', 'soon', 'later' or '' (unparseable); parsed once per date per day."""
     try:
         due_date = datetime.strptime(due_date_str, '%Y-%m-%d').date()
-        today = date.today()
-        if due_date < today:
-            return 'due-date-overdue'
-        elif due_date == today:
-            return 'due-date-today'
-        return 'due-date-upcoming'
-    except:
+    except (TypeError, ValueError):
         return ''
+    if due_date < today:
+        return 'overdue'
+    elif due_date == today:
+        return 'today'
+    elif (due_date - today).days <= 3:
+        return 'soon'
+    return 'later'
 
 
-def get_due_date_status(due_date_str):
-    """Get human-readable due date status."""
+def due_date_state(due_date_str):
+    """Classify a due date relative to today."""
     if not due_date_str:
         return ''
-    try:
-        due_date = datetime.strptime(due_date_str, '%Y-%m-%d').date()
-        today = date.today()
-        if due_date < today:
-            return '(OVERDUE)'
-        elif due_date == today:
-            return '(TODAY)'
-        elif (due_date - today).days <= 3:
-            return '(SOON)'
-        return ''
-    except:
-        return ''
+    return _due_date_state(due_date_str, date.today())
+
+
+_DUE_DATE_TEXT_CLASSES = {'overdue': 'due-date-overdue', 'today': 'due-date-today',
+                          'soon': 'due-date-upcoming', 'later': 'due-date-upcoming'}
+_DUE_DATE_CLASSES = {'overdue': 'card-overdue', 'today': 'card-due-today', 'soon': 'card-due-soon'}
+_DUE_DATE_STATUSES = {'overdue': '(OVERDUE)', 'today': '(TODAY)', 'soon': '(SOON)'}
+
+
+def get_due_date_text_class(due_date_str):
+    """Get CSS class for due date text based on status."""
+    return _DUE_DATE_TEXT_CLASSES.get(due_date_state(due_date_str), '')
+
+
+def get_due_date_class(due_date_str):
+    """Get CSS class for a card based on its due date."""
+    return _DUE_DATE_CLASSES.get(due_date_state(due_date_str), '')
+
+
+def get_due_date_status(due_date_str):
+    """Get human-readable due date status."""
+    return _DUE_DATE_STATUSES.get(due_date_state(due_date_str), '')
 
 
 def get_comment_count(card_id, data_loader=None):
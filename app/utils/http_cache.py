@@ -0,0 +1,95 @@
+"""ETag / Last-Modified helpers for conditional GET on versioned data."""
+
+import hashlib
+import time
+from datetime import datetime, timezone
+from functools import wraps
+
+from flask import request, make_response
+from flask_login import current_user
+
+from app.services.version_service import get_data_version, get_project_version, get_last_modified
+
+
+def make_etag(*parts):
+    """Build an ETag value from version strings and anything else the response varies by."""
+    raw = '|'.join(str(part) for part in parts).encode('utf-8')
+    return hashlib.sha1(raw).hexdigest()[:20]
+
+
+def client_has(etag, last_modified=None):
+    """True when the client's cached copy is current.
+
+    If-None-Match takes precedence; If-Modified-Since is only consulted
+    when the request carries no ETag.
+    """
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    since = request.if_modified_since
+    if since is not None and last_modified is not None:
+        return int(last_modified) <= since.timestamp()
+    return False
+
+
+def not_modified(etag, last_modified=None):
+    """Empty 304 response for a client that is current."""
+    response = make_response('', 304)
+    return with_etag(response, etag, last_modified)
+
+
+def with_etag(response, etag, last_modified=None):
+    """Attach validators and ask clients to revalidate before reusing the response.
+
+    Last-Modified has one-second resolution, so it is only sent once the
+    second of the last write has passed; otherwise a second write in the
+    same second would look unmodified.
+    """
+    response.set_etag(etag)
+    if last_modified is not None and int(time.time()) > int(last_modified):
+        response.last_modified = datetime.fromtimestamp(int(last_modified), timezone.utc)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+def conditional(project_arg=None, per_user=False, version_for=None):
+    """Decorate a GET view to answer 304 when the client already has the current data.
+
+    The ETag combines the data version (or, with project_arg, the version
+    of the project named by that view argument, or whatever version_for()
+    returns for data kept outside the versioned collections), the request
+    path and query string, and the user when per_user is set. The check runs
+    before the view, so a current client costs no load_data and no
+    serialization. Only successful responses get validators.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if version_for is not None:
+                version = version_for()
+                last_modified = None
+            elif project_arg is not None:
+                project_id = kwargs.get(project_arg)
+                version = get_project_version(project_id)
+                last_modified = get_last_modified(project_id)
+            else:
+                version = get_data_version()
+                last_modified = get_last_modified()
+            user = current_user.get_id() if per_user else None
+            etag = make_etag(version, request.full_path, user)
+            if client_has(etag, last_modified):
+                return not_modified(etag, last_modified)
+
+            response = make_response(view(*args, **kwargs))
+            if response.status_code == 200 and _succeeded(response):
+                with_etag(response, etag, last_modified)
+            return response
+        return wrapper
+    return decorator
+
+
+def _succeeded(response):
+    """False for the {'success': False, ...} error payloads the API returns with status 200."""
+    if not response.is_json:
+        return True
+    payload = response.get_json(silent=True)
+    return not (isinstance(payload, dict) and payload.get('success') is False)
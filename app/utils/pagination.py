@@ -0,0 +1,107 @@
+"""Cursor-based pagination helpers for list and search endpoints."""
+
+import base64
+import json
+
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+class InvalidCursor(ValueError):
+    """A cursor that was not produced by encode_cursor for this listing; routes answer 400."""
+
+
+def get_page_args(args, default_limit=DEFAULT_PAGE_SIZE):
+    """Read limit and cursor from request args, clamping the limit."""
+    limit = args.get('limit', default_limit, type=int) or default_limit
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    return limit, args.get('cursor') or None
+
+
+def encode_cursor(position):
+    """Encode a sort position as an opaque, URL-safe cursor string."""
+    raw = json.dumps(position, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Decode a cursor produced by encode_cursor; raise InvalidCursor if invalid."""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        position = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (ValueError, TypeError, UnicodeError):
+        raise InvalidCursor('Invalid cursor')
+    if not isinstance(position, list):
+        raise InvalidCursor('Invalid cursor')
+    return position
+
+
+def default_sort_key(item):
+    """Stable sort key: by id."""
+    return [item.get('id', 0)]
+
+
+def _start_index(sorted_items, position, key, reverse):
+    """Binary search for the first item strictly after position."""
+    lo, hi = 0, len(sorted_items)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        mid_key = key(sorted_items[mid])
+        after = mid_key < position if reverse else mid_key > position
+        if after:
+            hi = mid
+        else:
+            lo = mid + 1
+    return lo
+
+
+def paginate(sorted_items, limit, cursor=None, key=default_sort_key, reverse=False):
+    """Slice one page from a list already sorted by key.
+
+    The cursor stores the key of the last item served, so the next page
+    starts with a binary search instead of a scan and stays stable when
+    items are inserted or removed between requests. Keys must be unique,
+    which is why every key ends with the item id.
+    """
+    position = decode_cursor(cursor)
+    try:
+        start = _start_index(sorted_items, position, key, reverse) if position is not None else 0
+    except TypeError:
+        # Decodes, but its values do not compare with this listing's sort keys
+        raise InvalidCursor('Invalid cursor')
+    page = sorted_items[start:start + limit]
+    next_cursor = None
+    if start + limit < len(sorted_items) and page:
+        next_cursor = encode_cursor(key(page[-1]))
+    return page, next_cursor
+
+
+def sort_and_paginate(items, limit, cursor=None, key=default_sort_key, reverse=False):
+    """Sort items by key and return one page plus the next cursor."""
+    return paginate(sorted(items, key=key, reverse=reverse), limit, cursor, key, reverse)
+
+
+def paginate_query(collection_ref, limit, cursor=None, query=None):
+    """Page through a Firestore collection ordered by document id.
+
+    Uses Firestore query cursors (start_after) so only one page of
+    documents is read. Returns (snapshots, next_cursor).
+    """
+    from firebase_admin import firestore
+
+    query = query if query is not None else collection_ref
+    query = query.order_by(firestore.FieldPath.document_id())
+    position = decode_cursor(cursor)
+    if position:
+        last_snapshot = collection_ref.document(str(position[0])).get()
+        if last_snapshot.exists:
+            query = query.start_after(last_snapshot)
+    snapshots = list(query.limit(limit + 1).stream())
+    next_cursor = None
+    if len(snapshots) > limit:
+        snapshots = snapshots[:limit]
+        next_cursor = encode_cursor([snapshots[-1].id])
+    return snapshots, next_cursor
@@ -0,0 +1,53 @@
+"""Server-Sent Events response helpers."""
+
+import json
+
+from flask import Response
+
+
+KEEPALIVE_SECONDS = 15
+RETRY_MS = 3000
+
+
+def format_event(event_type, data, event_id=None):
+    """Encode one SSE message."""
+    lines = []
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    lines.append(f'event: {event_type}')
+    lines.append(f'data: {json.dumps(data, separators=(",", ":"))}')
+    return '\n'.join(lines) + '\n\n'
+
+
+def stream_subscription(subscription, initial_events=(), on_event=None):
+    """Generate SSE text for a Subscription until the client goes away.
+
+    initial_events are (type, data) pairs sent first. on_event may map
+    each bus event to a list of (type, data) pairs to send instead of
+    the event itself. Sends a comment line while idle so proxies keep
+    the connection open, and ends if the subscriber was dropped for
+    falling behind (the browser then reconnects).
+    """
+    try:
+        yield f'retry: {RETRY_MS}\n\n'
+        for event_type, data in initial_events:
+            yield format_event(event_type, data)
+        while not subscription.overflowed:
+            event = subscription.get(timeout=KEEPALIVE_SECONDS)
+            if event is None:
+                yield ': keepalive\n\n'
+                continue
+            event_id, event_type, data = event
+            messages = on_event(event_type, data) if on_event else [(event_type, data)]
+            for message_type, message_data in messages:
+                yield format_event(message_type, message_data, event_id)
+    finally:
+        subscription.close()
+
+
+def sse_response(generator):
+    """Streaming text/event-stream response that proxies should not buffer."""
+    response = Response(generator, mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,124 @@
+"""Content-fingerprinted static URLs with long-lived cache headers.
+
+url_for('static', filename='js/sprints.js') builds js/sprints.<hash>.js,
+where the hash is taken from the file contents. Requests for a
+fingerprinted name are served from a copy written by
+scripts/build_static.py when one exists, otherwise from the source
+file, and are marked immutable when the hash matches the current
+contents. A new deploy changes the URL, so browsers never revalidate
+an unchanged asset and never reuse a changed one.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+
+
+HASH_LENGTH = 10
+MANIFEST_NAME = 'manifest.json'
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+_FINGERPRINT_RE = re.compile(r'^(?P<stem>.+)\.(?P<digest>[0-9a-f]{%d})(?P<ext>\.[^./]+)$' % HASH_LENGTH)
+
+
+def file_digest(path):
+    """Short content hash of a file."""
+    digest = hashlib.md5()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(65536), b''):
+            digest.update(chunk)
+    return digest.hexdigest()[:HASH_LENGTH]
+
+
+def fingerprinted_name(filename, digest):
+    """'js/app.js' -> 'js/app.<digest>.js'"""
+    stem, ext = os.path.splitext(filename)
+    return f'{stem}.{digest}{ext}'
+
+
+def split_fingerprint(filename):
+    """Return (source filename, digest), or (filename, None) if not fingerprinted."""
+    match = _FINGERPRINT_RE.match(filename)
+    if not match:
+        return filename, None
+    return match.group('stem') + match.group('ext'), match.group('digest')
+
+
+class AssetFingerprints:
+    """Maps static filenames to fingerprinted names.
+
+    Uses the manifest written by scripts/build_static.py when present;
+    otherwise hashes files on demand and rehashes when their mtime
+    changes, so edits during development get new URLs.
+    """
+
+    def __init__(self, static_folder):
+        self.static_folder = static_folder
+        self._lock = threading.Lock()
+        self._hashed = {}  # filename -> (mtime, digest)
+        self.manifest = self._load_manifest()
+
+    def _load_manifest(self):
+        path = os.path.join(self.static_folder, MANIFEST_NAME)
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def digest(self, filename):
+        """Current content hash of a static file, or None if it does not exist."""
+        if filename in self.manifest:
+            return split_fingerprint(self.manifest[filename])[1]
+        path = os.path.join(self.static_folder, filename)
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            return None
+        with self._lock:
+            cached = self._hashed.get(filename)
+            if cached and cached[0] == mtime:
+                return cached[1]
+        digest = file_digest(path)
+        with self._lock:
+            self._hashed[filename] = (mtime, digest)
+        return digest
+
+    def url_name(self, filename):
+        """Fingerprinted filename to put in URLs (unchanged if the file is missing)."""
+        if filename in self.manifest:
+            return self.manifest[filename]
+        digest = self.digest(filename)
+        return fingerprinted_name(filename, digest) if digest else filename
+
+
+def init_static_assets(app):
+    """Fingerprint static URLs and serve fingerprinted requests as immutable."""
+    if not app.has_static_folder:
+        return
+    fingerprints = AssetFingerprints(app.static_folder)
+    app.extensions['asset_fingerprints'] = fingerprints
+    serve = app.view_functions['static']
+
+    @app.url_defaults
+    def fingerprint_static_url(endpoint, values):
+        if endpoint == 'static' and 'filename' in values:
+            values['filename'] = fingerprints.url_name(values['filename'])
+
+    def static(filename):
+        source, digest = split_fingerprint(filename)
+        # Flask's own static view only takes keyword arguments
+        if digest is None:
+            return serve(filename=filename)
+        built_copy = os.path.join(app.static_folder, filename)
+        response = serve(filename=filename if os.path.isfile(built_copy) else source)
+        if digest == fingerprints.digest(source):
+            response.cache_control.public = True
+            response.cache_control.max_age = IMMUTABLE_MAX_AGE
+            response.cache_control.immutable = True
+            response.cache_control.no_cache = None
+        return response
+
+    app.view_functions['static'] = static
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Measure response sizes per route with and without compression.
+
+Logs in as user 1 against the configured data source and requests each
+route with Accept-Encoding identity, gzip and (if installed) br.
+
+Usage: python scripts/benchmark_compression.py
+"""
+
+import sys
+import os
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app
+from app.utils.compression import brotli
+
+
+ROUTES = [
+    '/dashboard',
+    '/issues',
+    '/backlog',
+    '/gantt',
+    '/sprints',
+    '/mindmap',
+    '/api/projects/1/hierarchy',
+    '/api/search?q=a&mode=substring&limit=200',
+    '/api/issues?limit=200',
+    '/api/activity_feed',
+    '/static/js/sprints.js',
+    '/static/css/sprints.css',
+]
+
+
+def fetch(client, url, encoding):
+    """Return (status, body bytes, milliseconds) for one request."""
+    start = time.perf_counter()
+    response = client.get(url, headers={'Accept-Encoding': encoding})
+    body = response.get_data()
+    elapsed = (time.perf_counter() - start) * 1000
+    response.close()
+    return response.status_code, len(body), elapsed
+
+
+def main():
+    app = create_app()
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = '1'
+        session['_fresh'] = True
+
+    encodings = ['identity', 'gzip'] + (['br'] if brotli is not None else [])
+    print(f"{'route':<44} {'status':>6} " + ' '.join(f"{e:>10}" for e in encodings) + f" {'saved':>7}")
+    print("-" * (60 + 11 * len(encodings)))
+    total_raw, total_best = 0, 0
+    for url in ROUTES:
+        sizes = []
+        status = None
+        for encoding in encodings:
+            status, size, _ = fetch(client, url, encoding)
+            sizes.append(size)
+        best = min(sizes)
+        total_raw += sizes[0]
+        total_best += best
+        saved = (1 - best / sizes[0]) * 100 if sizes[0] else 0
+        print(f"{url:<44} {status:>6} " + ' '.join(f"{s:>10}" for s in sizes) + f" {saved:6.1f}%")
+    print("-" * (60 + 11 * len(encodings)))
+    saved = (1 - total_best / total_raw) * 100 if total_raw else 0
+    print(f"Total: {total_raw} B uncompressed, {total_best} B best encoding ({saved:.1f}% saved)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Benchmark /api/search strategies against the original linear scan.
+
+Usage: python scripts/benchmark_search.py [item_count]
+"""
+
+import sys
+import os
+import random
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.search_service import SearchIndex, TrigramIndex
+
+
+WORDS = [
+    'login', 'signup', 'database', 'firebase', 'sprint', 'kanban', 'board', 'user',
+    'report', 'export', 'bug', 'crash', 'fix', 'feature', 'notification', 'comment',
+    'gantt', 'mindmap', 'dashboard', 'archive', 'backlog', 'story', 'epic', 'email',
+    'timeout', 'permission', 'render', 'template', 'upload', 'search'
+]
+
+QUERIES = [
+    ('word', 'login'),
+    ('word', 'notif'),
+    ('word', 'sprint board'),
+    ('word', 'timeout upload'),
+    ('substring', 'base'),
+    ('substring', 'PM-1234'),
+    ('substring', 'ification'),
+    ('fuzzy', 'notifcation'),
+    ('fuzzy', 'dashbord export'),
+    ('fuzzy', 'permision'),
+]
+
+
+def make_dataset(count):
+    """Generate cards, epics and stories with identifier-like and natural words.
+
+    Word frequencies follow a Zipf curve over a few thousand words, so
+    common domain words appear in many items and rare words in few.
+    """
+    rng = random.Random(42)
+    vocabulary = WORDS + [''.join(rng.choice('abcdefghijklmnopqrstuvwxyz') for _ in range(rng.randint(4, 10)))
+                          for _ in range(5000)]
+    weights = [1.0 / rank for rank in range(1, len(vocabulary) + 1)]
+
+    def text(n):
+        return ' '.join(rng.choices(vocabulary, weights, k=n))
+
+    cards = [{'id': i, 'title': f'PM-{i} {text(4)}', 'description': text(20), 'project_id': i % 20}
+             for i in range(1, count + 1)]
+    epics = [{'id': i, 'name': text(3), 'description': text(10), 'project_id': i % 20}
+             for i in range(1, count // 100 + 1)]
+    stories = [{'id': i, 'name': text(3), 'description': text(10), 'project_id': i % 20}
+               for i in range(1, count // 10 + 1)]
+    return {'cards': cards, 'epics': epics, 'stories': stories, 'comments': []}
+
+
+def linear_scan(data, query):
+    """The original /api/search implementation: lowercase and scan every item."""
+    query = query.lower()
+    results = []
+    for card in data['cards']:
+        if query in card.get('title', '').lower() or query in card.get('description', '').lower():
+            results.append(('card', card['id']))
+    for collection, doc_type in (('epics', 'epic'), ('stories', 'story')):
+        for item in data[collection]:
+            if query in item.get('name', '').lower() or query in item.get('description', '').lower():
+                results.append((doc_type, item['id']))
+    return results
+
+
+def timed(fn, repeat=5):
+    """Return (best milliseconds, result) over repeat runs."""
+    best, result = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    data = make_dataset(count)
+    total = len(data['cards']) + len(data['epics']) + len(data['stories'])
+    print(f"Search benchmark: {total} items")
+    print("=" * 72)
+
+    build_ms, word_index = timed(lambda: _built(SearchIndex(), data), repeat=1)
+    print(f"Word index build:    {build_ms:9.1f} ms")
+    build_ms, trigram_index = timed(lambda: _built(TrigramIndex(), data), repeat=1)
+    print(f"Trigram index build: {build_ms:9.1f} ms")
+    print("-" * 72)
+    print(f"{'mode':<10} {'query':<18} {'linear ms':>10} {'index ms':>10} {'speedup':>9} {'hits':>6}")
+
+    for mode, query in QUERIES:
+        linear_ms, linear_hits = timed(lambda: linear_scan(data, query))
+        if mode == 'word':
+            index_ms, hits = timed(lambda: word_index.search(query, limit=50))
+        elif mode == 'substring':
+            index_ms, hits = timed(lambda: trigram_index.search_substring(query, limit=50))
+        else:
+            index_ms, hits = timed(lambda: trigram_index.search_fuzzy(query, limit=50))
+        speedup = linear_ms / index_ms if index_ms else float('inf')
+        print(f"{mode:<10} {query:<18} {linear_ms:10.2f} {index_ms:10.2f} {speedup:8.1f}x "
+              f"{len(hits):>6}")
+
+    print("-" * 72)
+    print("Linear hits are unpaged; index results are capped at 50 per page.")
+
+
+def _built(index, data):
+    index.build(data)
+    return index
+
+
+if __name__ == '__main__':
+    main()
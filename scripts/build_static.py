@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Build fingerprinted copies of static assets and a manifest for the app.
+
+For every CSS/JS file under static/, writes <name>.<hash>.<ext> (the
+hash is of the written contents), records it in static/manifest.json,
+removes copies from earlier builds and precompresses the results.
+With --minify, CSS and JS are minified first if the optional rcssmin /
+rjsmin packages are installed (pip install -r requirements-optional.txt).
+
+Usage: python scripts/build_static.py [--minify]
+"""
+
+import sys
+import os
+import json
+import hashlib
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.compression import precompress_static, STATIC_SUFFIXES
+from app.utils.static_assets import (
+    MANIFEST_NAME, HASH_LENGTH, fingerprinted_name, split_fingerprint
+)
+
+
+ASSET_EXTENSIONS = ('.css', '.js')
+
+
+def load_minifiers():
+    """Return {extension: minify function} for the minifiers that are installed."""
+    minifiers = {}
+    try:
+        import rcssmin
+        minifiers['.css'] = rcssmin.cssmin
+    except ImportError:
+        print("rcssmin not installed; CSS will not be minified")
+    try:
+        import rjsmin
+        minifiers['.js'] = rjsmin.jsmin
+    except ImportError:
+        print("rjsmin not installed; JS will not be minified")
+    return minifiers
+
+
+def source_assets(static_folder):
+    """Relative paths of source CSS/JS files (skipping built copies)."""
+    for root, _, files in os.walk(static_folder):
+        for name in files:
+            if name.endswith(tuple(STATIC_SUFFIXES.values())):
+                continue
+            relative = os.path.relpath(os.path.join(root, name), static_folder).replace(os.sep, '/')
+            if os.path.splitext(name)[1] in ASSET_EXTENSIONS and split_fingerprint(relative)[1] is None:
+                yield relative
+
+
+def remove_stale_builds(static_folder, keep):
+    """Delete fingerprinted copies (and their .gz/.br) not in the new manifest."""
+    for root, _, files in os.walk(static_folder):
+        for name in files:
+            relative = os.path.relpath(os.path.join(root, name), static_folder).replace(os.sep, '/')
+            for suffix in STATIC_SUFFIXES.values():
+                if relative.endswith(suffix):
+                    relative = relative[:-len(suffix)]
+            if split_fingerprint(relative)[1] is not None and relative not in keep:
+                os.remove(os.path.join(root, name))
+
+
+def build(static_folder, minifiers):
+    """Write fingerprinted copies and the manifest; returns the manifest."""
+    manifest = {}
+    for filename in sorted(source_assets(static_folder)):
+        with open(os.path.join(static_folder, filename), 'rb') as f:
+            body = f.read()
+        minify = minifiers.get(os.path.splitext(filename)[1])
+        if minify:
+            body = minify(body.decode('utf-8')).encode('utf-8')
+        digest = hashlib.md5(body).hexdigest()[:HASH_LENGTH]
+        built = fingerprinted_name(filename, digest)
+        with open(os.path.join(static_folder, built), 'wb') as f:
+            f.write(body)
+        manifest[filename] = built
+        print(f"{filename:<32} -> {built} ({len(body)} B)")
+
+    remove_stale_builds(static_folder, set(manifest.values()))
+    with open(os.path.join(static_folder, MANIFEST_NAME), 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    results = precompress_static(static_folder)
+    print(f"Built {len(manifest)} assets, precompressed {len(results)} files")
+    return manifest
+
+
+def main():
+    static_folder = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'static')
+    build(static_folder, load_minifiers() if '--minify' in sys.argv else {})
+
+
+if __name__ == '__main__':
+    main()
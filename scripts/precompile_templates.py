@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Compile every template into the Jinja bytecode cache (e.g. at image
+build time), or measure first-request latency with and without it.
+
+Usage:
+    python scripts/precompile_templates.py              # fill the cache
+    python scripts/precompile_templates.py --benchmark  # compare cold vs warm workers
+"""
+
+import sys
+import os
+import json
+import shutil
+import subprocess
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+ROUTES = ['/dashboard', '/issues', '/backlog', '/gantt', '/sprints', '/mindmap', '/board/1']
+
+
+def precompile():
+    from app import create_app
+    from app.utils.template_cache import precompile_templates
+
+    app = create_app()
+    timings = precompile_templates(app)
+    for name, ms in timings:
+        print(f"{name:<36} {ms:8.1f} ms")
+    print(f"Compiled {len(timings)} templates in {sum(ms for _, ms in timings):.1f} ms")
+
+
+def measure():
+    """Run in a fresh process: print first-request latency per route as JSON."""
+    from app import create_app
+
+    start = time.perf_counter()
+    app = create_app()
+    startup_ms = (time.perf_counter() - start) * 1000
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = '1'
+        session['_fresh'] = True
+    latencies = {}
+    for url in ROUTES:
+        start = time.perf_counter()
+        client.get(url)
+        latencies[url] = (time.perf_counter() - start) * 1000
+    print(json.dumps({'startup': startup_ms, 'routes': latencies}))
+
+
+def run_worker(cache_dir, precompile_at_startup=False):
+    env = dict(os.environ, JINJA_CACHE_DIR=cache_dir)
+    if precompile_at_startup:
+        env['PRECOMPILE_TEMPLATES'] = '1'
+    output = subprocess.run([sys.executable, os.path.abspath(__file__), '--measure'],
+                            env=env, capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def benchmark():
+    cache_dir = tempfile.mkdtemp(prefix='jinja-cache-')
+    try:
+        cold = run_worker(cache_dir)
+        warm = run_worker(cache_dir)
+        shutil.rmtree(cache_dir)
+        eager = run_worker(tempfile.mkdtemp(prefix='jinja-cache-'), precompile_at_startup=True)
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    print("First-request latency in a fresh worker (ms)")
+    print("=" * 66)
+    print(f"{'route':<16} {'cold cache':>14} {'warm bytecode':>14} {'precompiled':>14}")
+    for url in ROUTES:
+        print(f"{url:<16} {cold['routes'][url]:14.1f} {warm['routes'][url]:14.1f} {eager['routes'][url]:14.1f}")
+    print("-" * 66)
+    print(f"{'startup':<16} {cold['startup']:14.1f} {warm['startup']:14.1f} {eager['startup']:14.1f}")
+    print(f"{'total':<16} {sum(cold['routes'].values()):14.1f} {sum(warm['routes'].values()):14.1f} "
+          f"{sum(eager['routes'].values()):14.1f}")
+
+
+if __name__ == '__main__':
+    if '--measure' in sys.argv:
+        measure()
+    elif '--benchmark' in sys.argv:
+        benchmark()
+    else:
+        precompile()
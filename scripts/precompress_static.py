@@ -0,0 +1,26 @@
+#!/usr/bin/env python3
+"""
+Write .gz (and .br, if brotli is installed) copies of static text assets
+so they are served compressed without per-request compression work.
+
+Usage: python scripts/precompress_static.py
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.compression import precompress_static
+
+
+def main():
+    static_folder = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'static')
+    results = precompress_static(static_folder)
+    for path, size, sizes in results:
+        saved = ', '.join(f"{encoding} {compressed} B" for encoding, compressed in sizes.items())
+        print(f"{os.path.relpath(path, static_folder):<32} {size:>8} B -> {saved}")
+    print(f"Precompressed {len(results)} files")
+
+
+if __name__ == '__main__':
+    main()
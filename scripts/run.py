@@ -1,14 +1,13 @@
-from app import app
 import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app
+
+app = create_app()
 
 if __name__ == '__main__':
-    # Skip notification service on Windows to avoid threading issues
-    if os.name != 'nt':  # Only run on non-Windows systems
-        try:
-            with app.app_context():
-                from app_modules.services.notification_service import schedule_daily_notifications
-                schedule_daily_notifications()
-        except Exception as e:
-            print(f"Warning: Could not start notification service: {e}")
-    
-    app.run(debug=True, host='127.0.0.1', port=5000)
\ No newline at end of file
+    # The debugger runs code for anyone who can reach the server: only with FLASK_DEBUG=1, on your machine
+    app.run(debug=os.environ.get('FLASK_DEBUG') == '1',
+            host=os.environ.get('HOST', '127.0.0.1'), port=int(os.environ.get('PORT', 5000)))
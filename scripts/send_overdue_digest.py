@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+Send the overdue card digest now, without waiting for the daily job.
+
+Usage:
+    python scripts/send_overdue_digest.py [--date YYYY-MM-DD]
+
+Uses the MAIL_* environment variables; to try it without a real mail
+server run a local stub first (pip install aiosmtpd):
+    python -m aiosmtpd -n -l localhost:1025
+    MAIL_PORT=1025 python scripts/send_overdue_digest.py
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app
+from app.services.job_handlers import overdue_digest
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Send the overdue card digest now')
+    parser.add_argument('--date', help='treat this day (YYYY-MM-DD) as today')
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        overdue_digest({'date': args.date} if args.date else {})
+
+
+if __name__ == '__main__':
+    main()
@@ -16,7 +16,9 @@ class GanttAnalytics {
     async loadData() {
         try {
             const response = await fetch('/api/analytics/data');
-            this.data = await response.json();
+            const data = await response.json();
+            if (!data.success) throw new Error(data.error);
+            this.data = data;
         } catch (error) {
             console.error('Error loading analytics data:', error);
             // Fallback to mock data for demo
@@ -175,7 +177,7 @@ class GanttAnalytics {
         const projects = this.data.projects || [];
         
         // Calculate estimated completion
-        const avgProgress = projects.reduce((sum, p) => sum + p.progress, 0) / projects.length;
+        const avgProgress = projects.length ? projects.reduce((sum, p) => sum + p.progress, 0) / projects.length : 100;
         const estimatedDays = Math.ceil((100 - avgProgress) * 2); // Simple calculation
         const estimatedDate = new Date();
         estimatedDate.setDate(estimatedDate.getDate() + estimatedDays);
@@ -183,18 +185,20 @@ class GanttAnalytics {
         document.getElementById('estimated-completion').textContent = 
             estimatedDate.toLocaleDateString();
         
-        // Calculate budget variance
-        const totalBudget = projects.reduce((sum, p) => sum + p.budget, 0);
-        const totalSpent = projects.reduce((sum, p) => sum + p.spent, 0);
-        const variance = ((totalSpent - totalBudget) / totalBudget * 100).toFixed(1);
+        // Calculate budget variance (projects without a budget are left out)
+        const budgeted = projects.filter(p => p.budget);
+        const totalBudget = budgeted.reduce((sum, p) => sum + p.budget, 0);
+        const totalSpent = budgeted.reduce((sum, p) => sum + (p.spent || 0), 0);
+        const variance = totalBudget ? ((totalSpent - totalBudget) / totalBudget * 100).toFixed(1) : 0;
         
-        document.getElementById('budget-variance').textContent = `${variance}%`;
+        document.getElementById('budget-variance').textContent = totalBudget ? `${variance}%` : 'n/a';
         document.getElementById('budget-variance').className = 
             `h4 ${variance > 0 ? 'text-danger' : 'text-success'}`;
         
         // Calculate risk score
-        const overdueTasks = this.data.tasks?.filter(t => t.status === 'overdue').length || 0;
-        const totalTasks = this.data.tasks?.length || 1;
+        const summary = this.data.summary;
+        const overdueTasks = summary ? summary.overdue : (this.data.tasks?.filter(t => t.status === 'overdue').length || 0);
+        const totalTasks = (summary ? summary.cards : this.data.tasks?.length) || 1;
         const riskScore = Math.min(100, (overdueTasks / totalTasks * 100 + Math.abs(variance))).toFixed(0);
         
         document.getElementById('risk-score').textContent = `${riskScore}/100`;
@@ -206,14 +210,27 @@ class GanttAnalytics {
 // Report generation functions
 async function generateReport() {
     const reportType = document.getElementById('reportType').value;
+    const modal = new bootstrap.Modal(document.getElementById('reportModal'));
     
     try {
-        const response = await fetch(`/api/analytics/report/${reportType}`);
-        const reportData = await response.json();
+        let response = await fetch(`/api/analytics/report/${reportType}`);
+        let reportData = await response.json();
         
-        document.getElementById('reportContent').innerHTML = formatReport(reportData, reportType);
+        if (response.status === 202) {
+            // Built in the background; follow its progress, then fetch the cached report
+            document.getElementById('reportContent').innerHTML = formatReportProgress(reportData);
+            modal.show();
+            await waitForReport(reportData.stream_url);
+            response = await fetch(`/api/analytics/report/${reportType}`);
+            reportData = await response.json();
+        }
+        if (!reportData.success) {
+            throw new Error(reportData.error);
+        }
         
-        const modal = new bootstrap.Modal(document.getElementById('reportModal'));
+        document.getElementById('reportContent').innerHTML = formatReport(reportData, reportType) + `
+            <p class="mt-3"><a href="/api/analytics/report/${reportType}?format=csv">Download CSV</a></p>
+        `;
         modal.show();
     } catch (error) {
         console.error('Error generating report:', error);
@@ -221,6 +238,34 @@ async function generateReport() {
     }
 }
 
+function waitForReport(streamUrl) {
+    return new Promise((resolve, reject) => {
+        const source = new EventSource(streamUrl);
+        source.addEventListener('progress', event => {
+            const content = document.getElementById('reportContent');
+            content.innerHTML = formatReportProgress(JSON.parse(event.data));
+        });
+        source.addEventListener('done', () => {
+            source.close();
+            resolve();
+        });
+        source.addEventListener('failed', event => {
+            source.close();
+            reject(new Error(JSON.parse(event.data).error || 'Report generation failed'));
+        });
+    });
+}
+
+function formatReportProgress(status) {
+    const progress = status.progress || 0;
+    return `
+        <p>${status.message || 'Queued'}…</p>
+        <div class="progress">
+            <div class="progress-bar" role="progressbar" style="width: ${progress}%">${progress}%</div>
+        </div>
+    `;
+}
+
 function formatReport(data, type) {
     switch (type) {
         case 'project-health':
@@ -256,7 +301,7 @@ function formatProjectHealthReport(data) {
                             <td>${p.name}</td>
                             <td><span class="badge bg-${getStatusColor(p.status)}">${p.status}</span></td>
                             <td>${p.progress}%</td>
-                            <td>${((p.spent / p.budget) * 100).toFixed(1)}%</td>
+                            <td>${p.budget ? ((p.spent / p.budget) * 100).toFixed(1) + '%' : 'n/a'}</td>
                         </tr>
                     `).join('') || '<tr><td colspan="4">No data available</td></tr>'}
                 </tbody>
@@ -284,7 +329,7 @@ function formatResourceUtilizationReport(data) {
                         <tr>
                             <td>${r.name}</td>
                             <td>${r.utilization}%</td>
-                            <td>${r.capacity}h</td>
+                            <td>${r.capacity}${data.summary ? ' open cards' : 'h'}</td>
                             <td><span class="badge bg-${getUtilizationColor(r.utilization)}">${getUtilizationStatus(r.utilization)}</span></td>
                         </tr>
                     `).join('') || '<tr><td colspan="4">No data available</td></tr>'}
@@ -297,36 +342,55 @@ function formatResourceUtilizationReport(data) {
 function formatPerformanceMetricsReport(data) {
     return `
         <h4>Performance Metrics Report</h4>
-        <p><strong>Generated:</strong> ${new Date().toLocaleString()}</p>
+        <p><strong>Generated:</strong> ${data.generated_at || new Date().toLocaleString()}</p>
         <div class="row">
-            <div class="col-md-4">
+            <div class="col-md-6">
                 <h6>Average Velocity</h6>
-                <p class="h4">32 points/sprint</p>
+                <p class="h4">${data.average_velocity ?? 0} per sprint</p>
             </div>
-            <div class="col-md-4">
-                <h6>Quality Score</h6>
-                <p class="h4">89%</p>
-            </div>
-            <div class="col-md-4">
-                <h6>Team Satisfaction</h6>
-                <p class="h4">91%</p>
+            <div class="col-md-6">
+                <h6>Completion Rate</h6>
+                <p class="h4">${data.completion_rate ?? 0}%</p>
             </div>
         </div>
+        <div class="table-responsive">
+            <table class="table table-striped">
+                <thead>
+                    <tr>
+                        <th>Project</th>
+                        <th>Progress</th>
+                        <th>Completed Sprints</th>
+                        <th>Average Velocity</th>
+                    </tr>
+                </thead>
+                <tbody>
+                    ${data.projects?.map(p => `
+                        <tr>
+                            <td>${p.name}</td>
+                            <td>${p.progress}%</td>
+                            <td>${p.completed_sprints}</td>
+                            <td>${p.average_velocity} ${p.unit}</td>
+                        </tr>
+                    `).join('') || '<tr><td colspan="4">No data available</td></tr>'}
+                </tbody>
+            </table>
+        </div>
     `;
 }
 
 function formatRiskAssessmentReport(data) {
+    const risks = data.risks || [];
     return `
         <h4>Risk Assessment Report</h4>
-        <p><strong>Generated:</strong> ${new Date().toLocaleString()}</p>
+        <p><strong>Generated:</strong> ${data.generated_at || new Date().toLocaleString()}</p>
+        ${risks.length ? `
         <div class="alert alert-warning">
-            <h6>High Risk Items:</h6>
+            <h6>Risk Items:</h6>
             <ul>
-                <li>Project Beta is 2 weeks behind schedule</li>
-                <li>Resource Bob is over-utilized at 95%</li>
-                <li>Budget variance of +12% across all projects</li>
+                ${risks.map(r => `<li><strong>${r.name}</strong> (${r.kind}, ${r.severity}): ${r.reason}</li>`).join('')}
             </ul>
         </div>
+        ` : '<div class="alert alert-success">No risks found.</div>'}
     `;
 }
 
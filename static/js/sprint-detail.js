@@ -94,32 +94,27 @@ function initializeBurndownChart() {
     const ctx = document.getElementById('burndownChart');
     if (!ctx) return;
     
-    // Sample burndown data - in real implementation, this would come from the server
-    const days = [];
-    const idealBurndown = [];
-    const actualBurndown = [];
-    
-    const startDate = new Date(sprintData.start_date);
-    const endDate = new Date(sprintData.end_date);
-    const totalDays = Math.ceil((endDate - startDate) / (1000 * 60 * 60 * 24)) + 1;
-    const totalStoryPoints = sprintData.story_points || 50; // Default for demo
-    
-    for (let i = 0; i < totalDays; i++) {
-        const currentDate = new Date(startDate);
-        currentDate.setDate(startDate.getDate() + i);
-        days.push(currentDate.toLocaleDateString());
-        
-        // Ideal burndown (linear)
-        idealBurndown.push(totalStoryPoints - (totalStoryPoints / (totalDays - 1)) * i);
-        
-        // Actual burndown (sample data with some variation)
-        if (i === 0) {
-            actualBurndown.push(totalStoryPoints);
-        } else {
-            const remaining = Math.max(0, totalStoryPoints - (totalStoryPoints / totalDays) * i + Math.random() * 10 - 5);
-            actualBurndown.push(Math.round(remaining));
-        }
-    }
+    fetch(`/api/sprints/${sprintId}/analytics`)
+        .then(response => response.json())
+        .then(data => {
+            if (!data.success) {
+                console.error('Error loading sprint analytics:', data.error);
+                return;
+            }
+            const velocity = document.getElementById('velocityAverage');
+            if (velocity && data.velocity.sprints.length) {
+                velocity.textContent = data.velocity.average;
+            }
+            renderBurndownChart(ctx, data.burndown);
+        })
+        .catch(error => console.error('Error loading sprint analytics:', error));
+}
+
+function renderBurndownChart(ctx, burndown) {
+    const days = burndown.days.map(day => new Date(day + 'T00:00:00').toLocaleDateString());
+    const idealBurndown = burndown.ideal;
+    const actualBurndown = burndown.remaining;
+    const unitLabel = burndown.unit === 'points' ? 'Story Points' : 'Items';
     
     new Chart(ctx, {
         type: 'line',
@@ -140,6 +135,21 @@ function initializeBurndownChart() {
                 backgroundColor: 'rgba(0, 123, 255, 0.1)',
                 borderWidth: 3,
                 fill: true
+            }, {
+                label: 'Completed',
+                data: burndown.completed,
+                borderColor: '#6f42c1',
+                borderWidth: 2,
+                fill: false,
+                hidden: true
+            }, {
+                label: 'Scope',
+                data: burndown.scope,
+                borderColor: '#fd7e14',
+                borderWidth: 2,
+                stepped: true,
+                fill: false,
+                hidden: true
             }]
         },
         options: {
@@ -150,7 +160,7 @@ function initializeBurndownChart() {
                     beginAtZero: true,
                     title: {
                         display: true,
-                        text: 'Story Points Remaining'
+                        text: `${unitLabel} Remaining`
                     }
                 },
                 x: {
@@ -0,0 +1,80 @@
+"""Shared pytest setup for the app's unit tests.
+
+Tests run against the main app package. The app keeps its local data
+under relative paths (data/, data.json), so every test that touches
+disk gets its own working directory seeded with a copy of data.json.
+"""
+
+import os
+import shutil
+import sys
+
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Ahead of testing_env itself, whose app.py would shadow the app package
+sys.path.insert(0, REPO_ROOT)
+import app  # noqa: E402,F401
+
+# Standalone testing apps, not test modules
+collect_ignore = ['app.py', 'test_app.py']
+
+
+@pytest.fixture(autouse=True)
+def data_versions(tmp_path, monkeypatch):
+    """Data version counters of this test only, wherever it runs."""
+    from app.services import version_service
+    monkeypatch.setattr(version_service, '_store',
+                        version_service.LocalVersionStore(str(tmp_path / 'versions.json')))
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """Run in an empty directory holding a copy of the repo's data.json."""
+    shutil.copy(os.path.join(REPO_ROOT, 'data.json'), tmp_path / 'data.json')
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv('JINJA_CACHE_DIR', str(tmp_path / '.jinja_cache'))
+    monkeypatch.setenv('JOB_QUEUE_DIR', str(tmp_path / 'data' / 'jobs'))
+    from app.services import data_service
+    monkeypatch.setattr(data_service, '_local_files_complete', False)
+    return tmp_path
+
+
+@pytest.fixture
+def app(workdir, monkeypatch):
+    """The Flask app on local files, with process-wide caches emptied."""
+    from app.services import (
+        activity_service, card_index_service, job_service, notification_store_service,
+        search_service, stats_service, user_index_service, version_service
+    )
+    for module, name in ((activity_service, '_log'), (card_index_service, '_index'),
+                         (notification_store_service, '_store'), (stats_service, '_store'),
+                         (user_index_service, '_index'), (job_service, '_runner')):
+        monkeypatch.setattr(module, name, None)
+    search_service.reset_search_index()
+    # Anything cached under the current data version belongs to an earlier test
+    version_service.bump_data_version()
+
+    from app import create_app
+    flask_app = create_app()
+    flask_app.config['TESTING'] = True
+    # Tests expect substring search, so wait for the startup trigram build
+    build = search_service._trigram_thread
+    if build is not None:
+        build.join()
+    yield flask_app
+    runner = flask_app.extensions.get('job_runner')
+    if runner is not None:
+        runner.shutdown(wait=True)
+
+
+@pytest.fixture
+def login(app):
+    """login(user_id) returns a test client signed in as that user."""
+    def make_client(user_id=1):
+        client = app.test_client()
+        with client.session_transaction() as session:
+            session['_user_id'] = str(user_id)
+            session['_fresh'] = True
+        return client
+    return make_client
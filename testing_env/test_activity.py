@@ -0,0 +1,88 @@
+"""Activity log: ring buffers, persistence and the paged /api/activity_feed."""
+
+import json
+
+from app.services.activity_service import ActivityLog, RingBuffer
+
+
+def test_ring_buffer_keeps_the_newest_items():
+    buffer = RingBuffer(3)
+    for i in range(1, 6):
+        buffer.append({'id': i})
+    assert len(buffer) == 3
+    assert [buffer[i]['id'] for i in range(3)] == [3, 4, 5]
+    assert [e['id'] for e in buffer.page_before(None, 2)] == [5, 4]
+    assert [e['id'] for e in buffer.page_before(5, 10)] == [4, 3]
+
+
+def _log(tmp_path):
+    return ActivityLog(log_path=str(tmp_path / 'activity.jsonl'))
+
+
+def test_feed_pages_newest_first_by_project_and_user(tmp_path):
+    log = _log(tmp_path)
+    events = [log.append({'user': user, 'project_id': project})
+              for user, project in (('ann', 1), ('bob', 1), ('ann', '2'), ('ann', 1), ('bob', 2))]
+    ids = [e['id'] for e in events]
+    assert ids == sorted(ids) and len(set(ids)) == 5
+
+    page, cursor = log.feed(2)
+    assert [e['id'] for e in page] == [ids[4], ids[3]] and cursor == ids[3]
+    page, cursor = log.feed(2, cursor)
+    assert [e['id'] for e in page] == [ids[2], ids[1]]
+    page, cursor = log.feed(2, cursor)
+    assert [e['id'] for e in page] == [ids[0]] and cursor is None
+
+    # '2' and 2 are the same project
+    assert [e['id'] for e in log.feed(10, project_id=2)[0]] == [ids[4], ids[2]]
+    assert [e['id'] for e in log.feed(10, user='ann')[0]] == [ids[3], ids[2], ids[0]]
+    assert [e['id'] for e in log.feed(10, project_id=1, user='ann')[0]] == [ids[3], ids[0]]
+
+
+def test_log_survives_a_restart(tmp_path):
+    log = _log(tmp_path)
+    first = log.append({'user': 'ann', 'project_id': 1, 'message': 'one'})
+    # A torn last line is skipped on load
+    with open(tmp_path / 'activity.jsonl', 'a') as f:
+        f.write('{"id": ')
+    reloaded = _log(tmp_path)
+    assert [e['message'] for e in reloaded.feed(10)[0]] == ['one']
+    second = reloaded.append({'user': 'ann', 'project_id': 1})
+    assert second['id'] > first['id'] and reloaded.version() == second['id']
+
+
+def test_card_writes_show_up_in_the_feed(login, workdir):
+    client = login(1)
+    before = client.get('/api/activity_feed')
+    assert before.get_json()['activities'] == []
+
+    card = client.post('/api/add_card', json={'title': 'Feed me', 'project_id': 1}).get_json()['card']
+    client.post('/api/update_card_status', json={'card_id': card['id'], 'status': 'in_progress'})
+    client.post(f"/api/card/{card['id']}/comments", json={'content': 'on it'})
+
+    feed = client.get('/api/activity_feed?project_id=1').get_json()
+    assert [a['type'] for a in feed['activities']] == ['comment_added', 'card_moved', 'card_created']
+    assert feed['activities'][1]['message'] == f"admin moved #{card['id']} Feed me from Todo to In Progress"
+    assert client.get('/api/activity_feed?user=testuser1').get_json()['activities'] == []
+
+    # Written through to the append-only log
+    with open(workdir / 'data' / 'activity.jsonl') as f:
+        assert len([json.loads(line) for line in f]) == 3
+
+    page = client.get('/api/activity_feed?limit=2').get_json()
+    assert len(page['activities']) == 2
+    rest = client.get(f"/api/activity_feed?limit=2&cursor={page['next_cursor']}").get_json()
+    assert [a['type'] for a in rest['activities']] == ['card_created'] and rest['next_cursor'] is None
+
+
+def test_logs_sharing_a_file_see_each_others_events(tmp_path):
+    this, other = _log(tmp_path), _log(tmp_path)
+    first = this.append({'user': 'ann', 'project_id': 1})
+    version = this.version()
+    second = other.append({'user': 'bob', 'project_id': 1})
+    assert second['id'] > first['id']
+    assert this.version() != version
+    assert [e['id'] for e in this.feed(10)[0]] == [second['id'], first['id']]
+    third = this.append({'user': 'ann', 'project_id': 2})
+    assert third['id'] > second['id']
+    assert [e['id'] for e in other.feed(10)[0]] == [third['id'], second['id'], first['id']]
@@ -0,0 +1,86 @@
+"""One-pass org analytics and its per-version cache."""
+
+from datetime import date
+
+from app.services import analytics_service
+from app.services.analytics_service import compute_analytics, get_analytics
+from app.services.version_service import bump_data_version
+
+
+TODAY = date(2024, 5, 10)
+
+DATA = {
+    'projects': [{'id': 1, 'name': 'Apollo'}, {'id': 2, 'name': 'Gemini'}, {'id': 3, 'name': 'Old', 'archived': True},
+                 {'id': 4, 'name': 'Empty'}],
+    'cards': [
+        {'id': 1, 'project_id': 1, 'status': 'done', 'priority': 'High', 'assignee': 'ann', 'due_date': '2024-05-01'},
+        {'id': 2, 'project_id': 1, 'status': 'todo', 'priority': 'High', 'assignee': 'ann', 'due_date': '2024-05-09'},
+        {'id': 3, 'project_id': 1, 'status': 'in_progress', 'assignee': 'bob', 'due_date': '2024-05-12'},
+        {'id': 4, 'project_id': 2, 'status': 'review', 'priority': 'Low', 'assignee': 'ann',
+         'due_date': 'next week'},
+        {'id': 5, 'project_id': 2, 'status': None, 'due_date': '2024-05-13'},
+        {'id': 6, 'project_id': 2, 'status': 'done', 'assignee': 'bob'},
+        {'id': 7, 'project_id': 3, 'status': 'todo', 'assignee': 'ann', 'due_date': '2024-01-01'},
+    ]
+}
+
+
+def test_projects_are_summarized_from_their_cards():
+    analytics = compute_analytics(DATA, TODAY)
+    projects = {p['name']: p for p in analytics['projects']}
+    assert set(projects) == {'Apollo', 'Gemini', 'Empty'}
+    apollo, gemini = projects['Apollo'], projects['Gemini']
+    assert (apollo['total'], apollo['done'], apollo['overdue'], apollo['due_soon']) == (3, 1, 1, 1)
+    assert (apollo['progress'], apollo['status']) == (33.3, 'overdue')
+    # Unparseable due dates count as undated; due in 3 days is still due soon
+    assert (gemini['overdue'], gemini['due_soon'], gemini['status']) == (0, 1, 'at-risk')
+    assert gemini['statuses'] == {'todo': 1, 'in_progress': 0, 'review': 1, 'done': 1}
+    assert (projects['Empty']['progress'], projects['Empty']['status']) == (0, 'on-track')
+
+
+def test_totals_and_breakdowns_skip_archived_projects():
+    analytics = compute_analytics(DATA, TODAY)
+    assert analytics['summary'] == {'cards': 6, 'done': 2, 'overdue': 1, 'due_soon': 2, 'unassigned': 1,
+                                    'progress': 33.3}
+    assert analytics['priorities'] == {'Low': 1, 'Medium': 3, 'High': 2}
+    assert analytics['generated_on'] == '2024-05-10'
+
+
+def test_resources_sorted_by_open_work():
+    resources = compute_analytics(DATA, TODAY)['resources']
+    assert [r['name'] for r in resources] == ['ann', 'bob']
+    ann = resources[0]
+    assert (ann['open'], ann['done'], ann['overdue'], ann['high_priority']) == (2, 1, 1, 1)
+    assert ann['utilization'] == 20.0 and ann['capacity'] == analytics_service.ASSIGNEE_CAPACITY
+
+
+def test_analytics_are_computed_once_per_data_version():
+    loads = []
+
+    def loader():
+        loads.append(1)
+        return DATA
+
+    bump_data_version()
+    first, version = get_analytics(loader)
+    again, same_version = get_analytics(loader)
+    assert again is first and same_version == version and len(loads) == 1
+    bump_data_version()
+    _, new_version = get_analytics(loader)
+    assert new_version != version and len(loads) == 2
+
+
+def test_analytics_api_revalidates_with_etag(login):
+    client = login(1)
+    response = client.get('/api/analytics/data')
+    body = response.get_json()
+    # Cards 5 and 6 belong to archived projects
+    assert body['success'] and body['summary']['cards'] == 4
+    assert body['version'] == analytics_service.analytics_data_version()
+    etag = response.headers['ETag']
+    assert client.get('/api/analytics/data', headers={'If-None-Match': etag}).status_code == 304
+
+    client.post('/api/update_card_status', json={'card_id': 3, 'status': 'done'})
+    changed = client.get('/api/analytics/data', headers={'If-None-Match': etag})
+    assert changed.status_code == 200
+    assert changed.get_json()['summary']['done'] == body['summary']['done'] + 1
@@ -0,0 +1,62 @@
+"""Kanban card deltas pushed to open boards."""
+
+import json
+
+from app.services import board_event_service
+from app.services.event_service import bus, project_channel
+
+
+def _next_event(chunks):
+    while True:
+        chunk = next(chunks).decode()
+        fields = dict(line.split(': ', 1) for line in chunk.strip().splitlines() if not line.startswith(':'))
+        if 'event' in fields:
+            return fields['event'], json.loads(fields['data'])
+
+
+def test_unwatched_boards_build_no_deltas(monkeypatch):
+    built = []
+    monkeypatch.setattr(board_event_service, '_card_delta', lambda card: built.append(card) or {})
+    board_event_service.publish_card_updated({'id': 1, 'project_id': 12345})
+    assert built == []
+    subscription = bus.subscribe(project_channel(12345))
+    try:
+        board_event_service.publish_card_updated({'id': 1, 'project_id': 12345})
+        assert len(built) == 1 and subscription.get(0)[1] == 'card_updated'
+    finally:
+        subscription.close()
+
+
+def test_move_to_the_same_status_is_not_published():
+    subscription = bus.subscribe(project_channel(12345))
+    try:
+        board_event_service.publish_card_moved({'id': 1, 'project_id': 12345, 'status': 'todo'}, 'todo')
+        assert subscription.get(0) is None
+        board_event_service.publish_card_moved({'id': 1, 'project_id': 12345, 'status': 'done'}, 'todo')
+        assert subscription.get(0)[1:] == ('card_moved', {'id': 1, 'status': 'done', 'from': 'todo'})
+    finally:
+        subscription.close()
+
+
+def test_board_stream_receives_card_deltas(login):
+    client = login(1)
+    response = client.get('/api/projects/1/board/stream', buffered=False)
+    chunks = response.iter_encoded()
+    next(chunks)  # retry
+    other_board = bus.subscribe(project_channel(2))
+    try:
+        card = client.post('/api/add_card', json={'title': 'Live card', 'project_id': 1}).get_json()['card']
+        kind, delta = _next_event(chunks)
+        assert kind == 'card_created' and delta['id'] == card['id']
+        assert 'Live card' in delta['html'] and 'data-card-id' in delta['html']
+
+        client.post('/api/update_card_status', json={'card_id': card['id'], 'status': 'done'})
+        assert _next_event(chunks) == ('card_moved', {'id': card['id'], 'status': 'done', 'from': 'todo'})
+
+        client.post('/api/delete_card', json={'card_id': card['id']})
+        assert _next_event(chunks) == ('card_deleted', {'id': card['id'], 'status': 'done'})
+        assert other_board.get(0) is None
+    finally:
+        other_board.close()
+        response.close()
+    assert bus.subscriber_count(project_channel(1)) == 0
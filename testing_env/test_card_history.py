@@ -0,0 +1,90 @@
+"""Card history: field-level diffs, paged history and replay to past versions."""
+
+from app.services.card_history_service import (
+    added_fields, card_at_version, diff_card, replay, save_card_change, snapshot
+)
+from app.services.data_service import load_data
+
+
+def test_diff_skips_bookkeeping_fields():
+    before = {'id': 1, 'title': 'a', 'status': 'todo', 'updated_at': 'x', 'version': 3}
+    after = dict(before, title='b', updated_at='y', version=4, priority='High')
+    assert diff_card(before, after) == {'title': ['a', 'b'], 'priority': [None, 'High']}
+    assert diff_card(None, {'id': 7}) == {'id': [None, 7]}
+
+
+def test_replay_undoes_newer_entries_only():
+    card = {'id': 1, 'title': 'c', 'status': 'done', 'version': 3}
+    entries = [
+        {'v': 1, 'd': {'id': [None, 1], 'title': [None, 'a'], 'status': [None, 'todo']}},
+        {'v': 2, 'd': {'title': ['a', 'b']}},
+        {'v': 3, 'd': {'title': ['b', 'c'], 'status': ['todo', 'done']}},
+    ]
+    assert replay(card, entries, 2) == {'id': 1, 'title': 'b', 'status': 'todo', 'version': 2}
+    assert replay(card, entries, 1) == {'id': 1, 'title': 'a', 'status': 'todo', 'version': 1}
+    assert replay(card, entries, 0) is None
+    # The current card is never modified
+    assert card == {'id': 1, 'title': 'c', 'status': 'done', 'version': 3}
+
+
+def test_none_and_absent_fields_are_told_apart(workdir):
+    before = {'id': 1, 'title': 'a', 'due_date': None, 'sprint_id': 4}
+    after = {'id': 1, 'title': 'a', 'labels': None, 'sprint_id': None}
+    diff = diff_card(before, after)
+    # Added with None and removed while None are still changes
+    assert diff == {'due_date': [None, None], 'labels': [None, None], 'sprint_id': [4, None]}
+    assert added_fields(before, diff) == ['labels']
+
+    data = load_data(None)
+    card = data['cards'][0]
+    card['due_date'] = None
+    save_card_change(None, data, None, card, 'admin')
+    first = snapshot(card)
+    card.pop('due_date')
+    card['labels'] = None
+    entry = save_card_change(None, data, first, card, 'admin')
+    assert entry['a'] == ['labels']
+    past = card_at_version(None, card, first['version'])
+    assert past['due_date'] is None and 'labels' not in past
+    assert {k: v for k, v in past.items() if k != 'version'} == {k: v for k, v in first.items() if k != 'version'}
+
+
+def test_unchanged_save_records_nothing(workdir):
+    data = load_data(None)
+    card = data['cards'][0]
+    before = snapshot(card)
+    card['updated_at'] = 'later'
+    assert save_card_change(None, data, before, card, 'admin') is None
+    assert 'version' not in card
+    assert not (workdir / 'data' / 'history').exists()
+
+
+def test_history_pages_and_replays_through_the_api(login):
+    client = login(1)
+    card = client.post('/api/add_card', json={'title': 'v1', 'project_id': 1}).get_json()['card']
+    card_id = card['id']
+    for title in ('v2', 'v3', 'v4'):
+        client.post('/api/update_card', json={'card_id': card_id, 'title': title})
+    client.post('/api/update_card_status', json={'card_id': card_id, 'status': 'done'})
+
+    page = client.get(f'/api/card/{card_id}/history?limit=2').get_json()
+    assert page['version'] == 5
+    assert [e['v'] for e in page['history']] == [5, 4] and page['next_cursor'] == 4
+    assert page['history'][0]['d'] == {'status': ['todo', 'done']}
+    assert page['history'][0]['by'] == 'admin'
+    rest = client.get(f"/api/card/{card_id}/history?limit=10&cursor={page['next_cursor']}").get_json()
+    assert [e['v'] for e in rest['history']] == [3, 2, 1] and rest['next_cursor'] is None
+
+    at_2 = client.get(f'/api/card/{card_id}/history/2').get_json()['card']
+    assert (at_2['title'], at_2['status'], at_2['version']) == ('v2', 'todo', 2)
+    assert client.get(f'/api/card/{card_id}/history/9').get_json()['card']['title'] == 'v4'
+    missing = client.get(f'/api/card/{card_id}/history/0').get_json()
+    assert missing == {'success': False, 'error': 'Card did not exist at that version'}
+
+
+def test_cards_from_before_history_replay_to_their_original_state(login):
+    client = login(1)
+    client.post('/api/update_card', json={'card_id': 1, 'title': 'Renamed'})
+    original = client.get('/api/card/1/history/0').get_json()['card']
+    assert original['title'] == 'Setup project'
+    assert client.get('/api/card/1').get_json()['card']['title'] == 'Renamed'
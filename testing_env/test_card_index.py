@@ -0,0 +1,146 @@
+"""Card index filtering, sorting and due-date ranges, and the /api/issues query endpoint."""
+
+from datetime import date, timedelta
+
+import pytest
+
+from app.services.card_index_service import CardIndex, due_date_range, parse_sort
+from app.utils.helpers import get_due_date_class, get_due_date_status
+from app.utils.pagination import paginate
+
+
+CARDS = [
+    {'id': 1, 'title': 'beta', 'project_id': 1, 'status': 'todo', 'priority': 'High',
+     'assignee': 'ann', 'labels': ['bug'], 'due_date': '2024-05-03', 'created_at': '2024-01-03'},
+    {'id': 2, 'title': 'Alpha', 'project_id': 1, 'status': 'done', 'priority': 'Low',
+     'assignee': 'bob', 'labels': ['bug', 'urgent'], 'due_date': '', 'created_at': '2024-01-01'},
+    {'id': 3, 'title': 'gamma', 'project_id': 2, 'status': 'in_progress', 'priority': 'Medium',
+     'assignee': None, 'labels': [], 'due_date': '2024-05-01', 'created_at': '2024-01-02'},
+    {'id': 4, 'title': 'delta', 'project_id': 1, 'status': 'todo', 'priority': 'Medium',
+     'assignee': 'ann', 'labels': ['feature'], 'created_at': '2024-01-04'},
+]
+
+
+@pytest.fixture
+def index():
+    index = CardIndex()
+    index.build([dict(card) for card in CARDS])
+    return index
+
+
+def _ids(cards):
+    return [card['id'] for card in cards]
+
+
+def test_parse_sort_presets_and_tiebreak():
+    assert parse_sort(None) == [('id', False)]
+    assert parse_sort('created_desc') == [('created_at', True), ('id', False)]
+    assert parse_sort('-priority,title') == [('priority', True), ('title', False), ('id', False)]
+    with pytest.raises(ValueError):
+        parse_sort('password_hash')
+
+
+def test_filters_intersect(index):
+    assert _ids(index.query({'project_id': 1})[0]) == [1, 2, 4]
+    assert _ids(index.query({'project_id': 1, 'assignee': 'ann'})[0]) == [1, 4]
+    assert _ids(index.query({'status': ['todo', 'in_progress']})[0]) == [1, 3, 4]
+    assert _ids(index.query(labels=['bug', 'urgent'])[0]) == [2]
+    assert _ids(index.query({'project_id': 2}, ids={1, 3})[0]) == [3]
+    assert index.query({'assignee': 'nobody'})[0] == []
+
+
+def test_sort_directions_and_missing_values_last(index):
+    assert _ids(index.query(sort='title')[0]) == [2, 1, 4, 3]
+    assert _ids(index.query(sort='-priority')[0]) == [1, 3, 4, 2]
+    assert _ids(index.query(sort='assignee')[0]) == [1, 4, 2, 3]
+    assert _ids(index.query(sort='-assignee')[0]) == [2, 1, 4, 3]
+    assert _ids(index.query(sort='due_date')[0]) == [3, 1, 2, 4]
+
+
+def test_pages_resume_with_sort_key(index):
+    cards, key = index.query(sort='-created_at')
+    page, cursor = paginate(cards, 2, key=key)
+    assert _ids(page) == [4, 1]
+    page, cursor = paginate(cards, 2, cursor, key=key)
+    assert _ids(page) == [3, 2] and cursor is None
+
+
+def test_reindex_and_remove(index):
+    index.add(dict(CARDS[0], status='done', assignee='bob'))
+    assert _ids(index.query({'assignee': 'bob'})[0]) == [1, 2]
+    assert 'ann' in index.fields['assignee'] and index.fields['assignee']['ann'] == {4}
+    index.remove(2)
+    assert _ids(index.query(labels=['bug'])[0]) == [1]
+    assert 'urgent' not in index.labels
+
+
+def test_api_issues_filters_and_sorts(login):
+    client = login(1)
+    response = client.get('/api/issues?project_id=1&sort=-id').get_json()
+    assert response['success']
+    ids = [card['id'] for card in response['cards']]
+    assert ids == sorted(ids, reverse=True)
+    assert all(card['project_id'] == 1 for card in response['cards'])
+    assert response['total'] == len(ids)
+    bad = client.get('/api/issues?sort=password_hash')
+    assert bad.status_code == 400 and bad.get_json()['success'] is False
+
+
+TODAY = date(2024, 5, 1)  # a Wednesday
+
+
+def test_due_date_range_names():
+    assert due_date_range('overdue', TODAY) == (None, '2024-05-01')
+    assert due_date_range('today', TODAY) == ('2024-05-01', '2024-05-02')
+    assert due_date_range('due_soon', TODAY) == due_date_range('due_in_3', TODAY) == ('2024-05-01', '2024-05-05')
+    assert due_date_range('this_week', TODAY) == ('2024-04-29', '2024-05-06')
+    assert due_date_range('next_week', TODAY) == ('2024-05-06', '2024-05-13')
+    assert due_date_range('no_date', TODAY) is None
+    with pytest.raises(ValueError):
+        due_date_range('someday', TODAY)
+
+
+def test_due_ranges_cover_open_dated_cards_only(index):
+    index.add({'id': 5, 'title': 'bad date', 'status': 'todo', 'due_date': '05/01/2024'})
+    assert index.due_ids(due_date_range('overdue', date(2024, 5, 2))) == {3}
+    assert index.due_ids(due_date_range('due_in_2', TODAY)) == {3, 1}
+    # Card 2 is done, so its date is ignored; cards 2 and 4 have none
+    assert index.due_ids(None) == {2, 4}
+    assert _ids(index.due_cards('2024-05-01', '2024-06-01')) == [3, 1]
+    assert index.due_counts_by_project(due_date_range('due_in_7', TODAY)) == {1: 1, 2: 1}
+
+
+def test_due_index_follows_edits(index):
+    index.add(dict(CARDS[2], status='done'))
+    index.add(dict(CARDS[3], due_date='2024-04-30'))
+    assert _ids(index.due_cards()) == [4, 1]
+    index.remove(4)
+    assert _ids(index.due_cards()) == [1]
+    filters = {'due_date': due_date_range('due_in_7', TODAY), 'assignee': 'ann'}
+    assert _ids(index.query(filters)[0]) == [1]
+
+
+def test_api_issues_due_date_filter(login):
+    client = login(1)
+    undated = client.get('/api/issues?due_date_filter=no_date').get_json()
+    assert undated['success'] and undated['total'] == 6
+    assert client.get('/api/issues?due_date_filter=overdue').get_json()['total'] == 0
+    bad = client.get('/api/issues?due_date_filter=someday')
+    assert bad.status_code == 400 and bad.get_json()['error'] == 'Unknown due date filter: someday'
+
+
+@pytest.mark.parametrize('url', ['/issues?sort=bogus', '/backlog?sort=bogus', '/issues?due_date_filter=bogus',
+                                 '/backlog?due_date_filter=bogus&sort=-title'])
+def test_list_pages_ignore_unknown_sort_and_due_filter(login, url):
+    response = login(1).get(url)
+    assert response.status_code == 200
+    assert b'Implement backend' in response.data
+
+
+def test_due_date_helpers_classify_relative_to_today():
+    today = date.today()
+    assert get_due_date_status((today - timedelta(days=1)).isoformat()) == '(OVERDUE)'
+    assert get_due_date_status(today.isoformat()) == '(TODAY)'
+    assert get_due_date_class((today + timedelta(days=3)).isoformat()) == 'card-due-soon'
+    assert get_due_date_class((today + timedelta(days=4)).isoformat()) == ''
+    assert get_due_date_status('not a date') == get_due_date_status(None) == ''
@@ -0,0 +1,82 @@
+"""Comment posting with mention notifications, and the username index."""
+
+from app.services import notification_service
+from app.services.data_service import load_data, save_data
+from app.services.notification_store_service import get_notification_store
+from app.services.user_index_service import get_user_index
+from app.services.version_service import bump_data_version
+
+
+USERS = [{'id': 1, 'username': 'ann'}, {'id': 2, 'username': 'bob'}]
+
+
+def test_index_resolves_in_order_and_skips_unknown_names():
+    bump_data_version(users=True)
+    assert [u['id'] for u in get_user_index(USERS).resolve(['bob', 'nobody', 'ann'])] == [2, 1]
+
+
+def test_index_is_reused_until_users_change():
+    bump_data_version(users=True)
+    index = get_user_index(USERS)
+    assert get_user_index(USERS) is index
+    # Writes that leave users alone keep the index
+    bump_data_version(1)
+    bump_data_version()
+    assert get_user_index(USERS) is index
+    bump_data_version(users=True)
+    assert get_user_index(USERS) is not index
+
+
+def test_rename_and_same_size_replacement_are_picked_up():
+    bump_data_version(users=True)
+    get_user_index(USERS)
+    renamed = [{'id': 1, 'username': 'anne'}, {'id': 2, 'username': 'bob'}]
+    bump_data_version(users=True)
+    assert [u['id'] for u in get_user_index(renamed).resolve(['anne', 'ann'])] == [1]
+    # One user deleted and another added: same count, different names
+    replaced = [{'id': 2, 'username': 'bob'}, {'id': 3, 'username': 'cat'}]
+    bump_data_version(users=True)
+    assert [u['id'] for u in get_user_index(replaced).resolve(['anne', 'cat'])] == [3]
+
+
+def test_comment_and_mentions_are_saved_together(login):
+    client = login(1)
+    response = client.post('/api/card/1/comments', json={'content': 'Ping @testuser1 and @nobody'}).get_json()
+    assert response['success']
+    comment = response['comment']
+
+    store = get_notification_store(None)
+    notifications, _ = store.list(2, 10)
+    assert [(n['type'], n['card_id']) for n in notifications] == [('mention', 1)]
+    assert store.unread_count(2) == 1
+    comments = client.get('/api/card/1/comments').get_json()['comments']
+    assert comment['id'] in [c['id'] for c in comments]
+    # The comment reached disk, not just the in-memory data
+    assert any(c['id'] == comment['id'] for c in load_data(None)['comments'])
+
+
+def test_mentions_follow_a_renamed_user(login):
+    client = login(1)
+    client.post('/api/card/1/comments', json={'content': 'warm the index @testuser1'})
+    data = load_data(None)
+    user = next(u for u in data['users'] if u['id'] == 2)
+    user['username'] = 'renamed'
+    save_data(data, users=True)
+
+    client.post('/api/card/1/comments', json={'content': 'hello @renamed'})
+    assert get_notification_store(None).unread_count(2) == 2
+
+
+def test_firestore_comments_keep_the_local_backup(workdir, monkeypatch):
+    batches = []
+    monkeypatch.setattr(notification_service, 'comment_document', lambda db, card, comment: ('doc', comment))
+    monkeypatch.setattr(notification_service, 'add_notifications',
+                        lambda db, notifications, writes=(): batches.append(list(writes)))
+    data = load_data(None)
+    card = next(c for c in data['cards'] if c['id'] == 1)
+    comment = {'id': 999, 'card_id': 1, 'author': 'admin', 'content': 'backed up'}
+    data['comments'].append(comment)
+    notification_service.save_comment(comment, card, data, db=object())
+
+    assert batches == [[('doc', comment)]]
+    assert any(c['id'] == 999 for c in load_data(None)['comments'])
@@ -0,0 +1,82 @@
+"""Response compression and precompressed static files."""
+
+import gzip
+import os
+
+import pytest
+from flask import Flask, jsonify
+
+from app.utils.compression import init_compression, precompress_static
+
+
+BIG_CSS = 'body { color: red; }\n' * 200
+
+
+@pytest.fixture
+def compressed_app(tmp_path):
+    static = tmp_path / 'static'
+    static.mkdir()
+    (static / 'site.css').write_text(BIG_CSS)
+    (static / 'tiny.css').write_text('a{}')
+    flask_app = Flask(__name__, static_folder=str(static))
+
+    @flask_app.route('/big')
+    def big():
+        response = jsonify({'items': list(range(1000))})
+        response.set_etag('abc')
+        return response
+
+    @flask_app.route('/small')
+    def small():
+        return jsonify({'ok': True})
+
+    init_compression(flask_app)
+    return flask_app
+
+
+def test_large_json_is_gzipped_with_weak_etag(compressed_app):
+    client = compressed_app.test_client()
+    response = client.get('/big', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert response.headers['ETag'] == 'W/"abc"'
+    assert gzip.decompress(response.data).startswith(b'{"items":[0,1,2')
+
+
+def test_small_or_unaccepted_responses_are_left_alone(compressed_app):
+    client = compressed_app.test_client()
+    assert 'Content-Encoding' not in client.get('/small', headers={'Accept-Encoding': 'gzip'}).headers
+    plain = client.get('/big', headers={'Accept-Encoding': 'identity'})
+    assert 'Content-Encoding' not in plain.headers
+    assert plain.get_json()['items'][-1] == 999
+
+
+def test_precompressed_static_sibling_is_served(compressed_app):
+    static = compressed_app.static_folder
+    written = precompress_static(static)
+    assert [os.path.basename(path) for path, _, _ in written] == ['site.css']
+    assert not os.path.exists(os.path.join(static, 'tiny.css.gz'))
+
+    client = compressed_app.test_client()
+    response = client.get('/static/site.css', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert response.mimetype == 'text/css'
+    assert gzip.decompress(response.get_data()).decode() == BIG_CSS
+    response.close()
+
+
+def test_stale_precompressed_file_is_ignored(compressed_app):
+    static = compressed_app.static_folder
+    precompress_static(static)
+    source = os.path.join(static, 'site.css')
+    with open(source, 'a') as f:
+        f.write('p { margin: 0; }\n')
+    mtime = os.path.getmtime(source + '.gz') + 10
+    os.utime(source, (mtime, mtime))
+
+    client = compressed_app.test_client()
+    response = client.get('/static/site.css', headers={'Accept-Encoding': 'gzip'})
+    # The outdated .gz is skipped in favour of the current source
+    assert 'Content-Encoding' not in response.headers
+    assert response.get_data().decode().endswith('p { margin: 0; }\n')
+    response.close()
@@ -0,0 +1,125 @@
+"""Overdue digest emails and the once-per-queue daily schedule."""
+
+import os
+from datetime import date
+
+import pytest
+
+from app.services import digest_service, job_service
+from app.services.card_index_service import CardIndex
+from app.services.job_service import JobRunner
+
+
+TODAY = date(2024, 5, 10)
+
+DATA = {
+    'users': [
+        {'id': 10, 'username': 'ann', 'email': 'ann@example.com', 'status': 'active'},
+        {'id': 11, 'username': 'bob', 'email': 'bob@example.com', 'status': 'active',
+         'email_notifications': False},
+        {'id': 12, 'username': 'cat', 'email': 'cat@example.com', 'status': 'active'},
+    ],
+    'projects': [{'id': 1, 'name': 'Apollo'}],
+    'cards': [
+        {'id': 1, 'title': 'late', 'project_id': 1, 'status': 'todo', 'assignee': 'ann', 'due_date': '2024-05-09'},
+        {'id': 2, 'title': 'soon', 'project_id': 1, 'status': 'todo', 'assignee': 'ann', 'due_date': '2024-05-13'},
+        {'id': 3, 'title': 'later', 'project_id': 1, 'status': 'todo', 'assignee': 'ann', 'due_date': '2024-05-14'},
+        {'id': 4, 'title': 'finished', 'project_id': 1, 'status': 'done', 'assignee': 'ann',
+         'due_date': '2024-05-01'},
+        {'id': 5, 'title': 'muted', 'project_id': 1, 'status': 'todo', 'assignee': 'bob', 'due_date': '2024-05-01'},
+        {'id': 6, 'title': 'today', 'project_id': 1, 'status': 'todo', 'assignee': 'cat', 'due_date': '2024-05-10'},
+        {'id': 7, 'title': 'nobody', 'project_id': 1, 'status': 'todo', 'assignee': 'zed', 'due_date': '2024-05-02'},
+    ]
+}
+
+
+@pytest.fixture
+def outbox(app, monkeypatch):
+    """Messages 'sent' by the digest, in order."""
+    sent = []
+
+    def send_messages(messages, on_sent=None):
+        for message in messages:
+            sent.append(message)
+            on_sent(message)
+        return []
+
+    monkeypatch.setattr(digest_service, 'send_messages', send_messages)
+    with app.app_context():
+        yield sent
+
+
+def test_digests_group_open_cards_by_assignee():
+    index = CardIndex()
+    index.build([dict(card) for card in DATA['cards']])
+    digests = digest_service.build_digests(index, TODAY)
+    assert {name: {bucket: [c['id'] for c in cards] for bucket, cards in digest.items()}
+            for name, digest in digests.items()} == {
+        'ann': {'overdue': [1], 'due_soon': [2]},
+        'bob': {'overdue': [5], 'due_soon': []},
+        'cat': {'overdue': [], 'due_soon': [6]},
+        'zed': {'overdue': [7], 'due_soon': []},
+    }
+
+
+def test_digest_emails_each_opted_in_user_once(outbox):
+    sent, failed = digest_service.send_overdue_digest(DATA, TODAY)
+    assert (sent, failed) == (2, [])
+    assert [(m['To'], m['Subject']) for m in outbox] == [
+        ('ann@example.com', 'PM Tool: 1 overdue card'),
+        ('cat@example.com', 'PM Tool: 1 card due soon'),
+    ]
+
+
+def test_retried_digest_skips_users_already_emailed(outbox):
+    done = []
+    sent, _ = digest_service.send_overdue_digest(DATA, TODAY, skip_user_ids={10}, on_sent=done.append)
+    assert sent == 1
+    assert done == [12]
+    assert [m['To'] for m in outbox] == ['cat@example.com']
+
+
+DAILY = [('overdue_digest', 9, 0)]
+
+
+def _daily_threads():
+    import threading
+    return [t for t in threading.enumerate() if t.name == 'job-daily-overdue_digest']
+
+
+def test_daily_jobs_are_off_unless_configured(app):
+    runner = app.extensions['job_runner']
+    assert app.config['SCHEDULE_JOBS'] is False
+    assert runner._scheduler_lock is None
+    assert not os.path.exists(os.path.join(runner.queue_dir, 'scheduler.lock'))
+
+
+def test_schedule_jobs_flag_schedules_at_startup(workdir, monkeypatch):
+    monkeypatch.setenv('SCHEDULE_JOBS', '1')
+    monkeypatch.setattr(job_service, '_runner', None)
+    from app import create_app
+    flask_app = create_app()
+    runner = flask_app.extensions['job_runner']
+    try:
+        assert flask_app.config['SCHEDULE_JOBS'] is True
+        assert runner._scheduler_lock is not None
+        # A second app in the same process reuses the runner's schedule
+        assert runner.schedule_daily_jobs(DAILY) is True
+    finally:
+        runner.shutdown()
+
+
+def test_only_one_runner_per_queue_schedules(tmp_path):
+    first = JobRunner(str(tmp_path))
+    second = JobRunner(str(tmp_path))
+    threads = len(_daily_threads())
+    try:
+        assert first.schedule_daily_jobs(DAILY) is True
+        assert second.schedule_daily_jobs(DAILY) is False
+        assert len(_daily_threads()) == threads + 1
+        # The schedule moves on once the holder stops
+        first.shutdown()
+        assert second.schedule_daily_jobs(DAILY) is True
+    finally:
+        first.shutdown()
+        second.shutdown()
@@ -0,0 +1,85 @@
+"""Event bus, Server-Sent Events encoding and the notification stream."""
+
+import json
+
+from app.services.event_service import EventBus, bus, user_channel
+from app.services.notification_store_service import add_notifications, new_notification
+from app.utils.sse import format_event, stream_subscription
+
+
+def _events(chunks):
+    """Parse SSE text chunks into [(type, data)] (comments and retry lines skipped)."""
+    events = []
+    for chunk in chunks:
+        chunk = chunk.decode() if isinstance(chunk, bytes) else chunk
+        fields = dict(line.split(': ', 1) for line in chunk.strip().splitlines() if not line.startswith(':'))
+        if 'event' in fields:
+            events.append((fields['event'], json.loads(fields['data'])))
+    return events
+
+
+def test_publish_fans_out_to_channel_subscribers_only():
+    events = EventBus()
+    first, second = events.subscribe('user:1'), events.subscribe('user:1')
+    other = events.subscribe('user:2')
+    assert events.publish('user:1', 'ping', {'n': 1}) == 2
+    assert first.get(0)[1:] == ('ping', {'n': 1}) and second.get(0)[1:] == ('ping', {'n': 1})
+    assert other.get(0) is None
+    first.close()
+    assert events.subscriber_count('user:1') == 1
+    assert events.publish('nobody', 'ping', {}) == 0
+
+
+def test_slow_subscriber_is_dropped_not_buffered():
+    events = EventBus()
+    slow = events.subscribe('c', max_queue=2)
+    for n in range(3):
+        events.publish('c', 'tick', {'n': n})
+    assert slow.overflowed and events.subscriber_count('c') == 0
+
+    small = events.subscribe('c', max_bytes=20)
+    assert events.publish('c', 'big', {'text': 'x' * 50}) == 0
+    assert small.overflowed
+
+
+def test_event_ids_increase():
+    events = EventBus()
+    subscription = events.subscribe('c')
+    events.publish('c', 'a', {})
+    events.publish('c', 'b', {})
+    assert subscription.get(0)[0] < subscription.get(0)[0]
+
+
+def test_sse_encoding_and_stream_end_on_overflow():
+    assert format_event('unread', {'count': 2}, 7) == 'id: 7\nevent: unread\ndata: {"count":2}\n\n'
+    events = EventBus()
+    subscription = events.subscribe('c', max_queue=1)
+    events.publish('c', 'first', {'n': 1})
+    stream = stream_subscription(subscription, [('hello', {})])
+    assert next(stream) == 'retry: 3000\n\n'
+    assert _events([next(stream), next(stream)]) == [('hello', {}), ('first', {'n': 1})]
+    events.publish('c', 'second', {})
+    events.publish('c', 'third', {})
+    # Dropped: the stream ends so the browser reconnects and resyncs
+    assert list(stream) == []
+    assert events.subscriber_count('c') == 0
+
+
+def test_notification_stream_pushes_notifications_and_unread_counts(login):
+    response = login(2).get('/api/notifications/stream', buffered=False)
+    assert response.mimetype == 'text/event-stream'
+    assert response.headers['X-Accel-Buffering'] == 'no'
+    chunks = response.iter_encoded()
+    next(chunks)  # retry
+    assert _events([next(chunks)]) == [('unread', {'count': 0})]
+    assert bus.subscriber_count(user_channel(2)) == 1
+
+    add_notifications(None, [new_notification(2, 'mention', 'You were mentioned', card_id=1)])
+    (kind, notification), = _events([next(chunks)])
+    assert kind == 'notification' and notification['message'] == 'You were mentioned'
+    assert _events([next(chunks)]) == [('unread', {'count': 1})]
+
+    assert login(2).post('/api/notifications/mark_all_read').get_json()['updated'] == 1
+    assert _events([next(chunks)]) == [('unread', {'count': 0})]
+    response.close()
+    assert bus.subscriber_count(user_channel(2)) == 0
@@ -0,0 +1,88 @@
+"""Fragment caching of kanban cards, board columns and issue table rows."""
+
+import pytest
+
+from app.services import fragment_cache_service
+from app.services.fragment_cache_service import (
+    FragmentCache, comment_counts, render_board_columns, render_card, render_issue_rows
+)
+
+
+@pytest.fixture
+def caches(monkeypatch):
+    for name, size in (('card_fragments', 100), ('column_fragments', 100), ('row_fragments', 100)):
+        monkeypatch.setattr(fragment_cache_service, name, FragmentCache(max_entries=size))
+    return fragment_cache_service
+
+
+def _card(**fields):
+    card = {'id': 1, 'title': 'Cached card', 'description': '', 'project_id': 1, 'status': 'todo',
+            'priority': 'Medium', 'labels': [], 'assignee': '', 'due_date': '', 'created_at': ''}
+    card.update(fields)
+    return card
+
+
+def test_lru_evicts_least_recently_used():
+    cache = FragmentCache(max_entries=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+    assert cache.get('b') is None and cache.get('a') == 1 and cache.get('c') == 3
+    assert (cache.hits, cache.misses) == (3, 1)
+
+
+def test_comment_counts_in_one_pass():
+    comments = [{'card_id': 1}, {'card_id': 1}, {'card_id': 3}]
+    assert comment_counts(comments, [1, 2]) == {1: 2, 2: 0}
+
+
+def test_card_fragment_is_reused_until_the_card_changes(app, caches):
+    with app.app_context():
+        first = render_card(_card())
+        assert render_card(_card()) is first
+        edited = render_card(_card(title='Renamed'))
+    assert 'Renamed' in edited and edited is not first
+    assert caches.card_fragments.hits == 1
+
+
+def test_columns_are_keyed_by_project_version(app, caches):
+    with app.app_context():
+        columns = render_board_columns(1, 'v1', {'todo': [_card()]})
+        assert render_board_columns(1, 'v1', {'todo': [_card(title='Ignored')]})['todo'] is columns['todo']
+        assert 'Renamed' in render_board_columns(1, 'v2', {'todo': [_card(title='Renamed')]})['todo']
+    assert columns['done'] == ''
+
+
+def test_issue_rows_miss_only_for_changed_inputs(app, caches):
+    projects = [{'id': 1, 'name': 'Alpha'}]
+    data = {'comments': []}
+    cards = [_card(), _card(id=2, title='Other')]
+    with app.app_context():
+        rows = render_issue_rows('issues', cards, data, projects)
+        assert 'Alpha' in rows[0] and '💬 0' in rows[0]
+        again = render_issue_rows('issues', [_card(), _card(id=2, title='Changed')], data, projects)
+        assert again[0] is rows[0] and 'Changed' in again[1]
+        # A new comment or a renamed project changes what the row shows
+        with_comment = render_issue_rows('issues', cards[:1], {'comments': [{'card_id': 1}]}, projects)
+        assert '💬 1' in with_comment[0]
+        renamed = render_issue_rows('issues', cards[:1], data, [{'id': 1, 'name': 'Beta'}])
+        assert 'Beta' in renamed[0]
+        # Backlog rows use their own layout
+        assert 'updateStoryPoints' in render_issue_rows('backlog', cards[:1], data, projects)[0]
+    assert caches.row_fragments.hits == 1
+
+
+def test_issue_pages_render_cached_rows(login, caches):
+    client = login(1)
+    first = client.get('/issues').get_data(as_text=True)
+    misses = caches.row_fragments.misses
+    assert client.get('/issues').get_data(as_text=True) == first
+    assert caches.row_fragments.misses == misses and caches.row_fragments.hits >= misses
+
+    card = client.get('/api/issues?limit=1').get_json()['cards'][0]
+    client.post('/api/update_card_status', json={'card_id': card['id'], 'status': 'in_progress'})
+    page = client.get('/issues').get_data(as_text=True)
+    assert caches.row_fragments.misses == misses + 1
+    assert page != first
+    assert 'updateStoryPoints' in client.get('/backlog').get_data(as_text=True)
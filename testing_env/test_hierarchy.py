@@ -0,0 +1,63 @@
+"""Project hierarchy building and per-project invalidation."""
+
+from app.services import hierarchy_service
+from app.services.hierarchy_service import build_hierarchy, get_hierarchy
+from app.services.version_service import bump_data_version, get_project_version
+
+
+DATA = {
+    'projects': [{'id': 1, 'name': 'One'}, {'id': 2, 'name': 'Two'}],
+    'epics': [{'id': 10, 'project_id': 1}, {'id': 20, 'project_id': 2}],
+    'stories': [
+        {'id': 100, 'project_id': 1, 'epic_id': 10},
+        {'id': 101, 'project_id': 1, 'epic_id': 20},  # epic belongs to another project
+    ],
+    'cards': [
+        {'id': 1, 'project_id': 1, 'story_id': 100},
+        {'id': 2, 'project_id': 1, 'story_id': 101},
+        {'id': 3, 'project_id': 1, 'story_id': None},
+        {'id': 4, 'project_id': 2, 'story_id': 100},
+    ],
+}
+
+
+def test_tree_with_orphans():
+    tree = build_hierarchy(DATA, 1)
+    assert [e['id'] for e in tree['epics']] == [10]
+    story = tree['epics'][0]['stories'][0]
+    assert story['id'] == 100 and [c['id'] for c in story['issues']] == [1]
+    assert [s['id'] for s in tree['orphaned_stories']] == [101]
+    assert [c['id'] for c in tree['orphaned_stories'][0]['issues']] == [2]
+    assert [c['id'] for c in tree['orphaned_issues']] == [3]
+    # The loaded data is not modified
+    assert 'stories' not in DATA['epics'][0]
+    assert build_hierarchy(DATA, 3) is None
+
+
+def test_cache_is_invalidated_per_project(monkeypatch):
+    monkeypatch.setattr(hierarchy_service, '_cache', {})
+    loads = []
+
+    def loader():
+        loads.append(1)
+        return DATA
+
+    first, version = get_hierarchy(1, loader)
+    assert get_hierarchy(1, loader)[0] is first and len(loads) == 1
+    bump_data_version(2)
+    assert get_hierarchy(1, loader)[0] is first and len(loads) == 1
+    bump_data_version(1)
+    assert get_hierarchy(1, loader)[1] == get_project_version(1) != version
+    assert len(loads) == 2
+    bump_data_version()
+    get_hierarchy(1, loader)
+    assert len(loads) == 3
+
+
+def test_hierarchy_endpoint(login):
+    client = login(1)
+    response = client.get('/api/projects/1/hierarchy')
+    body = response.get_json()
+    assert body['success'] and body['project_id'] == 1
+    assert response.headers['ETag']
+    assert client.get('/api/projects/999/hierarchy').get_json()['success'] is False
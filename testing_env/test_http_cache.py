@@ -0,0 +1,81 @@
+"""Conditional GET: ETags, 304 responses and invalidation on writes."""
+
+import os
+
+from app.services import version_service
+from app.services.version_service import LocalVersionStore, bump_data_version
+from app.utils.http_cache import make_etag
+
+
+def test_make_etag_depends_on_every_part():
+    assert make_etag('v1', '/a') == make_etag('v1', '/a')
+    assert make_etag('v1', '/a') != make_etag('v2', '/a')
+    assert make_etag('v1', '/a', None) != make_etag('v1', '/a', '1')
+
+
+def test_current_client_gets_304_until_a_write(login):
+    client = login(1)
+    response = client.get('/api/team_members')
+    etag = response.headers['ETag']
+    assert response.status_code == 200
+    assert response.headers['Cache-Control'] == 'private, no-cache'
+
+    cached = client.get('/api/team_members', headers={'If-None-Match': etag})
+    assert cached.status_code == 304 and cached.data == b''
+    assert cached.headers['ETag'] == etag
+
+    bump_data_version()
+    fresh = client.get('/api/team_members', headers={'If-None-Match': etag})
+    assert fresh.status_code == 200 and fresh.headers['ETag'] != etag
+
+
+def test_query_string_is_part_of_the_etag(login):
+    client = login(1)
+    etag = client.get('/api/team_members').headers['ETag']
+    assert client.get('/api/team_members?x=1').headers['ETag'] != etag
+
+
+def test_project_etag_ignores_writes_to_other_projects(login):
+    client = login(1)
+    etag = client.get('/api/projects/1/hierarchy').headers['ETag']
+    bump_data_version(2)
+    assert client.get('/api/projects/1/hierarchy', headers={'If-None-Match': etag}).status_code == 304
+    bump_data_version(1)
+    assert client.get('/api/projects/1/hierarchy', headers={'If-None-Match': etag}).status_code == 200
+
+
+def test_per_user_etags_differ(login):
+    first = login(1).get('/api/notifications').headers['ETag']
+    second = login(2).get('/api/notifications').headers['ETag']
+    assert first != second
+    assert login(2).get('/api/notifications', headers={'If-None-Match': first}).status_code == 200
+
+
+def test_error_payloads_get_no_validators(login):
+    response = login(1).get('/api/projects/999/hierarchy')
+    assert response.get_json()['success'] is False
+    assert 'ETag' not in response.headers
+
+
+def test_versions_are_shared_between_processes(tmp_path):
+    path = str(tmp_path / 'versions.json')
+    this, other = LocalVersionStore(path), LocalVersionStore(path)
+    assert this.state()['epoch'] == other.state()['epoch'] != '0'
+    other.bump(2)
+    other.bump(None)
+    assert this.state()['version'] == 2 and this.state()['projects'] == {'2': 1}
+    # Counters deleted: the new epoch keeps old versions from coming back
+    epoch = this.state()['epoch']
+    os.remove(path)
+    assert LocalVersionStore(path).state()['epoch'] != epoch
+
+
+def test_write_in_another_worker_invalidates_etags(login, workdir, monkeypatch):
+    client = login(1)
+    etag = client.get('/api/team_members').headers['ETag']
+    assert client.get('/api/team_members', headers={'If-None-Match': etag}).status_code == 304
+
+    # Another worker writes: same counters file, a store this process never used
+    LocalVersionStore(os.path.join('data', 'versions.json')).bump(None)
+    assert version_service._store.path == os.path.join('data', 'versions.json')
+    assert client.get('/api/team_members', headers={'If-None-Match': etag}).status_code == 200
@@ -0,0 +1,194 @@
+"""Background job runner: persistence, retries and metrics."""
+
+import json
+import os
+import threading
+import time
+
+import pytest
+
+from app.services import job_service
+from app.services.job_service import JobRunner, job_handler, retry_delay
+
+
+calls = []
+flaky_failures = {'left': 0}
+release = threading.Event()
+
+
+@job_handler('test_record')
+def record(payload):
+    calls.append(payload)
+
+
+@job_handler('test_flaky', max_attempts=3)
+def flaky(payload):
+    if flaky_failures['left'] > 0:
+        flaky_failures['left'] -= 1
+        raise RuntimeError('temporary')
+    calls.append(payload)
+
+
+@job_handler('test_broken', max_attempts=2)
+def broken(payload):
+    raise ValueError('always broken')
+
+
+@job_handler('test_blocking')
+def blocking(payload):
+    release.wait(5)
+    calls.append(payload)
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.time() + timeout
+    while not condition():
+        if time.time() > deadline:
+            raise AssertionError('timed out')
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def runner(tmp_path, monkeypatch):
+    calls.clear()
+    release.clear()
+    monkeypatch.setattr(job_service, 'retry_delay', lambda attempts: 0.01)
+    job_runner = JobRunner(str(tmp_path / 'jobs'), workers=2)
+    yield job_runner
+    release.set()
+    job_runner.shutdown()
+
+
+def test_retry_delay_doubles_and_is_capped():
+    assert 1 <= retry_delay(1) <= 2
+    assert 4 <= retry_delay(3) <= 8
+    assert retry_delay(30) <= job_service.RETRY_MAX_SECONDS
+
+
+def test_job_runs_and_leaves_nothing_pending(runner):
+    runner.enqueue('test_record', {'n': 1})
+    wait_for(lambda: calls == [{'n': 1}] and runner.pending_count() == 0)
+    assert runner.metrics.snapshot()['test_record']['succeeded'] == 1
+
+
+def test_unknown_job_type_is_rejected(runner):
+    with pytest.raises(ValueError):
+        runner.enqueue('no_such_job')
+
+
+def test_failed_attempts_are_retried(runner):
+    flaky_failures['left'] = 2
+    runner.enqueue('test_flaky', {'n': 2})
+    wait_for(lambda: calls == [{'n': 2}])
+    counts = runner.metrics.snapshot()['test_flaky']
+    assert (counts['retried'], counts['succeeded'], counts['failed']) == (2, 1, 0)
+
+
+def test_exhausted_job_moves_to_failed_with_error(runner):
+    job_id = runner.enqueue('test_broken')
+    path = os.path.join(runner.failed_dir, f'{job_id}.json')
+    wait_for(lambda: os.path.exists(path))
+    with open(path) as f:
+        job = json.load(f)
+    assert job['attempts'] == 2
+    assert job['last_error'] == 'ValueError: always broken'
+    assert 'Traceback' in job['traceback']
+    wait_for(lambda: runner.pending_count() == 0)
+
+
+def test_delayed_job_waits_for_its_time(runner):
+    runner.enqueue('test_record', {'n': 'later'}, delay=0.3)
+    time.sleep(0.1)
+    assert calls == []
+    wait_for(lambda: calls == [{'n': 'later'}])
+
+
+def test_unfinished_jobs_resume_after_a_restart(tmp_path, runner):
+    runner.enqueue('test_blocking', {'n': 'interrupted'})
+    assert runner.pending_count() == 1
+    # The process "stops" before the job finishes: its file stays behind and its lock is released
+    runner._owner_lock.close()
+    restarted = JobRunner(str(tmp_path / 'jobs'), workers=1)
+    try:
+        restarted.start()
+        assert sorted(os.listdir(restarted.owners_dir)) == [restarted.owner, restarted.owner + '.lock']
+        release.set()
+        wait_for(lambda: restarted.pending_count() == 0)
+        assert {'n': 'interrupted'} in calls
+    finally:
+        restarted.shutdown()
+
+
+def test_live_runners_never_take_each_others_jobs(tmp_path, runner):
+    runner.enqueue('test_blocking', {'n': 'mine'})
+    other = JobRunner(str(tmp_path / 'jobs'), workers=1)
+    try:
+        other.start()
+        assert other.metrics.snapshot() == {}
+        release.set()
+        wait_for(lambda: runner.pending_count() == 0)
+        other.shutdown()
+        assert calls == [{'n': 'mine'}]
+    finally:
+        other.shutdown()
+
+
+def test_each_pending_job_is_claimed_once(tmp_path):
+    calls.clear()
+    pending = tmp_path / 'jobs' / 'pending'
+    pending.mkdir(parents=True)
+    for n in range(20):
+        job = {'id': f'job{n:02d}', 'type': 'test_record', 'payload': {'n': n}, 'attempts': 0, 'run_at': 0}
+        (pending / f"{job['id']}.json").write_text(json.dumps(job))
+    runners = [JobRunner(str(tmp_path / 'jobs'), workers=2) for _ in range(3)]
+    threads = [threading.Thread(target=r.start) for r in runners]
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        wait_for(lambda: runners[0].pending_count() == 0)
+        for r in runners:
+            r.shutdown()
+        assert sorted(c['n'] for c in calls) == list(range(20))
+    finally:
+        for r in runners:
+            r.shutdown()
+
+
+def test_jobs_run_inside_the_app_context(app):
+    seen = []
+
+    @job_handler('test_app_context')
+    def needs_app(payload):
+        from flask import current_app
+        seen.append(current_app.name)
+
+    job_service.enqueue('test_app_context')
+    wait_for(lambda: seen)
+    assert seen == [app.name]
+    assert job_service.job_metrics()['jobs']['test_app_context']['succeeded'] == 1
+
+
+def test_assignee_notification_goes_to_the_cards_assignee(login, monkeypatch):
+    from app.routes import issues
+    from app.services import job_handlers
+    from app.services.notification_store_service import get_notification_store
+
+    enqueued = []
+    monkeypatch.setattr(issues, 'enqueue', lambda job_type, payload: enqueued.append(payload) or 'job')
+    client = login(2)
+    # Recipient and text in the request are ignored
+    for card_id in (1, 4):
+        assert client.post('/api/send_to_assignee', json={
+            'card_id': card_id, 'assignee': 'admin', 'message': '<img src=x onerror=alert(1)>'
+        }).get_json()['success']
+    assert enqueued == [{'card_id': 1, 'sender': 'testuser1'}, {'card_id': 4, 'sender': 'testuser1'}]
+
+    for payload in enqueued:
+        job_handlers.notify_assignee(payload)
+    # Card 1's assignee has no account; card 4 is assigned to admin
+    notifications, _ = get_notification_store(None).list(1, 10)
+    assert [(n['card_id'], n['message']) for n in notifications] == [
+        (4, 'testuser1 sent you #4: Test Card with Labels')
+    ]
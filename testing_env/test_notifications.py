@@ -0,0 +1,76 @@
+"""Per-user notification storage, unread counters and notification ETags."""
+
+import pytest
+
+from app.services import notification_store_service
+from app.services.notification_store_service import LocalNotificationStore, new_notification
+
+
+@pytest.fixture
+def store(tmp_path):
+    return LocalNotificationStore(str(tmp_path / 'notifications'))
+
+
+def _add(store, user_id, message, created_at):
+    notification = dict(new_notification(user_id, 'mention', message), created_at=created_at)
+    store.add_many([notification])
+    return notification
+
+
+def test_unread_counter_follows_changes(store):
+    first = _add(store, 1, 'first', '2024-01-01 10:00:00')
+    _add(store, 1, 'second', '2024-01-01 11:00:00')
+    _add(store, 2, 'other user', '2024-01-01 12:00:00')
+    assert store.unread_count(1) == 2 and store.unread_count(2) == 1
+    assert store.mark_read(1, first['id']) is True
+    assert store.mark_read(1, first['id']) is False
+    assert store.mark_read(1, 'missing') is None
+    assert store.unread_count(1) == 1
+    assert store.mark_all_read(1) == 1 and store.unread_count(1) == 0
+    assert store.mark_all_read(1) == 0
+
+
+def test_list_is_newest_first_and_paged(store):
+    for hour in range(10, 15):
+        _add(store, 1, f'at {hour}', f'2024-01-01 {hour}:00:00')
+    page, cursor = store.list(1, 2)
+    assert [n['message'] for n in page] == ['at 14', 'at 13']
+    page, cursor = store.list(1, 3, cursor)
+    assert [n['message'] for n in page] == ['at 12', 'at 11', 'at 10'] and cursor is None
+
+
+def test_version_survives_a_restart(store, tmp_path):
+    _add(store, 1, 'hello', '2024-01-01 10:00:00')
+    version = store.version(1)
+    restarted = LocalNotificationStore(str(tmp_path / 'notifications'))
+    assert restarted.version(1) == version
+    assert restarted.unread_count(1) == 1
+    assert store.version(2) == restarted.version(2) == '0'
+
+
+def test_writes_by_another_process_are_seen(store, tmp_path):
+    other_process = LocalNotificationStore(str(tmp_path / 'notifications'))
+    _add(store, 1, 'first', '2024-01-01 10:00:00')
+    before = other_process.version(1)
+    assert other_process.unread_count(1) == 1
+    _add(store, 1, 'second', '2024-01-01 11:00:00')
+    assert other_process.version(1) != before
+    assert other_process.unread_count(1) == 2
+    assert other_process.mark_all_read(1) == 2
+    assert store.unread_count(1) == 0 and store.version(1) == other_process.version(1)
+
+
+def test_etag_stays_valid_across_restarts_but_not_writes(login, monkeypatch):
+    client = login(2)
+    etag = client.get('/api/notifications').headers['ETag']
+    # A restarted worker has a fresh store but the same persisted version
+    monkeypatch.setattr(notification_store_service, '_store', None)
+    assert client.get('/api/notifications', headers={'If-None-Match': etag}).status_code == 304
+
+    # A write from another worker invalidates this worker's ETag
+    LocalNotificationStore().add_many([new_notification(2, 'mention', 'from another worker')])
+    response = client.get('/api/notifications', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['unread_count'] == 1
+    assert body['notifications'][0]['message'] == 'from another worker'
@@ -0,0 +1,93 @@
+"""Cursor pagination helpers and how the list APIs treat bad cursors."""
+
+import pytest
+
+from app.utils.pagination import (
+    InvalidCursor, decode_cursor, encode_cursor, get_page_args, paginate, sort_and_paginate
+)
+
+
+def _items(ids):
+    return [{'id': i} for i in ids]
+
+
+def test_cursor_round_trip():
+    position = ['2024-01-01 10:00:00', 42]
+    cursor = encode_cursor(position)
+    assert '=' not in cursor
+    assert decode_cursor(cursor) == position
+    assert decode_cursor(None) is None
+
+
+@pytest.mark.parametrize('cursor', ['not a cursor!', encode_cursor({'id': 1})[:-2] + '$$', 'eyJpZCI6IDF9'])
+def test_malformed_cursor_is_rejected(cursor):
+    with pytest.raises(InvalidCursor):
+        decode_cursor(cursor)
+
+
+def test_pages_cover_every_item_once():
+    items = _items(range(1, 11))
+    seen, cursor = [], None
+    while True:
+        page, cursor = paginate(items, 3, cursor)
+        seen.extend(item['id'] for item in page)
+        if cursor is None:
+            break
+    assert seen == list(range(1, 11))
+
+
+def test_cursor_stays_stable_when_items_change():
+    page, cursor = paginate(_items([1, 2, 3, 4, 5]), 2)
+    assert [i['id'] for i in page] == [1, 2]
+    # Item 2 deleted and item 0 inserted before the next request
+    page, _ = paginate(_items([0, 1, 3, 4, 5]), 2, cursor)
+    assert [i['id'] for i in page] == [3, 4]
+
+
+def test_descending_pages():
+    page, cursor = sort_and_paginate(_items([3, 1, 2]), 2, reverse=True)
+    assert [i['id'] for i in page] == [3, 2]
+    page, cursor = sort_and_paginate(_items([3, 1, 2]), 2, cursor, reverse=True)
+    assert [i['id'] for i in page] == [1]
+    assert cursor is None
+
+
+def test_cursor_from_another_listing_is_rejected():
+    cursor = encode_cursor(['not-a-number'])
+    with pytest.raises(InvalidCursor):
+        paginate(_items([1, 2, 3]), 2, cursor)
+
+
+def test_page_size_is_clamped():
+    assert get_page_args(_Args({'limit': '1000'})) == (200, None)
+    assert get_page_args(_Args({'limit': '0', 'cursor': 'abc'})) == (50, 'abc')
+
+
+class _Args(dict):
+    """Minimal stand-in for request.args (get with type=)."""
+
+    def get(self, key, default=None, type=None):
+        if key not in self:
+            return default
+        return type(self[key]) if type else self[key]
+
+
+@pytest.mark.parametrize('url', [
+    '/api/issues?cursor=%%%',
+    '/api/search?q=setup&cursor=%%%',
+    '/api/card/1/comments?cursor=%%%',
+    '/api/activity_feed?cursor=abc',
+    '/api/card/1/history?cursor=abc',
+])
+def test_bad_cursor_is_a_client_error(login, url):
+    response = login(1).get(url)
+    assert response.status_code == 400
+    assert response.get_json() == {'success': False, 'error': 'Invalid cursor'}
+
+
+def test_issue_pages_follow_next_cursor(login):
+    client = login(1)
+    first = client.get('/api/issues?limit=2').get_json()
+    assert first['success'] and len(first['cards']) == 2
+    second = client.get(f"/api/issues?limit=2&cursor={first['next_cursor']}").get_json()
+    assert not {c['id'] for c in first['cards']} & {c['id'] for c in second['cards']}
@@ -0,0 +1,56 @@
+"""Gantt progress aggregation and its per-version cache."""
+
+from app.services import progress_service
+from app.services.progress_service import compute_progress, get_progress, progress_to_json
+from app.services.version_service import bump_data_version
+
+
+DATA = {
+    'projects': [{'id': 1}, {'id': 2}],
+    'cards': [
+        {'id': 1, 'project_id': 1, 'epic_id': 10, 'status': 'done'},
+        {'id': 2, 'project_id': 1, 'epic_id': 10, 'status': 'todo'},
+        {'id': 3, 'project_id': 1, 'epic_id': None, 'status': 'done'},
+    ],
+}
+
+
+def test_project_and_epic_totals_in_one_pass():
+    progress = compute_progress(DATA)
+    assert progress[1]['total'] == 3 and progress[1]['done'] == 2 and progress[1]['percent'] == 66.7
+    assert progress[1]['epics'][10] == {'total': 2, 'done': 1, 'percent': 50.0}
+    assert progress[1]['epics'][None]['percent'] == 100.0
+    # Projects without cards are reported at 0%
+    assert progress[2] == {'total': 0, 'done': 0, 'epics': {}, 'percent': 0}
+
+
+def test_json_form_has_no_none_keys():
+    projects = progress_to_json(compute_progress(DATA))
+    assert [p['project_id'] for p in projects] == [1, 2]
+    assert {e['epic_id'] for e in projects[0]['epics']} == {10, None}
+
+
+def test_cached_until_the_data_version_changes(monkeypatch):
+    monkeypatch.setattr(progress_service, '_cache', {'version': None, 'progress': None})
+    loads = []
+
+    def loader():
+        loads.append(1)
+        return DATA
+
+    first, version = get_progress(loader)
+    again, same_version = get_progress(loader)
+    assert again is first and same_version == version and len(loads) == 1
+    bump_data_version()
+    _, new_version = get_progress(loader)
+    assert new_version != version and len(loads) == 2
+
+
+def test_gantt_progress_endpoint_reflects_writes(login):
+    client = login(1)
+    before = {p['project_id']: p for p in client.get('/api/gantt/progress').get_json()['projects']}
+    card = client.post('/api/add_card', json={'title': 'Progress', 'project_id': 1}).get_json()['card']
+    client.post('/api/update_card_status', json={'card_id': card['id'], 'status': 'done'})
+    after = {p['project_id']: p for p in client.get('/api/gantt/progress').get_json()['projects']}
+    assert after[1]['total'] == before[1]['total'] + 1
+    assert after[1]['done'] == before[1]['done'] + 1
@@ -0,0 +1,161 @@
+"""Background analytics reports: the content-keyed cache, failures and status expiry."""
+
+import os
+import time
+
+import pytest
+
+from app.services import report_service
+from app.services.report_service import (
+    REPORT_DIR, ReportFailed, cached_report_path, generate_report, job_report_key, load_report, report_status,
+    request_report
+)
+from app.services.version_service import bump_data_version
+
+
+DATA = {
+    'projects': [{'id': 1, 'name': 'Apollo'}],
+    'cards': [{'id': 1, 'project_id': 1, 'status': 'todo', 'assignee': 'ann', 'due_date': '2000-01-01'}],
+    'sprints': []
+}
+
+
+@pytest.fixture(autouse=True)
+def statuses(monkeypatch):
+    monkeypatch.setattr(report_service, '_status', {})
+    monkeypatch.setattr(report_service, '_job_keys', {})
+
+
+class Queue:
+    """Stand-in for the job runner: records payloads, runs nothing."""
+
+    def __init__(self):
+        self.payloads = []
+
+    def __call__(self, payload):
+        self.payloads.append(payload)
+        return f'job{len(self.payloads)}'
+
+
+def test_report_is_built_once_per_data_version(workdir):
+    queue = Queue()
+    key, job_id = request_report('risk-assessment', queue)
+    assert job_id == 'job1' and job_report_key('job1') == key
+    # A second request joins the queued job
+    assert request_report('risk-assessment', queue) == (key, 'job1')
+
+    report = generate_report(queue.payloads[0], lambda: DATA)
+    assert report_status(key)['state'] == 'done'
+    assert request_report('risk-assessment', queue) == (key, None)
+    assert load_report(key)['risks'] == report['risks'] == [
+        {'kind': 'project', 'name': 'Apollo', 'severity': 'high', 'reason': '1 overdue card'},
+        {'kind': 'resource', 'name': 'ann', 'severity': 'medium', 'reason': '1 overdue card'}]
+    with open(cached_report_path(key, 'csv')) as f:
+        assert f.read().splitlines() == ['Kind,Name,Severity,Reason', 'project,Apollo,high,1 overdue card',
+                                         'resource,ann,medium,1 overdue card']
+
+    bump_data_version()
+    new_key, new_job = request_report('risk-assessment', queue)
+    assert new_key != key and new_job == 'job2'
+
+
+def test_failed_report_is_reported_until_the_retry_window_passes(workdir, monkeypatch):
+    queue = Queue()
+    key, _ = request_report('project-health', queue)
+    monkeypatch.setitem(report_service.REPORT_BUILDERS, 'project-health', lambda *args: 1 / 0)
+    with pytest.raises(ZeroDivisionError):
+        generate_report(queue.payloads[0], lambda: DATA)
+
+    with pytest.raises(ReportFailed) as failure:
+        request_report('project-health', queue)
+    assert str(failure.value) == 'division by zero'
+    assert 0 < failure.value.retry_after <= report_service.REPORT_RETRY_SECONDS
+    assert len(queue.payloads) == 1
+
+    report_service._status[key]['updated_at'] -= report_service.REPORT_RETRY_SECONDS
+    assert request_report('project-health', queue) == (key, 'job2')
+    # The failed job's id no longer resolves
+    assert job_report_key('job1') is None
+
+
+def test_finished_statuses_expire(workdir, monkeypatch):
+    queue = Queue()
+    keys = [request_report(report_type, queue)[0] for report_type in sorted(report_service.REPORT_BUILDERS)]
+    for payload in queue.payloads[:3]:
+        generate_report(payload, lambda: DATA)
+    report_service._status[keys[0]]['updated_at'] -= report_service.REPORT_STATUS_TTL + 1
+
+    bump_data_version()
+    request_report('risk-assessment', queue)
+    assert report_status(keys[0]) is None and job_report_key('job1') is None
+    # Still queued: never expired
+    assert report_status(keys[3])['state'] == 'queued'
+
+    monkeypatch.setattr(report_service, 'REPORT_STATUS_LIMIT', 3)
+    bump_data_version()
+    request_report('risk-assessment', queue)
+    assert report_status(keys[1]) is None and report_status(keys[2]) is None
+    assert len(report_service._status) == 3 and len(report_service._job_keys) == 3
+
+
+def test_lost_jobs_are_replaced(workdir):
+    queue = Queue()
+    key = request_report('project-health', queue)[0]
+    # The job never reports back: lost to a restart or run by another process
+    report_service._status[key]['updated_at'] -= report_service.REPORT_JOB_TIMEOUT + 1
+    lost = report_status(key)
+    assert lost['state'] == 'failed' and lost['error'] == 'Report job stopped responding'
+
+    # Not a failed build: a new job is queued at once instead of raising ReportFailed
+    assert request_report('project-health', queue) == (key, 'job2')
+    assert job_report_key('job1') is None and report_status(key)['state'] == 'queued'
+    assert request_report('project-health', queue) == (key, 'job2')
+
+
+def _wait_done(client, status_url):
+    deadline = time.time() + 5
+    while client.get(status_url).get_json()['state'] not in ('done', 'failed'):
+        assert time.time() < deadline
+        time.sleep(0.01)
+
+
+def test_report_api_builds_then_serves_from_the_cache(login):
+    client = login(1)
+    queued = client.get('/api/analytics/report/resource-utilization')
+    assert queued.status_code == 202
+    body = queued.get_json()
+    _wait_done(client, body['status_url'])
+
+    report = client.get('/api/analytics/report/resource-utilization').get_json()
+    assert report['cached'] is True and report['report_id'] == body['report_id']
+    csv = client.get('/api/analytics/report/resource-utilization?format=csv')
+    assert csv.status_code == 200 and csv.data.startswith(b'Assignee,Utilization %')
+    csv.close()
+    assert client.get('/api/analytics/report/nope').status_code == 404
+    assert client.get('/api/analytics/report/risk-assessment?format=xml').status_code == 400
+
+
+def test_report_api_rebuilds_unreadable_reports(login):
+    client = login(1)
+    first = client.get('/api/analytics/report/risk-assessment').get_json()
+    _wait_done(client, first['status_url'])
+    key = first['report_id']
+    with open(os.path.join(REPORT_DIR, f'{key}.json'), 'w') as f:
+        f.write('{"truncated')
+
+    again = client.get('/api/analytics/report/risk-assessment')
+    assert again.status_code == 202 and again.get_json()['job_id'] != first['job_id']
+    _wait_done(client, again.get_json()['status_url'])
+    assert client.get('/api/analytics/report/risk-assessment').get_json()['cached'] is True
+
+
+def test_report_api_surfaces_failures(login, monkeypatch):
+    monkeypatch.setitem(report_service.REPORT_BUILDERS, 'risk-assessment', lambda *args: {}['rows'])
+    client = login(1)
+    first = client.get('/api/analytics/report/risk-assessment').get_json()
+    _wait_done(client, first['status_url'])
+
+    failed = client.get('/api/analytics/report/risk-assessment')
+    assert failed.status_code == 503
+    assert failed.get_json()['status'] == 'failed' and failed.get_json()['error'] == "'rows'"
+    assert int(failed.headers['Retry-After']) == failed.get_json()['retry_after'] > 0
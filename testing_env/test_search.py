@@ -0,0 +1,170 @@
+"""Search indexes and the /api/search endpoint."""
+
+import threading
+
+from app.routes import api as api_routes
+from app.services import search_service
+from app.services.search_service import SearchIndex, TrigramIndex, doc_key, edit_distance
+
+
+DATA = {
+    'cards': [
+        {'id': 1, 'title': 'Login page', 'description': 'Fix the authentication redirect', 'project_id': 1},
+        {'id': 2, 'title': 'Signup form', 'description': 'Login link under the form', 'project_id': 1},
+        {'id': 3, 'title': 'Dashboard charts', 'description': 'Render totals', 'project_id': 2},
+    ],
+    'epics': [{'id': 1, 'name': 'Authentication', 'description': 'Login and signup', 'project_id': 1}],
+    'stories': [],
+    'comments': [{'id': 7, 'card_id': 3, 'content': 'Charts need a login check'}],
+}
+
+
+def _index():
+    index = SearchIndex()
+    index.build(DATA)
+    return index
+
+
+def _ids(matches):
+    return [(doc['type'], doc['id']) for _, doc in matches]
+
+
+def test_title_matches_rank_above_body_matches():
+    results = _ids(_index().search('login'))
+    assert results[0] == ('card', 1)
+    assert set(results) == {('card', 1), ('card', 2), ('epic', 1), ('comment', 7)}
+
+
+def test_prefix_and_all_tokens_must_match():
+    index = _index()
+    assert _ids(index.search('auth')) == _ids(index.search('authentication'))
+    assert _ids(index.search('login redirect')) == [('card', 1)]
+    assert index.search('login nothing') == []
+
+
+def test_type_filter_and_resume_after_sort_key():
+    index = _index()
+    assert _ids(index.search('login', types={'epic'})) == [('epic', 1)]
+    first = index.search('login', limit=2)
+    rest = index.search('login', limit=2, after=first[-1][0])
+    assert len(first) == 2 and len(rest) == 2
+    assert not set(_ids(first)) & set(_ids(rest))
+
+
+def test_updates_and_removal_are_incremental():
+    index = _index()
+    index.add_card({'id': 3, 'title': 'Reporting charts', 'description': '', 'project_id': 2})
+    assert _ids(index.search('dashboard')) == []
+    # The comment result shows its card's new title
+    assert index.docs[doc_key('comment', 7)]['title'] == 'Reporting charts'
+    index.remove_card(3)
+    assert _ids(index.search('charts')) == []
+    assert 'charts' not in index.postings
+
+
+def test_match_ids_per_type():
+    assert _index().match_ids('login', 'card') == {1, 2}
+
+
+def test_api_search_defaults_to_substring_matching(login):
+    client = login(1)
+    # 'etu' only occurs inside the word 'Setup'
+    default = client.get('/api/search?q=etu').get_json()
+    assert default['mode'] == 'substring'
+    assert [(r['type'], r['id']) for r in default['results']] == [('card', 1)]
+    assert client.get('/api/search?q=etu&mode=word').get_json()['results'] == []
+    assert client.get('/api/search?q=setu&mode=word').get_json()['results'][0]['id'] == 1
+
+
+def _trigram_index():
+    index = TrigramIndex()
+    index.build(DATA)
+    return index
+
+
+def test_edit_distance_counts_swaps_and_stops_early():
+    assert edit_distance('login', 'login', 2) == 0
+    assert edit_distance('login', 'lgoin', 2) == 1
+    assert edit_distance('login', 'logins', 2) == 1
+    assert edit_distance('login', 'dashboard', 2) == 3
+
+
+def test_substring_matches_inside_words_in_key_order():
+    index = _trigram_index()
+    assert _ids(index.search_substring('ogi')) == [('card', 1), ('card', 2), ('epic', 1)]
+    assert _ids(index.search_substring('thentic')) == [('card', 1), ('epic', 1)]
+    # Shorter than a trigram: checked against every item
+    assert _ids(index.search_substring('ar')) == [('card', 3)]
+    first = index.search_substring('ogi', limit=1)
+    assert _ids(index.search_substring('ogi', after=first[0][0])) == [('card', 2), ('epic', 1)]
+
+
+def test_fuzzy_tolerates_typos_and_ranks_by_distance():
+    index = _trigram_index()
+    results = index.search_fuzzy('lgoin')
+    assert {(doc['type'], doc['id']) for _, doc in results} == {('card', 1), ('card', 2), ('epic', 1)}
+    assert all(doc['distance'] == 1 for _, doc in results)
+    assert _ids(index.search_fuzzy('dashbord')) == [('card', 3)]
+    assert index.search_fuzzy('xyzzy') == []
+
+
+def test_trigram_updates_are_incremental():
+    index = _trigram_index()
+    index.remove_card(1)
+    assert _ids(index.search_substring('redirect')) == []
+    index.add_card({'id': 9, 'title': 'Redirect loop', 'description': ''})
+    assert _ids(index.search_substring('redirect')) == [('card', 9)]
+    assert 'loop' in index.word_docs
+
+
+def test_trigram_index_builds_in_background_and_keeps_updates(monkeypatch):
+    search_service.reset_search_index()
+    release = threading.Event()
+
+    def slow_loader():
+        release.wait(5)
+        return DATA
+
+    assert search_service.get_trigram_index(slow_loader) is None
+    # Not blocked behind the trigram build
+    assert search_service.get_search_index(lambda: DATA) is not None
+    search_service.index_card({'id': 4, 'title': 'Password reset', 'description': ''})
+    release.set()
+    search_service._trigram_thread.join(5)
+
+    index = search_service.get_trigram_index(slow_loader)
+    assert _ids(index.search_substring('asswor')) == [('card', 4)]
+    search_service.reset_search_index()
+
+
+def test_word_index_keeps_updates_made_during_its_first_build():
+    search_service.reset_search_index()
+    loading, release = threading.Event(), threading.Event()
+
+    def slow_loader():
+        loading.set()
+        release.wait(5)
+        return DATA
+
+    build = threading.Thread(target=search_service.get_search_index, args=(slow_loader,))
+    build.start()
+    loading.wait(5)
+    # Written after the data was read, before the index is published
+    search_service.index_card({'id': 4, 'title': 'Password reset', 'description': ''})
+    search_service.unindex_card(3)
+    release.set()
+    build.join(5)
+
+    index = search_service.get_search_index(lambda: DATA)
+    assert _ids(index.search('password')) == [('card', 4)]
+    assert _ids(index.search('dashboard')) == []
+    assert search_service._index_pending == []
+    search_service.reset_search_index()
+
+
+def test_api_search_uses_word_search_until_trigram_index_is_ready(login, monkeypatch):
+    client = login(1)
+    monkeypatch.setattr(api_routes, 'get_trigram_index', lambda data_loader: None)
+    response = client.get('/api/search?q=setu').get_json()
+    assert response['mode'] == 'word'
+    assert [(r['type'], r['id']) for r in response['results']] == [('card', 1)]
@@ -0,0 +1,131 @@
+"""Sprint snapshots, burndown / burnup and velocity."""
+
+import json
+import os
+from datetime import date, timedelta
+
+import pytest
+
+from app.services import card_index_service, job_handlers
+from app.services.job_handlers import DAILY_JOBS
+from app.services.sprint_analytics_service import (
+    SNAPSHOT_DIR, burndown, load_snapshots, measure, record_snapshot, velocity
+)
+
+
+def _snap(total, remaining, items=0, items_remaining=0):
+    return {'total': total, 'remaining': remaining, 'items': items, 'items_remaining': items_remaining}
+
+
+def _write_snapshots(sprint_id, snapshots):
+    os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+    with open(os.path.join(SNAPSHOT_DIR, f'{sprint_id}.json'), 'w') as f:
+        json.dump(snapshots, f)
+
+
+@pytest.fixture
+def data(workdir, monkeypatch):
+    monkeypatch.setattr(card_index_service, '_index', None)
+    return {
+        'cards': [{'id': 1, 'status': 'todo', 'story_points': 3}, {'id': 2, 'status': 'todo', 'story_points': 5},
+                  {'id': 3, 'status': 'todo'}],
+        'stories': [{'id': 1, 'status': 'todo', 'story_points': '2'}],
+        'sprints': []
+    }
+
+
+def test_measure_counts_points_and_items(data):
+    sprint = {'id': 1, 'items': [{'type': 'card', 'id': 1}, {'type': 'card', 'id': 2},
+                                 {'type': 'story', 'id': 1}, {'type': 'card', 'id': 404}]}
+    data['cards'][0]['status'] = 'done'
+    assert measure(sprint, data) == {'total': 10, 'remaining': 7, 'items': 3, 'items_remaining': 2}
+
+
+def test_burndown_carries_snapshots_forward_and_stops_at_completion():
+    sprint = {'status': 'completed', 'start_date': '2024-05-01', 'end_date': '2024-05-05',
+              'completed_at': '2024-05-04 17:00:00'}
+    snapshots = {'2024-05-01': _snap(10, 10), '2024-05-03': _snap(12, 5), '2024-05-04': _snap(12, 2)}
+    series = burndown(sprint, snapshots, _snap(12, 2), date(2024, 5, 10))
+    assert series['unit'] == 'points'
+    assert series['days'] == ['2024-05-01', '2024-05-02', '2024-05-03', '2024-05-04', '2024-05-05']
+    assert series['ideal'] == [10, 7.5, 5, 2.5, 0]
+    assert series['remaining'] == [10, 10, 5, 2, None]
+    assert series['completed'] == [0, 0, 7, 10, None]
+    assert series['scope'] == [10, 10, 12, 12, None]
+
+
+def test_active_burndown_uses_live_numbers_today_and_items_without_points():
+    today = date(2024, 5, 3)
+    sprint = {'status': 'active', 'start_date': '2024-05-01', 'end_date': '2024-05-04'}
+    snapshots = {'2024-04-30': _snap(0, 0, 4, 4)}
+    series = burndown(sprint, snapshots, _snap(0, 0, 5, 2), today)
+    assert series['unit'] == 'items'
+    # The snapshot from before the planned start stands in for the first days
+    assert series['remaining'] == [4, 4, 2, None]
+    assert series['scope'] == [4, 4, 5, None]
+
+
+def test_velocity_rolls_over_completed_sprints(data):
+    for sprint_id, (total, remaining) in enumerate([(10, 2), (6, 0), (9, 5)], start=1):
+        sprint = {'id': sprint_id, 'project_id': 1, 'status': 'completed', 'items': [],
+                  'completed_at': f'2024-05-0{sprint_id} 12:00:00', 'story_points': 10}
+        data['sprints'].append(sprint)
+        # A snapshot taken after completion is ignored
+        _write_snapshots(sprint_id, {f'2024-05-0{sprint_id}': _snap(total, remaining),
+                                     f'2024-05-2{sprint_id}': _snap(total, 0)})
+    data['sprints'].append({'id': 9, 'project_id': 1, 'status': 'active', 'items': []})
+
+    result = velocity(None, data, 1, window=2)
+    assert [(s['sprint_id'], s['completed'], s['rolling_average']) for s in result['sprints']] == [
+        (1, 8, 8), (2, 6, 7), (3, 4, 5)]
+    assert result['average'] == 5 and result['sprints'][0]['committed'] == 10
+    assert velocity(None, data, 2)['sprints'] == []
+
+
+def test_snapshots_are_stored_per_day(data):
+    sprint = {'id': 7, 'status': 'active', 'items': [{'type': 'card', 'id': 1}, {'type': 'card', 'id': 3}]}
+    data['sprints'].append(sprint)
+    record_snapshot(None, data, sprint, date(2024, 5, 1))
+    data['cards'][0]['status'] = 'done'
+    record_snapshot(None, data, sprint, date(2024, 5, 2))
+    record_snapshot(None, data, sprint, date(2024, 5, 2))
+    snapshots = load_snapshots(None, 7)
+    assert sorted(snapshots) == ['2024-05-01', '2024-05-02']
+    assert snapshots['2024-05-02']['remaining'] == 0 and snapshots['2024-05-01']['remaining'] == 3
+
+
+def test_snapshot_job_is_scheduled_daily():
+    assert ('sprint_snapshots', job_handlers.SNAPSHOT_HOUR, job_handlers.SNAPSHOT_MINUTE) in DAILY_JOBS
+
+
+def test_sprint_analytics_api_follows_the_sprint(login):
+    client = login(1)
+    sprint = client.post('/api/sprints', json={
+        'name': 'S1', 'project_id': 1,
+        'start_date': (date.today() - timedelta(days=1)).isoformat(),
+        'end_date': (date.today() + timedelta(days=1)).isoformat()
+    }).get_json()['sprint']
+    for card_id in (1, 2, 3):
+        client.post(f"/api/sprints/{sprint['id']}/items", json={'type': 'card', 'id': card_id})
+    client.post(f"/api/sprints/{sprint['id']}/start")
+    url = f"/api/sprints/{sprint['id']}/analytics"
+
+    analytics = client.get(url).get_json()
+    assert analytics['status'] == 'active'
+    assert analytics['current'] == {'total': 0, 'remaining': 0, 'items': 3, 'items_remaining': 2}
+    assert analytics['burndown']['unit'] == 'items'
+    assert analytics['burndown']['remaining'] == [None, 2, None]
+
+    # The daily job records every active sprint
+    tomorrow = (date.today() + timedelta(days=1)).isoformat()
+    job_handlers.sprint_snapshots({'date': tomorrow})
+    assert tomorrow in load_snapshots(None, sprint['id'])
+
+    client.post('/api/update_card_status', json={'card_id': 3, 'status': 'done'})
+    assert client.get(url).get_json()['current']['items_remaining'] == 1
+
+    client.post(f"/api/sprints/{sprint['id']}/complete")
+    result = client.get(url).get_json()
+    assert result['status'] == 'completed'
+    assert result['velocity']['sprints'][0]['completed'] == 2
+    assert client.get('/api/sprints/99/analytics').get_json()['success'] is False
@@ -0,0 +1,59 @@
+"""Sprint items resolved to their epics, stories and cards in batched lookups."""
+
+import pytest
+
+from app.services import card_index_service
+from app.services.sprint_item_service import find_item, parse_fields, resolve_items
+
+
+DATA = {
+    'epics': [{'id': 1, 'title': 'Epic one', 'status': 'todo'}],
+    'stories': [{'id': 1, 'title': 'Story one', 'story_points': 5}, {'id': 2, 'title': 'Story two'}],
+    'cards': [{'id': 1, 'title': 'Card one', 'status': 'done'}, {'id': 2, 'title': 'Card two'}],
+}
+
+
+@pytest.fixture(autouse=True)
+def fresh_card_index(monkeypatch):
+    monkeypatch.setattr(card_index_service, '_index', None)
+
+
+def test_items_resolve_in_sprint_order_and_skip_missing():
+    items = [{'type': 'card', 'id': 2}, {'type': 'story', 'id': 1}, {'type': 'epic', 'id': 1},
+             {'type': 'card', 'id': 99}, {'type': 'task', 'id': 1}, {'type': 'story', 'id': 2}]
+    resolved = resolve_items(items, DATA)
+    assert [(i['type'], i['data']['title']) for i in resolved] == [
+        ('card', 'Card two'), ('story', 'Story one'), ('epic', 'Epic one'), ('story', 'Story two')]
+    # Unprojected items are the stored objects themselves
+    assert resolved[1]['data'] is DATA['stories'][0]
+
+
+def test_fields_limit_item_data_but_keep_the_id():
+    assert parse_fields(None) is None and parse_fields(' , ') is None
+    fields = parse_fields('title, story_points')
+    assert fields == ['title', 'story_points']
+    resolved = resolve_items([{'type': 'story', 'id': 1}, {'type': 'card', 'id': 1}], DATA, fields)
+    assert [i['data'] for i in resolved] == [
+        {'id': 1, 'title': 'Story one', 'story_points': 5}, {'id': 1, 'title': 'Card one'}]
+
+
+def test_find_item():
+    assert find_item(DATA, 'epic', 1)['title'] == 'Epic one'
+    assert find_item(DATA, 'story', 3) is None
+    assert find_item(DATA, 'milestone', 1) is None
+
+
+def test_sprint_items_api(login):
+    client = login(1)
+    sprint = client.post('/api/sprints', json={'name': 'S1', 'project_id': 1}).get_json()['sprint']
+    url = f"/api/sprints/{sprint['id']}/items"
+    for item in ({'type': 'card', 'id': 2}, {'type': 'story', 'id': 1}, {'type': 'epic', 'id': 1}):
+        assert client.post(url, json=item).get_json()['success']
+    assert client.post(url, json={'type': 'card', 'id': 2}).get_json()['error'] == 'Card already in sprint'
+    assert client.post(url, json={'type': 'card', 'id': 99}).get_json()['error'] == 'Card not found'
+
+    items = client.get(f'{url}?fields=title').get_json()['items']
+    assert items == [{'type': 'card', 'data': {'id': 2, 'title': 'Design UI'}},
+                     {'type': 'story', 'data': {'id': 1, 'title': items[1]['data']['title']}},
+                     {'type': 'epic', 'data': {'id': 1, 'title': items[2]['data']['title']}}]
+    assert client.get('/api/sprints/99/items').get_json()['error'] == 'Sprint not found'
@@ -0,0 +1,99 @@
+"""Fingerprinted static URLs, immutable caching and the static build script."""
+
+import importlib.util
+import json
+import os
+
+import pytest
+from flask import Flask, url_for
+
+from app.utils.static_assets import (
+    AssetFingerprints, file_digest, fingerprinted_name, init_static_assets, split_fingerprint
+)
+from conftest import REPO_ROOT
+
+
+def _load_build_script():
+    spec = importlib.util.spec_from_file_location('build_static', os.path.join(REPO_ROOT, 'scripts', 'build_static.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture
+def static(tmp_path):
+    folder = tmp_path / 'static'
+    (folder / 'js').mkdir(parents=True)
+    (folder / 'js' / 'app.js').write_text('function add(a, b) {\n    return a + b;\n}\n')
+    (folder / 'site.css').write_text('body {\n    color: red;\n}\n')
+    return folder
+
+
+def _app(static):
+    flask_app = Flask(__name__, static_folder=str(static))
+    init_static_assets(flask_app)
+    return flask_app
+
+
+def test_fingerprint_names_round_trip():
+    assert fingerprinted_name('js/app.js', '0123456789') == 'js/app.0123456789.js'
+    assert split_fingerprint('js/app.0123456789.js') == ('js/app.js', '0123456789')
+    assert split_fingerprint('js/app.js') == ('js/app.js', None)
+    assert split_fingerprint('js/app.0123.js') == ('js/app.0123.js', None)
+
+
+def test_urls_change_with_contents(static):
+    fingerprints = AssetFingerprints(str(static))
+    first = fingerprints.url_name('js/app.js')
+    assert first == fingerprinted_name('js/app.js', file_digest(str(static / 'js' / 'app.js')))
+    path = static / 'js' / 'app.js'
+    path.write_text('// changed\n')
+    os.utime(path, (os.path.getmtime(path) + 5,) * 2)
+    assert fingerprints.url_name('js/app.js') != first
+    assert fingerprints.url_name('missing.js') == 'missing.js'
+
+
+def test_current_fingerprint_is_served_immutable(static):
+    flask_app = _app(static)
+    with flask_app.test_request_context():
+        url = url_for('static', filename='js/app.js')
+    client = flask_app.test_client()
+    response = client.get(url)
+    assert response.status_code == 200
+    assert 'immutable' in response.headers['Cache-Control']
+    assert 'max-age=31536000' in response.headers['Cache-Control']
+    response.close()
+    # An outdated fingerprint still resolves but must be revalidated
+    stale = client.get('/static/js/app.0000000000.js')
+    assert stale.status_code == 200 and 'immutable' not in stale.headers.get('Cache-Control', '')
+    stale.close()
+
+
+def test_build_writes_copies_manifest_and_minifies(static, monkeypatch):
+    build_static = _load_build_script()
+    strip = {'.js': lambda text: ''.join(text.split()), '.css': lambda text: ''.join(text.split())}
+    manifest = build_static.build(str(static), strip)
+    assert set(manifest) == {'js/app.js', 'site.css'}
+    assert (static / manifest['js/app.js']).read_text() == 'functionadd(a,b){returna+b;}'
+    assert json.loads((static / 'manifest.json').read_text()) == manifest
+
+    # A rebuild after an edit removes the old copy, and the manifest drives URLs
+    (static / 'site.css').write_text('p { margin: 0; }\n')
+    old_copy = manifest['site.css']
+    manifest = build_static.build(str(static), {})
+    assert not (static / old_copy).exists()
+    assert AssetFingerprints(str(static)).url_name('site.css') == manifest['site.css']
+
+
+def test_minifiers_are_optional(monkeypatch):
+    build_static = _load_build_script()
+    import builtins
+    real_import = builtins.__import__
+
+    def no_minifiers(name, *args, **kwargs):
+        if name in ('rcssmin', 'rjsmin'):
+            raise ImportError(name)
+        return real_import(name, *args, **kwargs)
+
+    monkeypatch.setattr(builtins, '__import__', no_minifiers)
+    assert build_static.load_minifiers() == {}
@@ -0,0 +1,75 @@
+"""Incrementally maintained dashboard counters."""
+
+from app.services.stats_service import StatsStore, compute_stats
+
+
+DATA = {
+    'cards': [
+        {'id': 1, 'project_id': 1, 'status': 'todo'},
+        {'id': 2, 'project_id': 1, 'status': 'done'},
+        {'id': 3, 'project_id': 2, 'status': 'in_progress'},
+    ],
+    'users': [{'id': 1}, {'id': 2}],
+    'projects': [{'id': 1}, {'id': 2}],
+    'comments': [{'id': 1}],
+}
+
+
+def _store():
+    store = StatsStore()
+    store.build(DATA)
+    return store
+
+
+def test_build_matches_full_recompute():
+    store = _store()
+    assert store.get_card_stats() == {'todo': 1, 'in_progress': 1, 'done': 1, 'total': 3}
+    assert store.get_card_stats(1) == {'todo': 1, 'in_progress': 0, 'done': 1, 'total': 2}
+    assert store.get_card_stats(99) == {'todo': 0, 'in_progress': 0, 'done': 0, 'total': 0}
+    assert store.get_collection_counts() == {
+        'users_count': 2, 'projects_count': 2, 'cards_count': 3, 'comments_count': 1
+    }
+    assert store.verify(DATA) == []
+
+
+def test_counters_follow_creates_moves_and_deletes():
+    store = _store()
+    store.record_card({'id': 4, 'project_id': 2, 'status': 'todo'})
+    store.record_card({'id': 1, 'project_id': 2, 'status': 'done'})
+    # Recording an unchanged card must not count it twice
+    store.record_card({'id': 1, 'project_id': 2, 'status': 'done'})
+    store.forget_card(3)
+    store.forget_card(3)
+    assert store.get_card_stats() == {'todo': 1, 'in_progress': 0, 'done': 2, 'total': 3}
+    assert store.get_card_stats(1) == {'todo': 0, 'in_progress': 0, 'done': 1, 'total': 1}
+    assert store.get_card_stats(2) == {'todo': 1, 'in_progress': 0, 'done': 1, 'total': 2}
+
+    cards = [{'id': 1, 'project_id': 2, 'status': 'done'}, DATA['cards'][1],
+             {'id': 4, 'project_id': 2, 'status': 'todo'}]
+    assert compute_stats(dict(DATA, cards=cards))['cards'] == store.get_card_stats()
+
+
+def test_collection_sizes_never_go_negative():
+    store = _store()
+    store.adjust('comments', -5)
+    store.adjust('projects', 1)
+    counts = store.get_collection_counts()
+    assert counts['comments_count'] == 0 and counts['projects_count'] == 3
+
+
+def test_verify_reports_drift():
+    store = _store()
+    store.adjust('users', 1)
+    assert store.verify(DATA) == ['users: stored 3, computed 2']
+
+
+def test_routes_keep_counters_consistent(login):
+    client = login(1)
+    before = client.get('/firebase-status').get_json()['data']['cards_count']
+    card = client.post('/api/add_card', json={'title': 'Counted', 'project_id': 1}).get_json()['card']
+    assert client.post('/api/update_card_status', json={'card_id': card['id'], 'status': 'done'}).get_json()['success']
+    assert client.get('/firebase-status').get_json()['data']['cards_count'] == before + 1
+    assert client.post('/api/delete_card', json={'card_id': card['id']}).get_json()['success']
+    status = client.get('/firebase-status?verify=1').get_json()
+    assert status['data']['cards_count'] == before
+    assert status['verified'], status['mismatches']
@@ -0,0 +1,51 @@
+"""Persistent Jinja bytecode cache and template precompilation."""
+
+import os
+
+from flask import Flask
+from jinja2 import FileSystemBytecodeCache
+
+from app.utils.template_cache import init_template_cache, precompile_templates
+
+
+def _app(tmp_path, cache_dir):
+    templates = tmp_path / 'templates'
+    templates.mkdir(exist_ok=True)
+    (templates / 'page.html').write_text('<p>{{ value }}</p>')
+    (templates / 'notes.txt').write_text('not a template page')
+    flask_app = Flask(__name__, template_folder=str(templates))
+    init_template_cache(flask_app, str(cache_dir))
+    return flask_app
+
+
+def test_precompile_fills_the_bytecode_cache(tmp_path):
+    cache_dir = tmp_path / 'cache'
+    flask_app = _app(tmp_path, cache_dir)
+    assert isinstance(flask_app.jinja_env.bytecode_cache, FileSystemBytecodeCache)
+    timings = precompile_templates(flask_app)
+    assert [name for name, _ in timings] == ['page.html']
+    assert len(os.listdir(cache_dir)) == 1
+
+
+def test_new_worker_loads_from_cache_and_sees_edits(tmp_path):
+    cache_dir = tmp_path / 'cache'
+    precompile_templates(_app(tmp_path, cache_dir))
+    entry = os.path.join(cache_dir, os.listdir(cache_dir)[0])
+    cached_at = os.path.getmtime(entry)
+
+    worker = _app(tmp_path, cache_dir)
+    with worker.app_context():
+        assert worker.jinja_env.get_template('page.html').render(value=1) == '<p>1</p>'
+    assert os.path.getmtime(entry) == cached_at
+
+    # An edited source has a new checksum, so the stale bytecode is not used
+    (tmp_path / 'templates' / 'page.html').write_text('<b>{{ value }}</b>')
+    edited = Flask(__name__, template_folder=str(tmp_path / 'templates'))
+    init_template_cache(edited, str(cache_dir))
+    assert edited.jinja_env.get_template('page.html').render(value=2) == '<b>2</b>'
+
+
+def test_app_templates_all_compile(app):
+    names = [name for name, _ in precompile_templates(app)]
+    assert 'issues.html' in names and 'partials/issue_row.html' in names
+    assert os.listdir(os.environ['JINJA_CACHE_DIR'])